@@ -0,0 +1,432 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Stand-in for the REST API of a source and a target GeoServer, for benchmarks.
+
+The source serves a synthetic catalog that is generated on the fly from the request
+path, so catalogs with 100k layers need (almost) no memory. Every workspace has datastores
+with featureTypes plus one coverage, WMS and WMTS store with one layer each, styles and
+layergroups; a global style and a global layergroup (that nests the workspace layergroups)
+exist as well. The target accepts all POSTs and PUTs and answers 409 for objects
+that were created before.
+
+    python bench/mock_geoserver.py --port 8765 --layers 10000 --latency 5 --error-rate 0.01
+
+The endpoints are http://127.0.0.1:<port>/source/geoserver and /target/geoserver,
+statistics are served at /__stats and reset by a POST to /__reset.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# layer type, store type and store name of the layers that are not featureTypes
+OTHER_LAYERS = [
+    ("coverages", "coveragestores", "coverageStore", "coverage", "cs0"),
+    ("wmslayers", "wmsstores", "wmsStore", "wmsLayer", "wms0"),
+    ("wmtslayers", "wmtsstores", "wmtsStore", "wmtsLayer", "wmts0"),
+]
+
+DEFAULT_STYLES = ["point", "line", "polygon", "raster", "generic"]
+
+# the version of both sides, as sampled by the plan command
+VERSION = {"about": {"resource": [{"@name": "GeoServer", "Version": "2.25.2"}]}}
+
+SLD = """<?xml version="1.0" encoding="UTF-8"?>
+<StyledLayerDescriptor version="1.0.0" xmlns="http://www.opengis.net/sld">
+  <NamedLayer><Name>{name}</Name><UserStyle><FeatureTypeStyle><Rule>
+    <PointSymbolizer/>
+  </Rule></FeatureTypeStyle></UserStyle></NamedLayer>
+</StyledLayerDescriptor>
+"""
+
+
+class Catalog:
+    """
+    Synthetic source catalog, every object is derived from its name.
+    """
+
+    def __init__(self, base_url: str, layers: int, workspaces: int, datastores: int, styles: int, layers_per_group: int):
+        self.base_url = base_url
+        self.workspaces = [f"ws{w}" for w in range(workspaces)]
+        self.layers_per_workspace = max(1, math.ceil(layers / workspaces))
+        self.datastores = datastores
+        self.styles = styles
+        self.layers_per_group = layers_per_group
+
+    def href(self, path: str, ext: str = "json"):
+        return f"{self.base_url}/rest/{path}.{ext}"
+
+    def has_other_layers(self):
+        # a coverage, a WMS and a WMTS layer per workspace, if there are enough layers
+        return self.layers_per_workspace > len(OTHER_LAYERS)
+
+    def feature_type_count(self):
+        return self.layers_per_workspace - (len(OTHER_LAYERS) if self.has_other_layers() else 0)
+
+    def feature_types(self, ws: str):
+        return [(f"ds{i % self.datastores}", f"ft{i}") for i in range(self.feature_type_count())]
+
+    def is_feature_type(self, store: str, name: str):
+        match = re.fullmatch(r"ft(\d+)", name)
+        return match is not None and int(match.group(1)) < self.feature_type_count() and store == f"ds{int(match.group(1)) % self.datastores}"
+
+    def layer_names(self, ws: str):
+        names = [name for _, name in self.feature_types(ws)]
+        if self.has_other_layers():
+            names += [f"{kind}0" for _, _, _, kind, _ in OTHER_LAYERS]
+        return names
+
+    def is_layer(self, name: str):
+        if self.has_other_layers() and name in [f"{kind}0" for _, _, _, kind, _ in OTHER_LAYERS]:
+            return True
+        match = re.fullmatch(r"ft(\d+)", name)
+        return match is not None and int(match.group(1)) < self.feature_type_count()
+
+    def layergroups(self, ws: str):
+        return [f"lg{g}" for g in range(math.ceil(self.layers_per_workspace / self.layers_per_group))]
+
+    def get(self, path: str):
+        """
+        Returns the JSON object (or SLD text) for a REST path without extension, None if it does not exist.
+        """
+        return route(self, path)
+
+
+def route(catalog: Catalog, path: str):
+    c = catalog
+    parts = path.split("/")
+
+    if path == "namespaces":
+        return {"namespaces": {"namespace": [{"name": ws, "href": c.href("namespaces/" + ws)} for ws in c.workspaces]}}
+    if path == "styles":
+        styles = [{"name": name, "href": c.href("styles/" + name)} for name in DEFAULT_STYLES + ["global_style"]]
+        return {"styles": {"style": styles}}
+    if path == "layergroups":
+        return {"layerGroups": {"layerGroup": [{"name": "global_group", "href": c.href("layergroups/global_group")}]}}
+    if len(parts) == 2 and parts[0] == "styles":
+        return style(parts[1], None)
+    if path == "layergroups/global_group":
+        published = [{"@type": "layerGroup", "name": f"{ws}:lg0", "href": c.href(f"workspaces/{ws}/layergroups/lg0")} for ws in c.workspaces]
+        return {"layerGroup": {"name": "global_group", "mode": "SINGLE", "publishables": {"published": published},
+                               "styles": {"style": [{"name": ""} for _ in published]}}}
+
+    if len(parts) == 2 and parts[0] == "namespaces" and parts[1] in c.workspaces:
+        return {"namespace": {"prefix": parts[1], "uri": f"http://example.com/{parts[1]}", "isolated": False}}
+
+    if len(parts) < 3 or parts[0] != "workspaces" or parts[1] not in c.workspaces:
+        return None
+    ws, rest = parts[1], parts[2:]
+
+    # store lists and stores
+    if rest == ["datastores"]:
+        return {"dataStores": {"dataStore": [{"name": f"ds{i}", "href": c.href(f"workspaces/{ws}/datastores/ds{i}")} for i in range(c.datastores)]}}
+    if len(rest) == 2 and rest[0] == "datastores" and re.fullmatch(r"ds\d+", rest[1]) and int(rest[1][2:]) < c.datastores:
+        return datastore(ws, rest[1])
+    for _, store_path, store_key, _, store_name in OTHER_LAYERS:
+        if rest == [store_path]:
+            stores = [{"name": store_name, "href": c.href(f"workspaces/{ws}/{store_path}/{store_name}")}] if c.has_other_layers() else []
+            return {store_key + "s": {store_key: stores} if stores else ""}
+        if rest == [store_path, store_name] and c.has_other_layers():
+            return other_store(ws, store_key, store_name)
+
+    # layer lists and resources
+    if rest == ["featuretypes"]:
+        return {"featureTypes": {"featureType": [{"name": name, "href": c.href(f"workspaces/{ws}/datastores/{ds}/featuretypes/{name}")}
+                                                 for ds, name in c.feature_types(ws)]}}
+    if len(rest) == 4 and rest[0] == "datastores" and rest[2] == "featuretypes" and c.is_feature_type(rest[1], rest[3]):
+        return {"featureType": {"name": rest[3], "nativeName": rest[3], "title": rest[3], "srs": "EPSG:4326", "enabled": True,
+                                "store": {"@class": "dataStore", "name": f"{ws}:{rest[1]}"}}}
+    for layer_path, store_path, store_key, layer_key, store_name in OTHER_LAYERS:
+        if rest == [layer_path]:
+            layers = [{"name": f"{layer_key}0", "href": c.href(f"workspaces/{ws}/{store_path}/{store_name}/{layer_path}/{layer_key}0")}] if c.has_other_layers() else []
+            return {layer_key + "s": {layer_key: layers} if layers else ""}
+        if rest == [store_path, store_name, layer_path, f"{layer_key}0"] and c.has_other_layers():
+            return {layer_key: {"name": f"{layer_key}0", "nativeName": f"{layer_key}0", "enabled": True,
+                                "store": {"@class": store_key, "name": f"{ws}:{store_name}"}}}
+
+    # layer settings
+    if len(rest) == 2 and rest[0] == "layers" and c.is_layer(rest[1]):
+        index = sum(map(ord, rest[1]))
+        return {"layer": {"name": rest[1], "type": "VECTOR", "defaultStyle": {"name": f"{ws}:style{index % c.styles}"},
+                          "styles": {"style": [{"name": "global_style"}]}, "resource": layer_resource(c, ws, rest[1])}}
+
+    # styles
+    if rest == ["styles"]:
+        return {"styles": {"style": [{"name": f"style{i}", "href": c.href(f"workspaces/{ws}/styles/style{i}")} for i in range(c.styles)]}}
+    if len(rest) == 2 and rest[0] == "styles" and rest[1] in {f"style{i}" for i in range(c.styles)}:
+        return style(rest[1], ws)
+
+    # layergroups
+    if rest == ["layergroups"]:
+        return {"layerGroups": {"layerGroup": [{"name": lg, "href": c.href(f"workspaces/{ws}/layergroups/{lg}")} for lg in c.layergroups(ws)]}}
+    if len(rest) == 2 and rest[0] == "layergroups" and rest[1] in c.layergroups(ws):
+        g = int(rest[1][2:])
+        names = c.layer_names(ws)[g * c.layers_per_group:(g + 1) * c.layers_per_group]
+        published = [{"@type": "layer", "name": f"{ws}:{name}", "href": c.href(f"workspaces/{ws}/layers/{name}")} for name in names]
+        return {"layerGroup": {"name": rest[1], "mode": "SINGLE", "workspace": {"name": ws},
+                               "publishables": {"published": published}, "styles": {"style": [{"name": ""} for _ in published]}}}
+
+    return None
+
+
+def layer_resource(c, ws: str, name: str):
+    # the reference to the featureType, coverage, ... of a layer, as in the layer settings of GeoServer
+    for layer_path, store_path, store_key, layer_key, store_name in OTHER_LAYERS:
+        if name == f"{layer_key}0":
+            return {"@class": layer_key, "name": f"{ws}:{name}", "href": c.href(f"workspaces/{ws}/{store_path}/{store_name}/{layer_path}/{name}")}
+    ds = f"ds{int(name[2:]) % c.datastores}"
+    return {"@class": "featureType", "name": f"{ws}:{name}", "href": c.href(f"workspaces/{ws}/datastores/{ds}/featuretypes/{name}")}
+
+
+def style(name: str, ws):
+    obj = {"name": name, "format": "sld", "languageVersion": {"version": "1.0.0"}, "filename": name + ".sld"}
+    if ws is not None:
+        obj["workspace"] = {"name": ws}
+    return {"style": obj}
+
+
+def datastore(ws: str, name: str):
+    params = [
+        {"@key": "dbtype", "$": "postgis"},
+        {"@key": "host", "$": "db.example.com"},
+        {"@key": "port", "$": "5432"},
+        {"@key": "database", "$": "gis"},
+        {"@key": "user", "$": "geoserver"},
+        {"@key": "passwd", "$": "crypt2:Zm9vYmFy"},
+        {"@key": "schema", "$": ws},
+    ]
+    return {"dataStore": {"name": name, "type": "PostGIS", "enabled": True, "workspace": {"name": ws},
+                          "connectionParameters": {"entry": params}}}
+
+
+def other_store(ws: str, store_key: str, name: str):
+    obj = {"name": name, "enabled": True, "workspace": {"name": ws}}
+    if store_key == "coverageStore":
+        obj.update({"type": "GeoTIFF", "url": f"file:data/{ws}/{name}.tif"})
+    else:
+        obj.update({"type": store_key[:-5].upper(), "capabilitiesURL": f"https://maps.example.com/{ws}?request=GetCapabilities"})
+    return {store_key: obj}
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+        self.errors = 0
+        self.latencies = []
+        self.created = set()
+        self.updated = 0
+
+    def to_json(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            return {
+                "requests": dict(self.requests),
+                "injected_errors": self.errors,
+                "latency_ms": {
+                    "p50": percentile(latencies, 50) * 1000,
+                    "p99": percentile(latencies, 99) * 1000,
+                    "max": (latencies[-1] if latencies else 0) * 1000,
+                },
+                "created_objects": len(self.created),
+                "updated_objects": self.updated,
+            }
+
+
+def percentile(values: list, p: float):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def create_handler(catalog: Catalog, stats: Stats, latency: float, jitter: float, error_rate: float, write_capacity: int = 0):
+    # writes to the target in progress, to simulate a target that is overloaded by too many concurrent writes
+    writes = {"count": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body are written at once, otherwise delayed ACKs stall every keep-alive request
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def send(self, code: int, body=b"", content_type: str = "application/json"):
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body).encode("utf-8")
+            elif isinstance(body, str):
+                body = body.encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_body(self):
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def handle_request(self, method: str):
+            url = urlparse(self.path)
+
+            if url.path == "/__stats":
+                return self.send(200, stats.to_json())
+            if url.path == "/__reset":
+                with stats.lock:
+                    stats.reset()
+                return self.send(200, "")
+
+            start = time.perf_counter()
+            body = self.read_body() if method in ["POST", "PUT"] else b""
+            code, response, content_type = self.answer(method, url, body)
+            duration = time.perf_counter() - start
+
+            with stats.lock:
+                stats.requests[method] = stats.requests.get(method, 0) + 1
+                stats.latencies.append(duration)
+                if code == 503:
+                    stats.errors += 1
+
+            self.send(code, response, content_type)
+
+        def answer(self, method: str, url, body: bytes):
+            if write_capacity and method != "GET" and "/target/" in url.path:
+                with stats.lock:
+                    writes["count"] += 1
+                    concurrent = writes["count"]
+                try:
+                    # every write beyond the capacity slows down all writes, twice the capacity fails
+                    if concurrent > 2 * write_capacity:
+                        return 503, "overloaded", "text/plain"
+                    return self.answer_request(method, url, body, max(1, concurrent / write_capacity))
+                finally:
+                    with stats.lock:
+                        writes["count"] -= 1
+            return self.answer_request(method, url, body)
+
+        def answer_request(self, method: str, url, body: bytes, slowdown: float = 1):
+            if latency or jitter:
+                time.sleep((latency + random.uniform(0, jitter)) * slowdown)
+            if error_rate and random.random() < error_rate:
+                return 503, "injected error", "text/plain"
+
+            match = re.fullmatch(r"/(source|target)/geoserver/rest/(.+?)(?:\.(json|sld|xml))?", url.path)
+            if match is None:
+                return 404, "not found", "text/plain"
+            side, path, ext = match.groups()
+
+            if path == "about/version" and method == "GET":
+                return 200, VERSION, "application/json"
+            if side == "source":
+                if method != "GET":
+                    return 405, "the source is read-only", "text/plain"
+                obj = catalog.get(path)
+                if obj is None:
+                    return 404, "not found", "text/plain"
+                if ext == "sld":
+                    if "style" not in obj:
+                        return 404, "not found", "text/plain"
+                    return 200, SLD.format(name=obj["style"]["name"]), "application/vnd.ogc.sld+xml"
+                return 200, obj, "application/json"
+
+            if method == "GET":
+                return 404, "not found", "text/plain"
+            if method == "PUT":
+                with stats.lock:
+                    stats.updated += 1
+                return 200, "", "text/plain"
+
+            name = get_posted_name(body, parse_qs(url.query))
+            with stats.lock:
+                if (path, name) in stats.created:
+                    return 409, f"'{name}' already exists", "text/plain"
+                stats.created.add((path, name))
+            return 201, name or "", "text/plain"
+
+        def do_GET(self):
+            self.handle_request("GET")
+
+        def do_POST(self):
+            self.handle_request("POST")
+
+        def do_PUT(self):
+            self.handle_request("PUT")
+
+    return Handler
+
+
+def get_posted_name(body: bytes, query: dict):
+    if "name" in query:
+        return query["name"][0]
+    try:
+        obj = json.loads(body)
+    except ValueError:
+        return None
+    root = next(iter(obj.values()), {}) if isinstance(obj, dict) else {}
+    return root.get("name") or root.get("prefix") if isinstance(root, dict) else None
+
+
+def serve(port: int, catalog_args: dict, latency: float = 0, jitter: float = 0, error_rate: float = 0, write_capacity: int = 0):
+    catalog = Catalog(f"http://127.0.0.1:{port}/source/geoserver", **catalog_args)
+    server = ThreadingHTTPServer(("127.0.0.1", port), create_handler(catalog, Stats(), latency, jitter, error_rate, write_capacity))
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    print(f"[*] Mock GeoServer with {len(catalog.workspaces)} workspaces and {len(catalog.workspaces) * catalog.layers_per_workspace} layers "
+          f"listening on http://127.0.0.1:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def add_catalog_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--layers", type=int, default=100, help="number of layers (default: 100)")
+    parser.add_argument("--workspaces", type=int, default=0, help="number of workspaces (default: one per 500 layers)")
+    parser.add_argument("--datastores", type=int, default=4, help="datastores per workspace (default: 4)")
+    parser.add_argument("--styles", type=int, default=10, help="styles per workspace (default: 10)")
+    parser.add_argument("--layers-per-group", type=int, default=50, help="layers per layergroup (default: 50)")
+    parser.add_argument("--latency", type=float, default=0, help="latency per request in ms (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0, help="random additional latency per request in ms (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0, help="share of requests answered with 503 (default: 0)")
+    parser.add_argument("--write-capacity", type=int, default=0,
+                        help="concurrent writes the target sustains, more slow it down and twice as many fail with 503 (default: unlimited)")
+
+
+def get_catalog_args(args):
+    return {
+        "layers": args.layers,
+        "workspaces": args.workspaces or max(1, math.ceil(args.layers / 500)),
+        "datastores": args.datastores,
+        "styles": args.styles,
+        "layers_per_group": args.layers_per_group,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock REST API of a source and a target GeoServer.")
+    parser.add_argument("--port", type=int, default=8765)
+    add_catalog_arguments(parser)
+    args = parser.parse_args()
+    serve(args.port, get_catalog_args(args), args.latency / 1000, args.jitter / 1000, args.error_rate, args.write_capacity)
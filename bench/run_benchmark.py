@@ -0,0 +1,171 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Benchmarks a full run of src/main.py against the mock GeoServer (see mock_geoserver.py).
+
+For every catalog size a fresh mock GeoServer is started and the sync tool is run in
+its own process, so the peak memory of each run can be measured separately.
+
+    python bench/run_benchmark.py --sizes 100 10000 --engine dag --workers 16 --latency 5
+
+Reports objects/second (created or updated objects on the target), requests/second,
+p50/p99 latency of the requests (as seen by the mock, incl. the injected latency) and
+the peak memory (max. RSS) of the sync process.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from mock_geoserver import add_catalog_arguments, get_catalog_args
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(BENCH_DIR, "..", "src", "main.py")
+
+CONFIG_TEMPLATE = """
+[source]
+url = "{base_url}/source/geoserver"
+user = "admin"
+password = "geoserver"
+
+[target]
+url = "{base_url}/target/geoserver"
+user = "admin"
+password = "geoserver"
+
+[sync]
+workers = {workers}
+engine = "{engine}"
+
+[http]
+max_in_flight = {max_in_flight}
+
+[secrets]
+interactive = false
+
+[limits]
+enabled = {limits}
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sync tool against a mock GeoServer.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 100000], help="numbers of layers (default: 100 10000 100000)")
+    parser.add_argument("--engine", default="threads", choices=["threads", "dag", "asyncio"])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--limits", action="store_true", help="adapt the concurrency to the mock (see [limits])")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--keep-logs", action="store_true", help="keep the output of the sync runs")
+    add_catalog_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        args.layers = size
+        result = run(args)
+        results.append(result)
+        print_result(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[*] Wrote results to '{args.output}'")
+
+
+def run(args):
+    catalog_args = get_catalog_args(args)
+    port = get_free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    mock_cmd = [sys.executable, os.path.join(BENCH_DIR, "mock_geoserver.py"), "--port", str(port),
+                "--layers", str(args.layers), "--workspaces", str(catalog_args["workspaces"]),
+                "--datastores", str(args.datastores), "--styles", str(args.styles),
+                "--layers-per-group", str(args.layers_per_group), "--latency", str(args.latency),
+                "--jitter", str(args.jitter), "--error-rate", str(args.error_rate),
+                "--write-capacity", str(args.write_capacity)]
+    mock = subprocess.Popen(mock_cmd, stdout=subprocess.PIPE, text=True)
+
+    try:
+        # the mock prints one line when it is listening
+        mock.stdout.readline()
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            with open(os.path.join(work_dir, "config.toml"), "w", encoding="utf-8") as f:
+                f.write(CONFIG_TEMPLATE.format(base_url=base_url, workers=args.workers, engine=args.engine,
+                                               max_in_flight=args.max_in_flight, limits=str(args.limits).lower()))
+
+            # all mock datastores share one database
+            env = {**os.environ, "GEOSERVER_SYNC_PASSWORD_DB_EXAMPLE_COM": "secret"}
+            log_path = os.path.join(work_dir if not args.keep_logs else ".", f"bench_{args.engine}_{args.layers}.log")
+
+            with open(log_path, "w", encoding="utf-8") as log:
+                start = time.perf_counter()
+                sync = subprocess.Popen([sys.executable, os.path.abspath(MAIN)], cwd=work_dir, env=env,
+                                        stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+                # wait4 returns the resource usage of this child only
+                _, status, usage = os.wait4(sync.pid, 0)
+                duration = time.perf_counter() - start
+                sync.returncode = os.waitstatus_to_exitcode(status)
+
+        with urllib.request.urlopen(base_url + "/__stats") as response:
+            stats = json.load(response)
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    requests = sum(stats["requests"].values())
+    objects = stats["created_objects"]
+
+    return {
+        "layers": args.layers,
+        "engine": args.engine,
+        "workers": args.workers,
+        "exit_code": sync.returncode,
+        "duration_s": round(duration, 3),
+        "objects": objects,
+        "objects_per_s": round(objects / duration, 1),
+        "requests": requests,
+        "requests_per_s": round(requests / duration, 1),
+        "latency_p50_ms": round(stats["latency_ms"]["p50"], 2),
+        "latency_p99_ms": round(stats["latency_ms"]["p99"], 2),
+        "injected_errors": stats["injected_errors"],
+        # ru_maxrss is in kilobytes on Linux
+        "peak_memory_mb": round(usage.ru_maxrss / 1024, 1),
+    }
+
+
+def print_result(result: dict):
+    print(f"[*] {result['layers']} layers ({result['engine']}, {result['workers']} workers): "
+          f"{result['duration_s']} s, {result['objects_per_s']} objects/s, {result['requests_per_s']} requests/s, "
+          f"latency p50 {result['latency_p50_ms']} ms / p99 {result['latency_p99_ms']} ms, "
+          f"peak memory {result['peak_memory_mb']} MB")
+    if result["exit_code"] != 0:
+        print(f"[!] The sync exited with code {result['exit_code']}")
+
+
+def get_free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+if __name__ == "__main__":
+    main()
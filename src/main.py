@@ -12,61 +12,654 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import argparse
+import asyncio
+from typing import Optional
+from sync import aio
 from sync.workspaces import sync as sync_workspaces
 from sync.datastores import sync as sync_datastores
 from sync.styles import sync as sync_styles
 from sync.layers import sync as sync_layers
 from sync.layergroups import sync as sync_layergroups
+from sync.pipeline import sync as sync_pipeline
+from sync.files import sync as sync_files, get_files_config
+from sync.tiles import sync as sync_tile_layers, seed as seed_tile_layers, get_gwc_config
+from sync.export import export
+from sync.dependencies import init_puller, merge_pulled
+from sync.shards import sync as sync_shards, print_shard_report, read_answers
+from sync.fanout import sync as sync_targets, sync_async as sync_targets_async
+from sync.watch import watch
+from sync.verify import verify, log_report, DEFAULT_VERIFY_CONFIG
+from sync.plan import plan, log_plan
 from util.config import get_config
-from util.log import log_results
+from util.http import create_client, DEFAULT_HTTP_CONFIG
+from util.async_http import create_async_client
+from util.pool import get_workers, map_parallel
+from util.log import log_results, log_metrics, log_records, format_errors
+from util.metrics import get_metrics
+from util.state import init_state, get_state
+from util.secrets import init_secrets
+from util.results import init_results, close_results
+from util.journal import init_journal, RESUME, RETRY_FAILED
+from util.select import init_selector, get_selector
+from util.shard import parse_shard, apply_shard_paths
+from util.cache import create_cache, ResponseCache
+from util.manifest import FileManifest
+from util.limiter import create_limiters, log_limits, AsyncAdaptiveLimiter
+from util.fanout import ThreadSharedResponses, AsyncSharedResponses, get_targets, get_fanout_buffer, get_target_path
+from util.snapshot import SnapshotClient, AsyncSnapshotClient, DEFAULT_SNAPSHOT_PATH
 
 def main():
 
+    args = parse_args()
+
     # Load config
     config = get_config()
 
-    # Config for source GeoServer
-    source_url = config["source"]["url"]
-    source_user = config["source"]["user"]
-    source_password = config["source"]["password"]
-    source_auth = (source_user, source_password)
-
-    # Config for target GeoServer
-    target_url = config["target"]["url"]
-    target_user = config["target"]["user"]
-    target_password = config["target"]["password"]
-    target_auth = (target_user, target_password)
-
-    # Check if all required config values are set
-    if None in [source_url, source_user, source_password, target_url, target_user, target_password]:
+    # Check if all required config values are set, an export only needs the source, an import only the target(s)
+    if args.command != "import" and None in [config.get("source", {}).get(key) for key in ["url", "user", "password"]]:
         raise ValueError(
             "One or more required GeoServer config values are missing.")
+    targets = get_targets(config) if args.command != "export" else []
+    if len(targets) == 1:
+        config["target"] = targets[0]
+
+    snapshot_path = args.snapshot or config.get("snapshot", {}).get("path", DEFAULT_SNAPSHOT_PATH)
+
+    shard = parse_shard(args.shard) if args.shard else None
+    if (shard or args.shards) and args.command in ["export", "verify"]:
+        raise ValueError("--shard and --shards only apply to sync and import")
+    if (shard or args.shards) and len(targets) > 1:
+        raise ValueError("--shard and --shards only apply to a single target")
+    if args.command == "plan" and (shard or len(targets) > 1):
+        raise ValueError("plan only applies to a single target, --shards shows the estimates by shard")
+    if args.command == "watch":
+        if shard or args.shards or len(targets) > 1 or args.resume or args.retry_failed:
+            raise ValueError("watch only applies to a single target, without --shards, --resume and --retry-failed")
+        # changes are only written to the target if the fingerprints of the objects changed
+        config.setdefault("sync", {})["incremental"] = True
+    if shard:
+        # the worker of a shard (see sync/shards.py) writes its own files and can not ask for passwords
+        apply_shard_paths(config, *shard)
+        config.setdefault("secrets", {})["interactive"] = False
+
+    # machine-readable report of the request and phase metrics (if configured)
+    report_path = args.report or config.get("metrics", {}).get("report", "")
+
+    if args.command == "verify":
+        # compares the current catalogs, so no responses are taken from the cache
+        init_selector(config, args.include, args.exclude)
+        try:
+            equal = verify_catalog(config, targets)
+        finally:
+            write_metrics(report_path)
+        if not equal:
+            raise SystemExit(1)
+        return
+
+    if args.command == "plan":
+        # only the lists of the source are read, nothing is written
+        init_selector(config, args.include, args.exclude)
+        try:
+            planned = plan_catalog(config, args.shards)
+        finally:
+            write_metrics(report_path)
+        if not planned:
+            raise SystemExit(1)
+        return
+
+    # GET responses of the source (if enabled)
+    cache = None if args.command == "import" else create_cache(config.get("cache", {}))
+
+    mode = RESUME if args.resume else RETRY_FAILED if args.retry_failed else None
+
+    if len(targets) > 1:
+        # every target has its own results, state and journal (see sync/fanout.py)
+        init_secrets(config)
+        init_selector(config, args.include, args.exclude)
+        try:
+            transfer_files(config, cache, snapshot_path if args.command == "import" else None, targets)
+            sync_fanout(config, cache, snapshot_path if args.command == "import" else None, targets, mode, args.verbose)
+            seed_tiles(config, targets)
+        finally:
+            close_cache(cache)
+            write_metrics(report_path)
+        return
+
+    # outcome of every object (JSON lines)
+    init_results(config, args.verbose)
+
+    if args.command == "export":
+        try:
+            export_snapshot(config, cache, snapshot_path)
+        finally:
+            close_results()
+            close_cache(cache)
+            write_metrics(report_path)
+        return
+
+    # fingerprints of the objects synced before (incremental mode only)
+    state = init_state(config, config["target"]["url"])
+
+    # raw passwords of the stores
+    init_secrets(config)
+    if shard:
+        # the passwords asked for by the coordinator
+        read_answers()
+
+    # include and exclude rules to sync only a part of the catalog
+    init_selector(config, args.include, args.exclude, shard)
+
+    # finished objects, to resume an interrupted run or to retry the failed objects
+    journal = init_journal(config, config["target"]["url"], mode) if args.command != "watch" else None
+
+    try:
+        if args.command == "watch":
+            watch_catalog(config, cache, args.verbose, report_path)
+        elif args.shards:
+            transfer_files(config, cache, snapshot_path if args.command == "import" else None, targets)
+            sync_sharded(config, cache, snapshot_path if args.command == "import" else None, args.shards, get_worker_args(args))
+            seed_tiles(config, targets)
+        else:
+            if not shard:
+                # the coordinator of a sharded sync uploads the files of all shards
+                transfer_files(config, cache, snapshot_path if args.command == "import" else None, targets)
+            results = sync_catalog(config, cache, snapshot_path if args.command == "import" else None)
+            if shard and results is not None:
+                print_shard_report(results)
+            elif not shard:
+                # the coordinator of a sharded sync seeds once all shards are done
+                seed_tiles(config, targets)
+    finally:
+        if state is not None:
+            state.save()
+            print(f"[*] Saved fingerprints of {len(state.fingerprints)} objects to '{state.path}'")
+        close_results()
+        if journal is not None:
+            journal.close()
+        close_cache(cache)
+        write_metrics(report_path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Migrate the catalog of a source GeoServer to a target GeoServer via REST.")
+    parser.add_argument("command", nargs="?", default="sync", choices=["sync", "export", "import", "watch", "verify", "plan"],
+                        help="sync from the source to the target (default), export the source to a snapshot, "
+                             "import a snapshot to the target, keep the target in sync until interrupted (see [watch]), "
+                             "compare the catalog of the target with the source (see [verify]) "
+                             "or estimate the duration of a sync without running it (see [plan])")
+    parser.add_argument("--snapshot", help=f"path of the snapshot (default: [snapshot] path or '{DEFAULT_SNAPSHOT_PATH}')")
+    parser.add_argument("--report", help="write the metrics of the run to this file, in the Prometheus text format "
+                                         "if it ends with .prom, as JSON otherwise (default: [metrics] report)")
+    journal = parser.add_mutually_exclusive_group()
+    journal.add_argument("--resume", action="store_true",
+                         help="skip all objects finished by the previous runs (see [journal])")
+    journal.add_argument("--retry-failed", action="store_true",
+                         help="only sync the objects that failed in the previous runs (see [journal])")
+    parser.add_argument("--include", action="append", metavar="KIND=PATTERN",
+                        help="only sync the objects of a kind (workspaces, stores, styles, layers or layergroups) "
+                             "matching the pattern, e.g. layers='topp:roads*' (repeatable, see [select])")
+    parser.add_argument("--exclude", action="append", metavar="KIND=PATTERN",
+                        help="do not sync the objects of a kind matching the pattern (repeatable, see [select])")
+    parser.add_argument("--verbose", action="store_true", help="list every object in the summary, not only the counts")
+    shards = parser.add_mutually_exclusive_group()
+    shards.add_argument("--shards", type=int, metavar="COUNT",
+                        help="split the workspaces among this many worker processes (see [shard])")
+    shards.add_argument("--shard", metavar="INDEX/COUNT", help="only sync the workspaces of this shard, e.g. 2/4 "
+                                                                "(run by the coordinator, see --shards)")
+    return parser.parse_args()
+
+
+def get_worker_args(args) -> list[str]:
+    """
+    Returns the arguments a coordinator passes on to the workers of the shards.
+    """
+    worker_args = [args.command]
+    if args.snapshot:
+        worker_args += ["--snapshot", args.snapshot]
+    if args.resume:
+        worker_args.append("--resume")
+    if args.retry_failed:
+        worker_args.append("--retry-failed")
+    for include in args.include or []:
+        worker_args += ["--include", include]
+    for exclude in args.exclude or []:
+        worker_args += ["--exclude", exclude]
+    if args.verbose:
+        worker_args.append("--verbose")
+    return worker_args
+
+
+def close_cache(cache: Optional[ResponseCache]):
+    if cache is not None:
+        print(f"[*] Source cache: {cache.hits} hits, {cache.revalidations} revalidated, {cache.misses} fetched")
+        cache.close()
+
+
+def write_metrics(report_path: str):
+    metrics = get_metrics()
+    log_metrics(metrics)
+    log_limits()
+    if report_path:
+        metrics.write_report(report_path)
+        print(f"[*] Wrote metrics report to '{report_path}'")
+
+
+def get_http_config(config: dict, targets: int = 1):
+    # the connection pool must be large enough to serve all worker threads (of all targets that share the source),
+    # which fetch the resource and the settings of a layer at the same time
+    http_config = dict(config.get("http", {}))
+    http_config["pool_size"] = max(http_config.get("pool_size", DEFAULT_HTTP_CONFIG["pool_size"]), 2 * get_workers() * targets)
+    return http_config
+
+
+def export_snapshot(config: dict, cache: Optional[ResponseCache], path: str):
+    source = create_client(config["source"], get_http_config(config), "source")
+    source.cache = cache
+    source.limiters = create_limiters(config, "source")
+
+    print(f"[*] Exporting catalog of {source.url} to snapshot '{path}'...")
+    with get_metrics().timer("phase", "export"):
+        results = export(source, path)
+
+    print(f"[*] Exported {results.success_count} objects from source")
+    if results.failed_count:
+        print(f"[!] Failed to export {results.failed_count} objects ({format_errors(results)}).")
+    log_records()
+
+
+def create_clients(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str] = None):
+    # HTTP clients are created once and shared by all sync steps,
+    # so that connections to the GeoServers are reused
+    return create_source(config, cache, snapshot_path), create_target(config, "target")
+
+
+def create_source(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str] = None, targets: int = 1):
+    if snapshot_path is not None:
+        source = SnapshotClient(snapshot_path)
+        print(f"[*] Importing snapshot '{snapshot_path}' of {source.url} ({source.created})")
+        return source
+
+    source = create_client(config["source"], get_http_config(config, targets), "source")
+    source.cache = cache
+    # the concurrency adapts to what the GeoServers sustain (if enabled)
+    source.limiters = create_limiters(config, "source")
+    return source
+
+
+def create_target(config: dict, name: str):
+    target = create_client(config["target"], get_http_config(config), name)
+    target.limiters = create_limiters(config, name)
+    return target
+
+
+def sync_sharded(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str], count: int, worker_args: list[str]):
+    """
+    Syncs the catalog with one worker process per shard (see sync/shards.py).
+    """
+    source, target = create_clients(config, cache, snapshot_path)
+    init_puller(source, target)
+
+    print(f"[*] Starting synchronization process ({count} shards)...")
+    with get_metrics().timer("phase", "all"):
+        results = sync_shards(source, target, count, worker_args, config.get("shard", {}).get("command"))
+    log_results(*merge_pulled(*results))
+
+
+def watch_catalog(config: dict, cache: Optional[ResponseCache], verbose: bool, report_path: str):
+    """
+    Keeps the target in sync with the source until interrupted (see sync/watch.py).
+    """
+    # the lists of a poll are always read from the source itself, not from the cache
+    http_config = get_http_config(config)
+    source = create_client(config["source"], http_config, "source")
+    target = create_client(config["target"], http_config, "target")
+
+    # the clients of the syncs (and their limiters) are created once and reused by every poll,
+    # the asyncio clients are bound to the event loop they are used in
+    engine = config.get("sync", {}).get("engine", "threads")
+    loop = asyncio.new_event_loop() if engine == "asyncio" else None
+    if loop is not None:
+        clients = create_async_source(config, cache), create_async_target(config, "target")
+    else:
+        clients = create_clients(config, cache)
+
+    def run_sync():
+        # the results file holds the objects of the last poll
+        init_results(config, verbose)
+        if cache is not None:
+            # the details of the objects are revalidated in every poll, or edits on the source would not be found
+            cache.expire()
+        if loop is not None:
+            return loop.run_until_complete(sync_clients_async(*clients))
+        return sync_clients(engine, *clients)
+
+    def after_poll():
+        state = get_state()
+        state.save()
+        if report_path:
+            get_metrics().write_report(report_path)
+
+    try:
+        watch(config, source, target, run_sync, after_poll)
+    finally:
+        for client in clients:
+            if loop is not None:
+                loop.run_until_complete(client.aclose())
+            else:
+                client.close()
+        if loop is not None:
+            loop.close()
+        source.close()
+        target.close()
+
+
+def plan_catalog(config: dict, shards: Optional[int] = None) -> bool:
+    """
+    Estimates the objects, requests and duration of a sync from the lists of the source (see sync/plan.py).
+    Returns whether the sync could be planned.
+    """
+    http_config = get_http_config(config)
+    source = create_client(config["source"], http_config, "source")
+    target = create_client(config["target"], http_config, "target")
+
+    with get_metrics().timer("phase", "plan"):
+        result = plan(config, source, target, shards)
+    if result is None:
+        return False
+    log_plan(result)
+    return True
+
+
+def verify_catalog(config: dict, targets: list[dict]) -> bool:
+    """
+    Compares the catalog of every target with the source (see sync/verify.py), one target after the other.
+    Returns whether all targets hold the same objects as the source.
+    """
+    http_config = get_http_config(config)
+    source = create_client(config["source"], http_config, "source")
+    source.limiters = create_limiters(config, "source")
+
+    equal = True
+    for target_config in targets:
+        verify_config = dict(config.get("verify", {}))
+        if len(targets) > 1:
+            # every target has its own report
+            verify_config["report"] = get_target_path(verify_config.get("report", DEFAULT_VERIFY_CONFIG["report"]), target_config["name"])
+        target = create_target({**config, "target": target_config}, "target" if len(targets) == 1 else f"target:{target_config['name']}")
+
+        print(f"[*] Verifying {target.url} against {source.url}...")
+        with get_metrics().timer("phase", "verify"):
+            report = verify(source, target, {**config, "verify": verify_config})
+        log_report(report, target.url)
+        equal = equal and report.equal
+    return equal
+
+
+def sync_fanout(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str], targets: list[dict],
+                mode: Optional[str] = None, verbose: bool = False):
+    """
+    Syncs the catalog to several targets at once, reading every object from the source only once (see sync/fanout.py).
+    """
+    engine = config.get("sync", {}).get("engine", "threads")
+
+    if engine == "asyncio":
+        asyncio.run(main_async_fanout(config, cache, snapshot_path, targets, mode, verbose))
+        return
+
+    source = create_source(config, cache, snapshot_path, len(targets))
+    shared = None
+    if snapshot_path is None:
+        shared = source.shared_responses = ThreadSharedResponses([target["name"] for target in targets],
+                                                                 get_fanout_buffer(config))
+
+    def run_target(target_config: dict):
+        target = create_target(target_config, f"target:{target_config['target']['name']}")
+        init_puller(source, target)
+        return sync_target(engine, source, target)
+
+    print(f"[*] Starting synchronization process ({len(targets)} targets)...")
+    with get_metrics().timer("phase", "all"):
+        sync_targets(config, targets, run_target, shared, mode, verbose)
+    if shared is not None:
+        shared.log()
+
+
+def sync_catalog(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str] = None):
+    """
+    Syncs the catalog to the target, from the source GeoServer or (if snapshot_path is given) from a snapshot.
+    Returns the results for workspaces, stores, styles, layers and layergroups, None if no workspace was created.
+    """
+    engine = config.get("sync", {}).get("engine", "threads")
+
+    if engine == "asyncio":
+        return asyncio.run(main_async(config, cache, snapshot_path))
+
+    source, target = create_clients(config, cache, snapshot_path)
+    try:
+        return sync_clients(engine, source, target)
+    finally:
+        source.close()
+        target.close()
+
+
+def sync_clients(engine: str, source, target):
+    """
+    Syncs the catalog to the target with the given clients (threads or dag engine) and logs the results.
+    Returns the results for workspaces, stores, styles, layers and layergroups, None if no workspace was created.
+    """
+    # syncs the dependencies of the selected objects that are not selected themselves
+    init_puller(source, target)
+
+    results = sync_target(engine, source, target)
+    if results is None:
+        log_records()
+    else:
+        log_results(*results)
+    return results
+
+
+def sync_target(engine: str, source, target):
+    """
+    Syncs the catalog to a target with the threads or dag engine.
+    Returns the results for workspaces, stores, styles, layers and layergroups, None if no workspace was created.
+    """
+    if engine == "dag":
+        print("[*] Starting synchronization process (dependency graph)...")
+        with get_metrics().timer("phase", "all"):
+            results = merge_pulled(*sync_pipeline(source, target, get_workers()))
+        sync_tiles(source, target)
+        return results
 
     # start migration in a meaningful order
     print("[*] Starting synchronization process...")
-    workspace_results = sync_workspaces(
-        source_url, source_auth, target_url, target_auth)  # type: ignore
-    created_workspaces = workspace_results.success_objects
+    metrics = get_metrics()
+    with metrics.timer("phase", "workspaces"):
+        workspace_results = sync_workspaces(source, target)
+    # unchanged workspaces (incremental mode) and workspaces done by previous runs (see util.journal)
+    # may still contain objects to sync, a selection (see util.select) may only contain global objects
+    created_workspaces = (workspace_results.success_objects + workspace_results.unchanged_objects
+                          + workspace_results.skipped_objects)
 
-    if not created_workspaces or len(created_workspaces) == 0:
+    if not created_workspaces and not get_selector().active:
         print("[!] No workspaces were created. Exiting synchronization process.")
+        return None
+
+    with metrics.timer("phase", "datastores"):
+        store_results = sync_datastores(created_workspaces, source, target)
+
+    with metrics.timer("phase", "styles"):
+        styles_results = sync_styles(created_workspaces, source, target)
+
+    with metrics.timer("phase", "layers"):
+        layers_results = sync_layers(created_workspaces, source, target)
+
+    with metrics.timer("phase", "layergroups"):
+        layergroups_results = sync_layergroups(created_workspaces, source, target)
+
+    sync_tiles(source, target)
+
+    return merge_pulled(workspace_results, store_results, styles_results,
+                        layers_results, layergroups_results)
+
+
+def sync_tiles(source, target):
+    """
+    Copies the tile layers of the layers and layergroups (if enabled), snapshots do not hold them.
+    """
+    if get_gwc_config()["enabled"] and not isinstance(source, SnapshotClient):
+        with get_metrics().timer("phase", "tiles"):
+            sync_tile_layers(source, target)
+
+
+def transfer_files(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str], targets: list[dict]):
+    """
+    Uploads the files of the file-based stores to every target before the sync (if enabled, see sync/files.py).
+    """
+    settings = get_files_config(config)
+    if not settings["enabled"]:
         return
 
-    store_results = sync_datastores(
-        created_workspaces, source_url, source_auth, target_url, target_auth)  # type: ignore
+    source = create_source(config, cache, snapshot_path)
+    for target_config in targets:
+        target = create_target({**config, "target": target_config}, "target" if len(targets) == 1 else f"target:{target_config['name']}")
+        # every target has its own manifest
+        manifest_path = settings["manifest"] if len(targets) == 1 else get_target_path(settings["manifest"], target_config["name"])
+        manifest = FileManifest(manifest_path, target.url)
+        try:
+            with get_metrics().timer("phase", "files"):
+                sync_files(source, target, settings, manifest)
+        finally:
+            manifest.close()
+
+
+def seed_tiles(config: dict, targets: list[dict]):
+    """
+    Seeds the tile caches of all targets at the same time, after the sync (if enabled, see sync/tiles.py).
+    """
+    settings = get_gwc_config()
+    if not (settings["enabled"] and settings["seed"]):
+        return
+
+    def seed_target(target_config: dict):
+        target = create_target({**config, "target": target_config}, "target" if len(targets) == 1 else f"target:{target_config['name']}")
+        return seed_tile_layers(target)
+
+    with get_metrics().timer("phase", "seed"):
+        map_parallel(seed_target, targets, len(targets))
+
+
+def create_async_source(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str] = None):
+    if snapshot_path is not None:
+        source = AsyncSnapshotClient(snapshot_path)
+        print(f"[*] Importing snapshot '{snapshot_path}' of {source.url} ({source.snapshot.created})")
+        return source
+
+    source = create_async_client(config["source"], config.get("http", {}), "source")
+    source.cache = cache
+    source.limiters = create_limiters(config, "source", AsyncAdaptiveLimiter)
+    return source
+
+
+def create_async_target(config: dict, name: str):
+    target = create_async_client(config["target"], config.get("http", {}), name)
+    target.limiters = create_limiters(config, name, AsyncAdaptiveLimiter)
+    return target
+
+
+async def main_async(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str] = None):
+    """
+    Same as sync_catalog(), but uses the asyncio engine (see sync/aio.py).
+    """
+    source = create_async_source(config, cache, snapshot_path)
+    target = create_async_target(config, "target")
+
+    try:
+        return await sync_clients_async(source, target)
+    finally:
+        await source.aclose()
+        await target.aclose()
+
+
+async def sync_clients_async(source, target):
+    """
+    Same as sync_clients() for the asyncio engine.
+    """
+    aio.init_puller(source, target)
+
+    results = await sync_target_async(source, target)
+    if results is None:
+        log_records()
+    else:
+        log_results(*results)
+    return results
+
+
+async def main_async_fanout(config: dict, cache: Optional[ResponseCache], snapshot_path: Optional[str], targets: list[dict],
+                            mode: Optional[str] = None, verbose: bool = False):
+    """
+    Same as sync_fanout(), but uses the asyncio engine (see sync/aio.py).
+    """
+    source = create_async_source(config, cache, snapshot_path)
+    shared = None
+    if snapshot_path is None:
+        shared = source.shared_responses = AsyncSharedResponses([target["name"] for target in targets],
+                                                                get_fanout_buffer(config))
+
+    async def run_target(target_config: dict):
+        target = create_async_target(target_config, f"target:{target_config['target']['name']}")
+        aio.init_puller(source, target)
+        try:
+            return await sync_target_async(source, target)
+        finally:
+            await target.aclose()
+
+    try:
+        print(f"[*] Starting synchronization process ({len(targets)} targets, asyncio)...")
+        with get_metrics().timer("phase", "all"):
+            await sync_targets_async(config, targets, run_target, shared, mode, verbose)
+        if shared is not None:
+            shared.log()
+    finally:
+        await source.aclose()
+
+
+async def sync_target_async(source, target):
+    """
+    Same as sync_target() for the asyncio engine.
+    """
+    print("[*] Starting synchronization process (asyncio)...")
+    metrics = get_metrics()
+    with metrics.timer("phase", "workspaces"):
+        workspace_results = await aio.sync_workspaces(source, target)
+    # unchanged workspaces (incremental mode) and workspaces done by previous runs (see util.journal)
+    # may still contain objects to sync, a selection (see util.select) may only contain global objects
+    created_workspaces = (workspace_results.success_objects + workspace_results.unchanged_objects
+                          + workspace_results.skipped_objects)
+
+    if not created_workspaces and not get_selector().active:
+        print("[!] No workspaces were created. Exiting synchronization process.")
+        return None
+
+    with metrics.timer("phase", "datastores"):
+        store_results = await aio.sync_datastores(created_workspaces, source, target)
 
-    styles_results = sync_styles(
-        created_workspaces, source_url, source_auth, target_url, target_auth)  # type: ignore
+    with metrics.timer("phase", "styles"):
+        styles_results = await aio.sync_styles(created_workspaces, source, target)
 
-    layers_results = sync_layers(
-        created_workspaces, source_url, source_auth, target_url, target_auth)  # type: ignore
+    with metrics.timer("phase", "layers"):
+        layers_results = await aio.sync_layers(created_workspaces, source, target)
 
-    layergroups_results = sync_layergroups(
-        created_workspaces, source_url, source_auth, target_url, target_auth)  # type: ignore
+    with metrics.timer("phase", "layergroups"):
+        layergroups_results = await aio.sync_layergroups(created_workspaces, source, target)
 
-    log_results(workspace_results, store_results, styles_results,
-                layers_results, layergroups_results)
+    # the tile layers of the layers and layergroups (if enabled), snapshots do not hold them
+    if get_gwc_config()["enabled"] and not isinstance(source, AsyncSnapshotClient):
+        with metrics.timer("phase", "tiles"):
+            await aio.sync_tile_layers(source, target)
 
+    return merge_pulled(workspace_results, store_results, styles_results,
+                        layers_results, layergroups_results)
 
 if __name__ == "__main__":
     main()
@@ -14,13 +14,96 @@
 
 from dataclasses import dataclass, field
 from typing import List, Optional
+from util.results import get_results_writer
 
 @dataclass
 class FailedObject:
     name: str
     reason: str
+    # class of the error: fetch (from the source), dependency, password, unexpected, or of a failed write: transport,
+    # unauthorized, conflict, http or create. By default it is taken from the reason (see util.http.RequestError)
+    error: Optional[str] = None
+    # HTTP status code of a failed write, 0 if there was none
+    code: int = 0
+
+    def __post_init__(self):
+        if self.error is None:
+            self.error = getattr(self.reason, "error", "create")
+            self.code = self.code or getattr(self.reason, "code", 0)
+
+@dataclass(slots=True)
+class ResultRecord:
+    """
+    The outcome of syncing a single object, as written to the results file.
+    """
+    kind: str
+    name: str
+    # synced, unchanged, failed or skipped
+    status: str
+    # HTTP status code of a failed request, 0 if there was none
+    code: int = 0
+    duration: float = 0.0
+    # class of the error of a failed object, e.g. fetch, conflict or transport
+    error: Optional[str] = None
+    reason: Optional[str] = None
 
 @dataclass
 class Result:
     success_objects: List[str] = field(default_factory=list)
     failed_objects: List[FailedObject] = field(default_factory=list)
+    # objects skipped in incremental mode, as they did not change since the last sync
+    unchanged_objects: List[str] = field(default_factory=list)
+    # objects skipped as they were done by a previous run (see util.journal)
+    skipped_objects: List[str] = field(default_factory=list)
+    # the kind of the objects of an aggregated result (e.g. "store"): the objects merged into it are
+    # written to the results file and only counted, the lists above stay empty unless keep_names is set
+    kind: Optional[str] = None
+    keep_names: bool = False
+    success_count: int = 0
+    failed_count: int = 0
+    unchanged_count: int = 0
+    skipped_count: int = 0
+    # number of failed objects by error class
+    errors: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.success_count += len(self.success_objects)
+        self.failed_count += len(self.failed_objects)
+        self.unchanged_count += len(self.unchanged_objects)
+        self.skipped_count += len(self.skipped_objects)
+        for failed in self.failed_objects:
+            self.errors[failed.error] = self.errors.get(failed.error, 0) + 1
+
+    def extend(self, other: "Result", duration: float = 0.0):
+        self.success_count += other.success_count
+        self.failed_count += other.failed_count
+        self.unchanged_count += other.unchanged_count
+        self.skipped_count += other.skipped_count
+        for error, count in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + count
+
+        if self.kind is None or other.kind is not None:
+            # plain results keep everything, aggregated ones only keep the names they kept themselves
+            if self.kind is None or self.keep_names:
+                self.success_objects.extend(other.success_objects)
+                self.unchanged_objects.extend(other.unchanged_objects)
+                self.skipped_objects.extend(other.skipped_objects)
+            if self.kind is None:
+                self.failed_objects.extend(other.failed_objects)
+            return
+
+        writer = get_results_writer()
+        for name in other.success_objects:
+            writer.write(ResultRecord(self.kind, name, "synced", duration=round(duration, 6)))
+        for name in other.unchanged_objects:
+            writer.write(ResultRecord(self.kind, name, "unchanged", duration=round(duration, 6)))
+        for failed in other.failed_objects:
+            writer.write(ResultRecord(self.kind, failed.name, "failed", failed.code, round(duration, 6), failed.error, failed.reason))
+        for name in other.skipped_objects:
+            writer.write(ResultRecord(self.kind, name, "skipped"))
+
+        if self.keep_names:
+            self.success_objects.extend(other.success_objects)
+            self.unchanged_objects.extend(other.unchanged_objects)
+            self.skipped_objects.extend(other.skipped_objects)
+
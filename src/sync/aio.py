@@ -0,0 +1,213 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Asyncio versions of the sync entry points of the workspaces, datastores, styles,
+layers, layergroups and tiles modules. They run the same steps (see util.steps) and
+report the same results, but all objects of a phase are synced as concurrent tasks.
+The number of requests in flight is limited by the AsyncGeoServerClient.
+"""
+
+import asyncio
+import time
+from typing import Optional
+from util.async_http import AsyncGeoServerClient
+from util.steps import run_steps_async
+from model.models import Result
+from util.secrets import get_secrets
+from util.journal import iter_pending
+from util.select import iter_selected, get_selector, set_puller
+from sync.workspaces import get_namespace_tasks, sync_namespace_steps
+from sync.datastores import (STORE_TYPES, get_store_name, list_stores_steps, sync_store_steps, get_password_store_tasks,
+                             ask_missing_passwords)
+from sync.styles import get_style_name, list_styles_steps, sync_style_steps
+from sync.layers import LAYER_TYPES, get_layer_name, list_layers_steps, sync_layer_steps, fq_name
+from sync.layergroups import get_layergroup_name, list_layergroups_steps, fetch_layergroup_steps, LayergroupWaves
+from sync.tiles import get_tile_layer_tasks, list_tile_layers_steps, sync_tile_layer_steps, log_tile_layers
+from sync.dependencies import DependencyPuller, must_pull, pulling, get_cycle_reason
+
+
+async def gather_results(coroutines, result: Optional[Result] = None) -> Result:
+    """
+    Runs the coroutines concurrently and merges their results into the given result or a new one
+    (see util.pool.run_parallel), each one as soon as its coroutine is done.
+    """
+    if result is None:
+        result = Result()
+
+    async def run(coroutine):
+        start = time.perf_counter()
+        item_result = await coroutine
+        result.extend(item_result, time.perf_counter() - start)
+
+    await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+    return result
+
+
+async def gather_lists(coroutines, result: Optional[Result] = None):
+    """
+    Runs list coroutines (returning an iterable of tasks and a Result) concurrently
+    and returns all tasks and the merged Result.
+    """
+    tasks = []
+    if result is None:
+        result = Result()
+    for item_tasks, item_result in await asyncio.gather(*coroutines):
+        tasks.extend(item_tasks)
+        result.extend(item_result)
+    return tasks, result
+
+
+class AsyncDependencyPuller(DependencyPuller):
+    """
+    Same as sync.dependencies.DependencyPuller, pulls each dependency once as a task of the event loop.
+    """
+
+    async def require(self, dependencies: list[tuple]) -> Optional[str]:
+        for kind, workspace, name, store_type in dependencies:
+            reason = await self.ensure(kind, workspace, name, store_type)
+            if reason is not None:
+                return reason
+        return None
+
+    async def ensure(self, kind: str, workspace: Optional[str], name: str, store_type: Optional[str] = None) -> Optional[str]:
+        name_key = (kind, fq_name(workspace, name))
+        if not must_pull(*name_key):
+            return None
+
+        # see DependencyPuller.ensure(), the task of a pull runs in a copy of the context, so it knows its chain
+        chain = pulling.get()
+        task = self.pulled.get(name_key)
+        if task is None:
+            token = pulling.set((*chain, name_key))
+            task = self.pulled[name_key] = asyncio.ensure_future(self.pull_once(kind, workspace, name, store_type))
+            pulling.reset(token)
+            return await task
+
+        if not task.done():
+            if self.closes_cycle(chain, name_key):
+                return get_cycle_reason(*name_key)
+            self.wait(chain, name_key)
+        try:
+            return await task
+        finally:
+            self.wait(chain, None)
+
+    async def pull_once(self, kind: str, workspace: Optional[str], name: str, store_type: Optional[str] = None) -> Optional[str]:
+        return await run_steps_async(self.pull_once_steps(kind, workspace, name, store_type))
+
+
+def init_puller(source: AsyncGeoServerClient, target: AsyncGeoServerClient):
+    """
+    Creates the dependency puller if the run is scoped by include or exclude rules (see sync.dependencies.init_puller).
+    """
+    set_puller(AsyncDependencyPuller(source, target) if get_selector().active else None)
+
+
+async def sync_workspaces(source: AsyncGeoServerClient, target: AsyncGeoServerClient):
+    """
+    Fetch all namespaces from the source GeoServer and create them on the target GeoServer.
+    """
+    namespaces, results = get_namespace_tasks(await source.get_rest_list("namespaces", "namespaces", "namespace"))
+    return await gather_results((run_steps_async(sync_namespace_steps(ns, source, target)) for ns in namespaces), results)
+
+
+async def sync_datastores(workspaces: list[str], source: AsyncGeoServerClient, target: AsyncGeoServerClient):
+    """
+    Fetch all datastores of the given workspaces from the source GeoServer and create them on the target GeoServer.
+    """
+    store_tasks, results = await gather_lists(
+        (run_steps_async(list_stores_steps(workspace, store_type, source)) for workspace in workspaces for store_type in STORE_TYPES),
+        Result(kind="store"))
+    store_tasks = iter_selected("store", store_tasks, get_store_name)
+    store_tasks = list(iter_pending("store", store_tasks, get_store_name, results))
+
+    # ask for all unknown passwords before the first store is synced (see sync.datastores.prepare_passwords)
+    prefetched = {}
+    if get_secrets().interactive:
+        password_tasks = get_password_store_tasks(store_tasks)
+        store_results = await asyncio.gather(*(source.get(task[2]["href"]) for task in password_tasks))
+        prefetched = await asyncio.to_thread(ask_missing_passwords, password_tasks, store_results)
+
+    await gather_results((run_steps_async(sync_store_steps(*task, source, target, prefetched.pop(task[2]["href"], None)))
+                          for task in store_tasks), results)
+
+    return results
+
+
+async def sync_styles(workspaces: list[str], source: AsyncGeoServerClient, target: AsyncGeoServerClient):
+    """
+    Fetch all styles (with and without workspace) from the source GeoServer and create them on the target GeoServer.
+    """
+    style_tasks, results = await gather_lists((run_steps_async(list_styles_steps(workspace, source)) for workspace in [None, *workspaces]),
+                                              Result(kind="style"))
+    style_tasks = iter_selected("style", style_tasks, get_style_name)
+    style_tasks = iter_pending("style", style_tasks, get_style_name, results)
+
+    await gather_results((run_steps_async(sync_style_steps(*task, source, target)) for task in style_tasks), results)
+
+    return results
+
+
+async def sync_layers(workspaces: list[str], source: AsyncGeoServerClient, target: AsyncGeoServerClient):
+    """
+    Fetch all layers of the given workspaces from the source GeoServer and create them on the target GeoServer.
+    """
+    layer_tasks, results = await gather_lists(
+        (run_steps_async(list_layers_steps(workspace, layer_type, source)) for workspace in workspaces for layer_type in LAYER_TYPES),
+        Result(kind="layer"))
+    layer_tasks = iter_selected("layer", layer_tasks, get_layer_name)
+    layer_tasks = iter_pending("layer", layer_tasks, get_layer_name, results)
+
+    await gather_results((run_steps_async(sync_layer_steps(*task, source, target)) for task in layer_tasks), results)
+
+    return results
+
+
+async def sync_layergroups(workspaces: list[str], source: AsyncGeoServerClient, target: AsyncGeoServerClient):
+    """
+    Fetch all layergroups (with and without workspace) from the source GeoServer and create them on the target GeoServer,
+    in waves of groups whose nested groups were created before (see sync.layergroups.sync).
+    """
+    results = Result(kind="layergroup")
+    layergroup_tasks, _ = await gather_lists(
+        (run_steps_async(list_layergroups_steps(workspace, source)) for workspace in [None, *workspaces]), results)
+    layergroup_tasks = iter_selected("layergroup", layergroup_tasks, get_layergroup_name)
+    layergroup_tasks = list(iter_pending("layergroup", layergroup_tasks, get_layergroup_name, results))
+
+    layergroups = LayergroupWaves(results)
+    fetched = await asyncio.gather(*(run_steps_async(fetch_layergroup_steps(*task, source)) for task in layergroup_tasks))
+    for task, (layergroup_obj, fetch_result) in zip(layergroup_tasks, fetched):
+        layergroups.add(task, layergroup_obj, fetch_result)
+
+    for wave in layergroups.get_waves():
+        await gather_results((run_steps_async(layergroups.create_steps(name, target)) for name in wave), results)
+
+    results.extend(layergroups.get_cycle_result())
+
+    return results
+
+
+async def sync_tile_layers(source: AsyncGeoServerClient, target: AsyncGeoServerClient):
+    """
+    Fetch the tile layers of all selected layers and layergroups from the source GeoServer and create them on the target GeoServer.
+    """
+    names, results = get_tile_layer_tasks(await run_steps_async(list_tile_layers_steps(source)))
+    if names is None:
+        return results
+
+    await gather_results((run_steps_async(sync_tile_layer_steps(name, source, target)) for name in names), results)
+
+    log_tile_layers(results)
+    return results
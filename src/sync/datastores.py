@@ -12,83 +12,268 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-import getpass
-from util.http import get, get_rest, post_rest
+from typing import Optional
+from urllib.parse import urlparse
+from util.http import GeoServerClient, wrap_error
+from util.pool import iter_listed, map_parallel, run_parallel
+from util.journal import iter_pending, get_list_key
+from util.select import iter_selected
+from util.secrets import get_secrets
+from util.log import iter_found
+from util.state import get_sync_action, record, write_rest, UNCHANGED, UPDATE
+from util.steps import run_steps, Blocking
 from model.models import Result, FailedObject
 
-def sync(workspaces: list[str], source_url: str, source_auth: tuple, target_url: str, target_auth: tuple):
+STORE_TYPES = ["dataStores", "coverageStores", "wmsStores", "wmtsStores"]
+
+# the store types that can have a password (see resolve_passwords())
+PASSWORD_STORE_TYPES = ["dataStores", "wmsStores"]
+
+def sync(workspaces: list[str], source: GeoServerClient, target: GeoServerClient):
     """
     Fetch all datastores for a given workspace from the source GeoServer and create them on the target GeoServer.
     """
 
-    success_stores = []
+    results = Result(kind="store")
+
+    # the store lists are kept (stores are few compared to layers),
+    # as all unknown passwords are asked for before the first store is synced
+    store_tasks = iter_listed(lambda args: list_stores(*args, source),
+                              [(workspace, store_type) for workspace in workspaces for store_type in STORE_TYPES], results)
+    store_tasks = iter_selected("store", store_tasks, get_store_name)
+    store_tasks = list(iter_pending("store", store_tasks, get_store_name, results))
+
+    # the details fetched to find the stores without password are not fetched again
+    prefetched = prepare_passwords(store_tasks, source)
+
+    run_parallel(lambda args: sync_store(*args, source, target, prefetched.pop(args[2]["href"], None)), store_tasks, result=results)
+
+    return results
+
+
+def get_store_name(task: tuple):
+    workspace, _, store = task
+    return workspace + ":" + store.get("name", "Unknown")
+
+
+def list_stores(workspace: str, store_type: str, source: GeoServerClient):
+    """
+    Fetch the list of stores of the given type in a workspace.
+    Returns a (lazy) iterator over (workspace, store_type, store) tuples and a Result holding a possible failure.
+    """
+    return run_steps(list_stores_steps(workspace, store_type, source))
+
+
+def list_stores_steps(workspace: str, store_type: str, source):
     failed_stores = []
 
-    for workspace in workspaces:
+    rest_path = "workspaces/" + workspace + "/" + store_type.lower()
+    stores = yield source.get_rest_list(rest_path, store_type, store_type[:-1])
+
+    if stores is None:
+        msg = f"Failed to fetch stores of type '{store_type}' for workspace '{workspace}'"
+        failed_stores.append(FailedObject(name=get_list_key(rest_path), reason=msg, error="fetch"))
+        return [], Result(failed_objects=failed_stores)
 
-        for store_type in ["dataStores", "coverageStores", "wmsStores", "wmtsStores"]:
-            rest_path = "workspaces/" + workspace + "/" + store_type.lower()
-            store_results = get_rest(rest_path, source_url, source_auth)
+    tasks = ((workspace, store_type, store) for store in stores)
+    return iter_found(tasks, f"stores of type '{store_type}' in workspace '{workspace}'"), Result()
 
-            if not store_results:
-                msg = f"Failed to fetch stores of type '{store_type}' for workspace '{workspace}'"
-                failed_stores.append(FailedObject(name=workspace, reason=msg))
-                continue
 
-            stores_obj = store_results.get(store_type, {}) # type: ignore
-            if not stores_obj:
-                continue
+def sync_store(workspace: str, store_type: str, store: dict, source: GeoServerClient, target: GeoServerClient,
+               store_result: Optional[dict] = None):
+    """
+    Syncs a listed store, store_result are its details if they were fetched before (see prepare_passwords()).
+    """
+    return run_steps(sync_store_steps(workspace, store_type, store, source, target, store_result))
+
+
+def sync_store_steps(workspace: str, store_type: str, store: dict, source, target, store_result: Optional[dict] = None):
+    success_stores = []
+    failed_stores = []
 
-            stores = stores_obj.get(store_type[:-1], [])
+    rest_path = "workspaces/" + workspace + "/" + store_type.lower()
+    err_msg_tpl = "Failed to fetch store details from '{href}'"
 
-            print(f"[*] Found {len(stores)} stores of type '{store_type}' in workspace '{workspace}'")
+    href = store["href"]
 
-            err_msg_tpl = "Failed to fetch store details from '{href}'"
+    if store_result is None:
+        store_result = yield source.get(href)
 
-            for store in stores:
-                href = store["href"]
+    if store_result is None:
+        failed_store = FailedObject(name=workspace + ":" + store.get("name", "Unknown"), reason=err_msg_tpl.format(href=href), error="fetch")
+        failed_stores.append(failed_store)
+        print(f"[!] {err_msg_tpl.format(href=href)}")
+        return Result(success_objects=success_stores, failed_objects=failed_stores)
 
-                store_result = get(href, source_auth)
+    store_obj = store_result.get(store_type[:-1], {}) # type: ignore
+    if not store_obj:
+        # we do not append a failed object here, as it is not an error if there are no stores
+        return Result(success_objects=success_stores, failed_objects=failed_stores)
 
-                if store_result is None:
-                    failed_store = FailedObject(name=store.get("name", "Unknown"), reason=err_msg_tpl.format(href=href))
-                    failed_stores.append(failed_store)
-                    print(f"[!] {err_msg_tpl.format(href=href)}")
-                    continue
+    store_name = store_obj.get("name")
 
-                store_obj = store_result.get(store_type[:-1], {}) # type: ignore
-                if not store_obj:
-                    # we do not append a failed object here, as it is not an error if there are no stores
-                    continue
+    # the fingerprint is built from the encrypted passwords, so unchanged stores need no password
+    state_key = "store:" + workspace + ":" + store_name
+    object_fingerprint, action = get_sync_action(state_key, store_result)
 
-                store_name = store_obj.get("name")
-                store_obj_type = store_obj.get("type")
+    if action == UNCHANGED:
+        print(f"[=] Store '{workspace}:{store_name}' is unchanged")
+        return Result(unchanged_objects=[workspace + ":" + store_name])
 
-                # check if there is an entry named 'passwd'
-                # to prompt the user for a password
-                # this is necessary as GeoServer does not accept encrypted passwords here
-                connection_params = store_obj.get("connectionParameters", {})
-                if connection_params and "entry" in connection_params:
-                    entries = connection_params["entry"]
-                    for entry in entries:
-                        if entry.get("@key") == "passwd":
-                            passwd = getpass.getpass(f"[?] Please enter the password for datastore '{workspace}:{store_name}': ")
-                            entry["$"] = passwd
+    # password prompts (and the credential helper) block, so they do not run on the event loop of the asyncio engine
+    password_error = yield Blocking(resolve_passwords, workspace, store_obj)
 
-                # same for the 'password' field in WMS datastores
-                if store_obj_type == "WMS" and "password" in store_obj:
-                    passwd = getpass.getpass(f"[?] Please enter the password for (cascaded) WMS datastore '{workspace}:{store_name}': ")
-                    store_obj["password"] = passwd
+    if password_error is not None:
+        print(f"{password_error}")
+        return Result(failed_objects=[FailedObject(name=workspace + ":" + store_name, reason=password_error, error="password")])
 
-                post_result = post_rest(rest_path, target_url, target_auth, store_result) # type: ignore
+    post_result = yield write_rest(target, action, rest_path, rest_path + "/" + store_name, store_result)
 
-                if post_result == True:
-                    success_stores.append(workspace + ":" + store_name)
-                    print(f"[+] Created store '{store_name}' of type '{store_type[:-1]}' on target")
-                else:
-                    err_msg_tpl = f"Failed to create store '{store_name}' of type '{store_type[:-1]}' on target: {post_result}"
-                    failed_store = FailedObject(name=store_name, reason=err_msg_tpl)
-                    failed_stores.append(failed_store)
-                    print(f"[!] {err_msg_tpl}")
+    if post_result == True:
+        record(state_key, object_fingerprint)
+        success_stores.append(workspace + ":" + store_name)
+        print(f"[+] {'Updated' if action == UPDATE else 'Created'} store '{store_name}' of type '{store_type[:-1]}' on target")
+    else:
+        err_msg_tpl = wrap_error(f"Failed to create store '{store_name}' of type '{store_type[:-1]}' on target: {post_result}", post_result)
+        failed_store = FailedObject(name=workspace + ":" + store_name, reason=err_msg_tpl)
+        failed_stores.append(failed_store)
+        print(f"[!] {err_msg_tpl}")
 
     return Result(success_objects=success_stores, failed_objects=failed_stores)
+
+
+def resolve_passwords(workspace: str, store_obj: dict):
+    """
+    Replace the (encrypted) passwords of a store object by the raw passwords (see util.secrets).
+    Returns None, or an error message if a password is unknown.
+    """
+    label = get_password_label(workspace, store_obj)
+    if label is None:
+        return None
+
+    # GeoServer does not accept encrypted passwords here
+    password = get_secrets().get_password(get_secret_keys(workspace, store_obj), label)
+    if password is None:
+        return f"[!] No password found for {label}, see the [secrets] section of the config."
+
+    # check if there is an entry named 'passwd'
+    connection_params = store_obj.get("connectionParameters", {})
+    if connection_params and "entry" in connection_params:
+        for entry in connection_params["entry"]:
+            if entry.get("@key") == "passwd":
+                entry["$"] = password
+
+    # same for the 'password' field in WMS datastores
+    if store_obj.get("type") == "WMS" and "password" in store_obj:
+        store_obj["password"] = password
+
+    return None
+
+
+def get_password_label(workspace: str, store_obj: dict):
+    """
+    Returns a description of the store for password prompts, None if the store has no password.
+    """
+    store_name = store_obj.get("name")
+
+    if "passwd" in get_connection_params(store_obj):
+        return f"datastore '{workspace}:{store_name}'"
+    if store_obj.get("type") == "WMS" and "password" in store_obj:
+        return f"(cascaded) WMS datastore '{workspace}:{store_name}'"
+    return None
+
+
+def get_connection_params(store_obj: dict):
+    connection_params = store_obj.get("connectionParameters") or {}
+    entries = connection_params.get("entry", [])
+    if isinstance(entries, dict):
+        entries = [entries]
+    return {entry.get("@key"): entry.get("$") for entry in entries}
+
+
+def get_secret_keys(workspace: str, store_obj: dict):
+    """
+    Returns the keys to look up the password of a store: 'workspace:store', followed by
+    the keys of its connection from the most to the least specific one.
+    """
+    keys = [workspace + ":" + store_obj.get("name")]
+
+    if store_obj.get("type") == "WMS":
+        url = urlparse(store_obj.get("capabilitiesURL") or "")
+        host, port, database, user = url.hostname, url.port, None, store_obj.get("user")
+    else:
+        params = get_connection_params(store_obj)
+        host, port, database, user = params.get("host"), params.get("port"), params.get("database"), params.get("user")
+
+    if not host:
+        return keys
+
+    host_port = f"{host}:{port}" if port else host
+    if database:
+        if user:
+            keys.append(f"{user}@{host_port}/{database}")
+        keys.append(f"{host_port}/{database}")
+    if user:
+        keys.append(f"{user}@{host_port}")
+    keys.append(host_port)
+    if port:
+        keys.append(host)
+    return keys
+
+
+def get_missing_password(workspace: str, store_type: str, store_result: dict):
+    """
+    Returns the (keys, label) of a store that needs a password which can not be resolved without
+    asking the user, None otherwise. Unchanged stores (incremental mode) need no password.
+    """
+    store_obj = (store_result or {}).get(store_type[:-1], {})
+    if not store_obj:
+        return None
+
+    label = get_password_label(workspace, store_obj)
+    if label is None:
+        return None
+
+    _, action = get_sync_action("store:" + workspace + ":" + store_obj.get("name"), store_result)
+    if action == UNCHANGED:
+        return None
+
+    keys = get_secret_keys(workspace, store_obj)
+    if get_secrets().lookup(keys) is not None:
+        return None
+    return keys, label
+
+
+def prepare_passwords(store_tasks, source: GeoServerClient) -> dict:
+    """
+    Pre-flight for the datastore phase: finds all stores that need a password, which is not in the
+    secrets file, the environment or known by the credential helper, and asks for them in one batch,
+    so the stores are synced without waiting for input afterwards.
+    Returns the fetched store details by href, to be passed to sync_store().
+    """
+    if not get_secrets().interactive:
+        # stores without password fail instead
+        return {}
+
+    store_tasks = get_password_store_tasks(store_tasks)
+    return ask_missing_passwords(store_tasks, map_parallel(lambda args: source.get(args[2]["href"]), store_tasks))
+
+
+def get_password_store_tasks(store_tasks) -> list:
+    # only the details of stores that can have a password are fetched
+    return [task for task in store_tasks if task[1] in PASSWORD_STORE_TYPES]
+
+
+def ask_missing_passwords(store_tasks: list, store_results: list) -> dict:
+    """
+    Asks for the missing passwords of the stores of the given tasks, given their fetched details (None if the
+    fetch failed, which is reported by the sync of the store). Returns the fetched details by href.
+    """
+    missing = [entry for entry in (get_missing_password(workspace, store_type, store_result)
+                                   for (workspace, store_type, _), store_result in zip(store_tasks, store_results)) if entry]
+
+    if missing:
+        print(f"[*] {len(missing)} stores need a password")
+        get_secrets().prompt_missing(missing)
+
+    return {store["href"]: store_result for (_, _, store), store_result in zip(store_tasks, store_results) if store_result is not None}
@@ -0,0 +1,237 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Pulls in the objects that selected objects depend on (see util.select): when only some layers or
+layergroups are selected, the stores, styles, layers and workspaces they reference are synced
+on demand, right before the object that needs them, if they are not selected themselves.
+"""
+
+import threading
+from concurrent.futures import Future
+from contextvars import ContextVar
+from typing import Optional
+from util.http import GeoServerClient
+from util.journal import get_journal
+from util.select import get_selector, set_puller, get_puller
+from util.steps import run_steps
+from model.models import Result, FailedObject
+from sync.workspaces import sync_namespace_steps
+from sync.datastores import sync_store_steps
+from sync.styles import sync_style_steps, get_styles_rest_path
+from sync.layers import sync_layer_steps, fq_name
+from sync.layergroups import sync_layergroup_steps, get_layergroups_rest_path
+
+# layer type by the class of the resource in the layer settings
+RESOURCE_LAYER_TYPES = {"featureType": "featureTypes", "coverage": "coverages", "wmsLayer": "wmsLayers", "wmtsLayer": "wmtsLayers"}
+
+# the kinds of the pulled objects, in the order of the phases
+PULL_KINDS = ["workspace", "store", "style", "layer", "layergroup"]
+
+# the (kind, name) keys of the dependencies pulled by the current chain of pulls (e.g. a layergroup pulls the
+# groups it contains, which pull their groups, ...), the innermost last
+pulling = ContextVar("pulling", default=())
+
+
+class DependencyPuller:
+    """
+    Syncs dependencies that are not selected, each one once, no matter how many objects need it.
+    """
+
+    def __init__(self, source: GeoServerClient, target: GeoServerClient):
+        self.source = source
+        self.target = target
+        self.lock = threading.Lock()
+        # (kind, name) -> Future of the reason the object could not be synced (or None)
+        self.pulled = {}
+        # (kind, name) of a pull -> (kind, name) of the pull its chain waits for (see closes_cycle())
+        self.waiting = {}
+        self.results = {kind: Result(kind=kind) for kind in PULL_KINDS}
+
+    def require(self, dependencies: list[tuple]) -> Optional[str]:
+        """
+        Pulls the (kind, workspace, name, store type) dependencies one after another,
+        returns the reason of the first one that could not be synced or None.
+        """
+        for kind, workspace, name, store_type in dependencies:
+            reason = self.ensure(kind, workspace, name, store_type)
+            if reason is not None:
+                return reason
+        return None
+
+    def ensure(self, kind: str, workspace: Optional[str], name: str, store_type: Optional[str] = None) -> Optional[str]:
+        name_key = (kind, fq_name(workspace, name))
+        if not must_pull(*name_key):
+            return None
+
+        chain = pulling.get()
+        with self.lock:
+            future = self.pulled.get(name_key)
+            first = future is None
+            if first:
+                future = self.pulled[name_key] = Future()
+            elif not future.done():
+                if self.closes_cycle(chain, name_key):
+                    return get_cycle_reason(*name_key)
+                self.wait(chain, name_key)
+
+        if not first:
+            try:
+                return future.result()
+            finally:
+                with self.lock:
+                    self.wait(chain, None)
+
+        token = pulling.set((*chain, name_key))
+        try:
+            reason = self.pull_once(kind, workspace, name, store_type)
+        except BaseException:
+            # objects waiting for the same dependency must not wait forever if pulling it raised
+            future.set_result(get_failure_reason(*name_key, Result()))
+            raise
+        finally:
+            pulling.reset(token)
+        future.set_result(reason)
+        return reason
+
+    def closes_cycle(self, chain: tuple, name_key: tuple) -> bool:
+        """
+        Returns whether the chain of pulls would wait for itself by waiting for the pull of name_key: if name_key is
+        in the chain (a group contains itself by the groups it contains), or if the chain pulling name_key waits for
+        another chain, and so on, that waits for a pull of this chain.
+        """
+        while name_key is not None:
+            if name_key in chain:
+                return True
+            name_key = self.waiting.get(name_key)
+        return False
+
+    def wait(self, chain: tuple, name_key: Optional[tuple]):
+        # every pull of a chain waits for the same pull (or none)
+        for key in chain:
+            if name_key is None:
+                self.waiting.pop(key, None)
+            else:
+                self.waiting[key] = name_key
+
+    def pull_once(self, kind: str, workspace: Optional[str], name: str, store_type: Optional[str] = None) -> Optional[str]:
+        return run_steps(self.pull_once_steps(kind, workspace, name, store_type))
+
+    def pull_once_steps(self, kind: str, workspace: Optional[str], name: str, store_type: Optional[str] = None):
+        # (the workspace is pulled by ensure(), which is awaited with the asyncio engine, see sync.aio)
+        reason = None if workspace is None else (yield self.ensure("workspace", None, workspace))
+        if reason is not None:
+            return reason
+
+        print(f"[*] Pulling {kind} '{fq_name(workspace, name)}' as a dependency")
+        result = yield from pull_steps(kind, workspace, name, store_type, self.source, self.target)
+        self.results[kind].extend(result)
+        return get_failure_reason(kind, fq_name(workspace, name), result)
+
+
+def pull_steps(kind: str, workspace: Optional[str], name: str, store_type: Optional[str], source, target):
+    """
+    Syncs a single dependency as if it was listed on the source.
+    """
+    href = get_dependency_href(source.url, kind, workspace, name, store_type)
+
+    if kind == "workspace":
+        return (yield from sync_namespace_steps({"name": name, "href": href}, source, target))
+    if kind == "store":
+        return (yield from sync_store_steps(workspace, store_type, {"name": name, "href": href}, source, target))
+    if kind == "style":
+        return (yield from sync_style_steps(workspace, {"name": name, "href": href}, source, target))
+    if kind == "layergroup":
+        return (yield from sync_layergroup_steps(workspace, {"name": name, "href": href}, source, target))
+
+    layer_type, layer = get_pulled_layer(workspace, name, href, (yield source.get(href)))
+    if layer_type is None:
+        return Result(failed_objects=[layer])
+    return (yield from sync_layer_steps(workspace, layer_type, layer, source, target))
+
+
+def must_pull(kind: str, name: str) -> bool:
+    """
+    Objects that are selected are synced by their own phase (or task), objects done by a previous run are
+    not synced again and excluded objects are expected to exist on the target already.
+    """
+    journal = get_journal()
+    if get_selector().selects(kind, name) or get_selector().excludes(kind, name):
+        return False
+    return not (journal is not None and journal.skip(kind, name))
+
+
+def get_dependency_href(source_url: str, kind: str, workspace: Optional[str], name: str, store_type: Optional[str] = None) -> str:
+    """
+    Returns the URL of a dependency on the source, as it would be listed there.
+    For layers this is the URL of the layer settings, which reference the resource.
+    """
+    if kind == "workspace":
+        rest_path = "namespaces"
+    elif kind == "store":
+        rest_path = "workspaces/" + workspace + "/" + store_type.lower()
+    elif kind == "style":
+        rest_path = get_styles_rest_path(workspace)
+    elif kind == "layer":
+        rest_path = "workspaces/" + workspace + "/layers"
+    else:
+        rest_path = get_layergroups_rest_path(workspace)
+    return f"{source_url}/rest/{rest_path}/{name}.json"
+
+
+def get_pulled_layer(workspace: str, name: str, href: str, layer_settings: Optional[dict]):
+    """
+    Returns the layer type and the (workspace, layer type, layer) list entry of a layer from its settings,
+    or None and the FailedObject if the layer can not be found on the source.
+    """
+    resource = ((layer_settings or {}).get("layer") or {}).get("resource") or {}
+    layer_type = RESOURCE_LAYER_TYPES.get(resource.get("@class"))
+
+    if layer_type is None or not resource.get("href"):
+        reason = f"Failed to fetch layer details from '{href}'"
+        print(f"[!] {reason}")
+        return None, FailedObject(name=fq_name(workspace, name), reason=reason, error="fetch")
+
+    return layer_type, {"name": name, "href": resource["href"]}
+
+
+def get_cycle_reason(kind: str, name: str) -> str:
+    return f"Skipped as {kind} '{name}' is part of a dependency cycle"
+
+
+def get_failure_reason(kind: str, name: str, result: Result) -> Optional[str]:
+    if result.failed_count or not (result.success_count or result.unchanged_count):
+        return f"Skipped as {kind} '{name}' could not be synced"
+    return None
+
+
+def init_puller(source, target) -> Optional[DependencyPuller]:
+    """
+    Creates the dependency puller if the run is scoped by include or exclude rules.
+    """
+    dependency_puller = DependencyPuller(source, target) if get_selector().active else None
+    set_puller(dependency_puller)
+    return dependency_puller
+
+
+def merge_pulled(*results: Result) -> tuple:
+    """
+    Adds the pulled objects to the results of the phases of the same kind.
+    """
+    puller = get_puller()
+    if puller is not None:
+        for result in results:
+            if result.kind in puller.results:
+                result.extend(puller.results[result.kind])
+    return results
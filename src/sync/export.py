@@ -0,0 +1,129 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Exports the catalog of the source GeoServer to a snapshot (see util/snapshot.py).
+
+The source is walked with the same requests the sync makes (lists, objects, SLDs
+and layer settings), so a later sync from the snapshot finds every response it asks
+for. Nothing is written to any target.
+"""
+
+from typing import Optional
+from util.http import GeoServerClient
+from util.pool import iter_listed, run_parallel, call_parallel
+from util.log import iter_found, get_summary
+from util.snapshot import SnapshotWriter
+from model.models import Result, FailedObject
+from sync.datastores import STORE_TYPES, list_stores
+from sync.styles import list_styles, get_sld_url
+from sync.layers import LAYER_TYPES, list_layers, fetch_layer_with_settings, fq_name
+from sync.layergroups import list_layergroups, fetch_layergroup
+
+
+def export(source: GeoServerClient, path: str):
+    """
+    Writes all catalog objects of the source GeoServer to the snapshot at path.
+    Returns a Result with the exported and failed objects. The snapshot is
+    not written at all if the export is aborted by an exception.
+    """
+    writer = SnapshotWriter(path, source.url)
+    source.snapshot = writer
+
+    try:
+        results = export_catalog(source)
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        source.snapshot = None
+
+    writer.close()
+    print(f"[*] Wrote {len(writer.urls)} responses to snapshot '{path}'")
+    return results
+
+
+def export_catalog(source: GeoServerClient):
+    results = Result(kind="export")
+
+    namespaces = source.get_rest_list("namespaces", "namespaces", "namespace")
+    if namespaces is None:
+        failed = FailedObject(name="None", reason="Failed to fetch namespaces from source", error="fetch")
+        results.extend(get_summary("workspace", Result(failed_objects=[failed])))
+        return results
+
+    namespace_results = run_parallel(lambda ns: export_object("namespace", ns.get("name", "Unknown"), ns["href"], source),
+                                     iter_found(namespaces, "namespaces on source"),
+                                     result=Result(kind="workspace", keep_names=True))
+    results.extend(namespace_results)
+    workspaces = namespace_results.success_objects
+
+    results.extend(export_listed("store", lambda args: list_stores(*args, source), export_store,
+                                 [(workspace, store_type) for workspace in workspaces for store_type in STORE_TYPES], source))
+    results.extend(export_listed("style", lambda workspace: list_styles(workspace, source), export_style,
+                                 [None, *workspaces], source))
+    results.extend(export_listed("layer", lambda args: list_layers(*args, source), export_layer,
+                                 [(workspace, layer_type) for workspace in workspaces for layer_type in LAYER_TYPES], source))
+    results.extend(export_listed("layergroup", lambda workspace: list_layergroups(workspace, source), export_layergroup,
+                                 [None, *workspaces], source))
+
+    return results
+
+
+def export_listed(kind: str, list_fn, export_fn, lists: list, source: GeoServerClient):
+    """
+    Reads the given object lists with list_fn and fetches every listed object with export_fn.
+    """
+    results = Result(kind=kind)
+    return run_parallel(lambda args: export_fn(*args, source), iter_listed(list_fn, lists, results), result=results)
+
+
+def export_object(kind: str, name: str, href: str, source: GeoServerClient):
+    if source.get(href) is None:
+        return Result(failed_objects=[FailedObject(name=name, reason=f"Failed to fetch {kind} details from '{href}'", error="fetch")])
+    return Result(success_objects=[name])
+
+
+def export_store(workspace: str, store_type: str, store: dict, source: GeoServerClient):
+    return export_object("store", workspace + ":" + store.get("name", "Unknown"), store["href"], source)
+
+
+def export_style(workspace: Optional[str], style: dict, source: GeoServerClient):
+    name = fq_name(workspace, style.get("name", "Unknown"))
+    result, sld_response = call_parallel(lambda: export_object("style", name, style["href"], source),
+                                         lambda: source.get(get_sld_url(style["href"]), False))
+
+    if result.success_objects and sld_response is None:
+        return Result(failed_objects=[FailedObject(name=name, reason=f"Could not fetch SLD from '{get_sld_url(style['href'])}'", error="fetch")])
+
+    return result
+
+
+def export_layer(workspace: str, layer_type: str, layer: dict, source: GeoServerClient):
+    layer_result, _, results = fetch_layer_with_settings(workspace, layer_type, layer, source)
+
+    if layer_result is None:
+        return results
+
+    return Result(success_objects=[workspace + ":" + layer_result[layer_type[:-1]].get("name")])
+
+
+def export_layergroup(workspace: Optional[str], layergroup: dict, source: GeoServerClient):
+    layergroup_obj, results = fetch_layergroup(workspace, layergroup, source)
+
+    if layergroup_obj is None:
+        return results
+
+    name = layergroup.get("name", "Unknown")
+    return Result(success_objects=[fq_name(workspace, name)])
@@ -0,0 +1,126 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Fan-out sync: the catalog of the source is synced to several targets (the [[targets]] of the config)
+at once. Every target is synced in its own context, i.e. with its own state, results and journal files
+and dependency puller, by a thread (or a task of the asyncio engine), so it succeeds or fails independently
+of the others. The GET responses of the source are fetched once and shared by all targets, a target that
+is too far ahead of the slowest one waits for it (see util.fanout.SharedResponses).
+"""
+
+import asyncio
+from contextvars import Context, copy_context
+from typing import Callable, Optional
+from util.fanout import SharedResponses, current_target, get_target_config
+from util.journal import init_journal, get_journal
+from util.log import log_results, log_records
+from util.pool import map_parallel
+from util.results import init_results, close_results
+from util.state import init_state, get_state
+
+
+def sync(config: dict, targets: list[dict], run_target: Callable[[dict], Optional[tuple]],
+         shared: Optional[SharedResponses] = None, mode: Optional[str] = None, verbose: bool = False) -> dict:
+    """
+    Calls run_target with the config of every target (see util.fanout.get_target_config) concurrently,
+    each in the context of its target. Prints the summary of every target and returns their results by name,
+    None for a target that did not create any workspace or failed as a whole.
+    """
+    contexts = open_targets(config, targets, mode, verbose)
+
+    def run(target: dict):
+        target_config, context = contexts[target["name"]]
+        try:
+            return context.run(run_target, target_config)
+        except Exception as e:
+            print(f"[!] Sync to target '{target['name']}' failed: {e}")
+            return None
+        finally:
+            if shared is not None:
+                shared.remove(target["name"])
+
+    results = dict(zip(contexts, map_parallel(run, targets, len(targets))))
+    close_targets(contexts, results)
+    return results
+
+
+async def sync_async(config: dict, targets: list[dict], run_target: Callable,
+                     shared: Optional[SharedResponses] = None, mode: Optional[str] = None, verbose: bool = False) -> dict:
+    """
+    Same as sync() for the asyncio engine, run_target is a coroutine function.
+    """
+    contexts = open_targets(config, targets, mode, verbose)
+
+    async def run(target: dict):
+        target_config, _ = contexts[target["name"]]
+        try:
+            return await run_target(target_config)
+        except Exception as e:
+            print(f"[!] Sync to target '{target['name']}' failed: {e}")
+            return None
+        finally:
+            if shared is not None:
+                await shared.remove(target["name"])
+
+    tasks = [asyncio.create_task(run(target), context=contexts[target["name"]][1]) for target in targets]
+    results = dict(zip(contexts, await asyncio.gather(*tasks)))
+    close_targets(contexts, results)
+    return results
+
+
+def open_targets(config: dict, targets: list[dict], mode: Optional[str], verbose: bool) -> dict[str, tuple[dict, Context]]:
+    """
+    Creates the context of every target, with its results file, state and journal.
+    """
+    contexts = {}
+    for target in targets:
+        target_config = get_target_config(config, target)
+        context = copy_context()
+        print(f"[*] Target '{target['name']}': {target['url']}")
+        context.run(open_target, target_config, mode, verbose)
+        contexts[target["name"]] = (target_config, context)
+    return contexts
+
+
+def open_target(target_config: dict, mode: Optional[str], verbose: bool):
+    target = target_config["target"]
+    current_target.set(target["name"])
+    init_results(target_config, verbose)
+    init_state(target_config, target["url"])
+    init_journal(target_config, target["url"], mode)
+
+
+def close_targets(contexts: dict[str, tuple[dict, Context]], results: dict):
+    """
+    Saves the state of every target and prints its summary.
+    """
+    for name, (target_config, context) in contexts.items():
+        print(f"[*] Target '{name}' ({target_config['target']['url']}):")
+        context.run(close_target, results[name])
+
+
+def close_target(results: Optional[tuple]):
+    state = get_state()
+    if state is not None:
+        state.save()
+        print(f"[*] Saved fingerprints of {len(state.fingerprints)} objects to '{state.path}'")
+    journal = get_journal()
+    if journal is not None:
+        journal.close()
+    if results is None:
+        log_records()
+    else:
+        log_results(*results)
+    close_results()
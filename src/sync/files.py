@@ -0,0 +1,231 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Data transfer ([files] section): file-based stores (shapefiles, GeoPackages, GeoTIFFs, mosaics, ...) only work
+if their files exist on the target. Before the catalog is synced, the files of the selected dataStores and
+coverageStores are uploaded from a local mirror of the source data directory to the same paths in the data
+directory of the target (REST resource endpoint). The files are streamed, several at a time. Files the target
+already has with the same checksum (see util.manifest) are skipped, so an interrupted transfer continues with
+the files that were not uploaded completely.
+"""
+
+import hashlib
+import os
+import re
+from typing import Iterator, Optional
+from model.models import Result, FailedObject
+from util.http import GeoServerClient, wrap_error
+from util.log import format_errors
+from util.manifest import FileManifest
+from util.pool import iter_parallel, run_parallel
+from util.select import iter_selected
+from sync.workspaces import get_namespace_name
+from sync.datastores import list_stores, get_store_name
+
+DEFAULT_FILES_CONFIG = {
+    # upload the files of file-based stores before the sync
+    "enabled": False,
+    # local copy (or mount) of the data directory of the source
+    "mirror": "",
+    # absolute path of the data directory on the source, for stores whose files are given by absolute paths
+    "data_dir": "",
+    # number of files uploaded at the same time
+    "workers": 4,
+    # files uploaded to the target by previous runs (see util.manifest)
+    "manifest": "files_manifest.jsonl",
+}
+
+# store types that may reference files
+FILE_STORE_TYPES = ["dataStores", "coverageStores"]
+
+# scheme of a URL (a drive letter is no scheme)
+URL_SCHEME_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]+:")
+
+# bytes read at a time to compute a checksum
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+
+def get_files_config(config: dict) -> dict:
+    return {**DEFAULT_FILES_CONFIG, **config.get("files", {})}
+
+
+def sync(source: GeoServerClient, target: GeoServerClient, settings: dict, manifest: FileManifest):
+    """
+    Uploads the files of all selected file-based stores of the source GeoServer to the target GeoServer.
+    """
+    results = Result(kind="file")
+
+    if not settings["mirror"] or not os.path.isdir(settings["mirror"]):
+        results.extend(Result(failed_objects=[FailedObject(name="None", reason=f"Mirror of the data directory '{settings['mirror']}' not found")]))
+        return results
+
+    namespaces = source.get_rest_list("namespaces", "namespaces", "namespace")
+    if namespaces is None:
+        results.extend(Result(failed_objects=[FailedObject(name="None", reason="Failed to fetch namespaces from source", error="fetch")]))
+        return results
+    workspaces = [get_namespace_name(ns) for ns in iter_selected("workspace", namespaces, get_namespace_name)]
+
+    store_tasks = iter_listed_stores(workspaces, source, results)
+    store_tasks = iter_selected("store", store_tasks, get_store_name)
+
+    # path in the data directory -> local path, a directory may be used by several stores
+    files = {}
+    for store_files, store_result in iter_parallel(lambda task: get_store_files(*task, source, settings), store_tasks):
+        results.extend(store_result)
+        files.update(store_files)
+
+    print(f"[*] Uploading {len(files)} files of file-based stores to {target.url} ({settings['workers']} at a time)...")
+
+    run_parallel(lambda item: sync_file(*item, target, manifest), sorted(files.items()), settings["workers"], results)
+
+    log_files(results)
+    return results
+
+
+def iter_listed_stores(workspaces: list[str], source: GeoServerClient, results: Result) -> Iterator:
+    for workspace in workspaces:
+        for store_type in FILE_STORE_TYPES:
+            tasks, list_result = list_stores(workspace, store_type, source)
+            results.extend(list_result)
+            yield from tasks
+
+
+def get_store_files(workspace: str, store_type: str, store: dict, source: GeoServerClient, settings: dict):
+    """
+    Returns the files of a store as {path in the data directory: local path} and a Result holding a possible failure.
+    Stores without files (e.g. databases or remote services) have no files.
+    """
+    name = get_store_name((workspace, store_type, store))
+    store_result = source.get(store["href"])
+    if store_result is None:
+        reason = f"Failed to fetch store details from '{store['href']}'"
+        print(f"[!] {reason}")
+        return {}, Result(failed_objects=[FailedObject(name=name, reason=reason, error="fetch")])
+
+    file_url = get_store_file_url(store_result.get(store_type[:-1]) or {})
+    if file_url is None:
+        return {}, Result()
+
+    data_path = get_data_path(file_url, settings["data_dir"])
+    if data_path is None:
+        reason = f"The files of store '{name}' ({file_url}) are not in the data directory of the source"
+        print(f"[!] {reason}")
+        return {}, Result(failed_objects=[FailedObject(name=name, reason=reason)])
+
+    local_path = os.path.join(settings["mirror"], data_path)
+    files = dict(iter_local_files(data_path, local_path))
+    if not files:
+        reason = f"The files of store '{name}' ({data_path}) are not in the mirror '{settings['mirror']}'"
+        print(f"[!] {reason}")
+        return {}, Result(failed_objects=[FailedObject(name=name, reason=reason)])
+
+    return files, Result()
+
+
+def get_store_file_url(store_obj: dict) -> Optional[str]:
+    """
+    Returns the file URL of a store (e.g. 'file:data/roads/roads.shp'), None if it does not reference a file.
+    """
+    # coverage stores have a url, data stores a url or (GeoPackages) a database parameter
+    url = store_obj.get("url")
+    if url is None:
+        entries = (store_obj.get("connectionParameters") or {}).get("entry", [])
+        parameters = {entry.get("@key"): entry.get("$") for entry in (entries if isinstance(entries, list) else [entries])}
+        url = parameters.get("url") or (parameters.get("database") if parameters.get("dbtype") == "geopkg" else None)
+
+    if not isinstance(url, str) or (URL_SCHEME_PATTERN.match(url) and not url.startswith("file:")):
+        # remote services and JDBC URLs
+        return None
+    return url
+
+
+def get_data_path(file_url: str, data_dir: str) -> Optional[str]:
+    """
+    Returns the path of a file URL relative to the data directory, None if the file is outside of it.
+    """
+    path = file_url.removeprefix("file://").removeprefix("file:")
+    if not os.path.isabs(path):
+        path = os.path.normpath(path)
+        return None if path.startswith("..") else path
+    if data_dir and os.path.normpath(path).startswith(os.path.normpath(data_dir) + os.sep):
+        return os.path.relpath(path, data_dir)
+    return None
+
+
+def iter_local_files(data_path: str, local_path: str) -> Iterator[tuple]:
+    """
+    Yields the files that belong to a store as (path in the data directory, local path): all files of a directory
+    (e.g. an image mosaic), or the file with its sidecar files (e.g. roads.shp, roads.dbf, roads.prj, dem.tif.ovr).
+    """
+    if os.path.isdir(local_path):
+        for root, _, names in os.walk(local_path):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                yield os.path.join(data_path, os.path.relpath(path, local_path)).replace(os.sep, "/"), path
+        return
+
+    directory = os.path.dirname(local_path)
+    if not os.path.isfile(local_path):
+        return
+    stem = os.path.splitext(os.path.basename(local_path))[0]
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if (name == stem or name.startswith(stem + ".")) and os.path.isfile(path):
+            yield os.path.join(os.path.dirname(data_path), name).replace(os.sep, "/"), path
+
+
+def sync_file(data_path: str, local_path: str, target: GeoServerClient, manifest: FileManifest):
+    stat = os.stat(local_path)
+    uploaded = manifest.get(data_path)
+
+    # the checksum is only computed again if the file changed since it was uploaded
+    if uploaded is not None and uploaded["size"] == stat.st_size and uploaded["mtime"] == stat.st_mtime:
+        checksum = uploaded["sha256"]
+    else:
+        checksum = get_checksum(local_path)
+
+    if uploaded is not None and uploaded["sha256"] == checksum and target.get_resource_size(data_path) in [stat.st_size, -1]:
+        if uploaded["mtime"] != stat.st_mtime:
+            manifest.add(data_path, stat.st_size, stat.st_mtime, checksum)
+        print(f"[=] File '{data_path}' is unchanged")
+        return Result(unchanged_objects=[data_path])
+
+    with open(local_path, "rb") as f:
+        put_result = target.put_resource(data_path, f)
+
+    if put_result != True:
+        err_msg_tpl = wrap_error(f"Failed to upload file '{data_path}' to target: {put_result}", put_result)
+        print(f"[!] {err_msg_tpl}")
+        return Result(failed_objects=[FailedObject(name=data_path, reason=err_msg_tpl)])
+
+    manifest.add(data_path, stat.st_size, stat.st_mtime, checksum)
+    print(f"[+] Uploaded file '{data_path}' ({stat.st_size / 1024 / 1024:.1f} MB) to target")
+    return Result(success_objects=[data_path])
+
+
+def get_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def log_files(results: Result):
+    print(f"[*] Uploaded {results.success_count} files to target GeoServer.")
+    if results.unchanged_count:
+        print(f"[*] Skipped {results.unchanged_count} files the target already has.")
+    if results.failed_count:
+        print(f"[*] Failed to upload {results.failed_count} files ({format_errors(results)}).")
@@ -12,81 +12,303 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from util.http import get, get_rest, post_rest, put_rest
+from util.http import GeoServerClient, wrap_error
+from util.pool import iter_listed, iter_parallel, run_parallel
+from util.journal import iter_pending, get_list_key
+from util.select import iter_selected, pull_dependencies
+from util.log import iter_found
+from util.state import get_sync_action, record, write_rest, UNCHANGED, UPDATE
+from util.steps import run_steps
 from typing import Optional
 from model.models import Result, FailedObject
+from sync.layers import split_qualified_name, fq_name
 
-def sync(workspaces: str, source_url: str, source_auth: tuple, target_url: str, target_auth: tuple):
+def sync(workspaces: str, source: GeoServerClient, target: GeoServerClient):
     """
     Fetch all layergroups (with and without workspace) from the source GeoServer and create them on the target GeoServer.
+    Groups may contain other groups (of any workspace), so all groups are fetched first and then created in waves:
+    every wave holds the groups whose nested groups were created by the previous waves and is created concurrently.
     """
 
-    success_layergroups = []
-    failed_layergroups = []
+    results = Result(kind="layergroup")
 
-    # create layergroups without workspace
-    layergroups_no_ws_results = sync_ws_layergroups(None, source_url, source_auth, target_url, target_auth)
-    success_layergroups.extend(layergroups_no_ws_results.success_objects)
-    failed_layergroups.extend(layergroups_no_ws_results.failed_objects)
+    layergroup_tasks = iter_listed(lambda workspace: list_layergroups(workspace, source), [None, *workspaces], results)
+    layergroup_tasks = iter_selected("layergroup", layergroup_tasks, get_layergroup_name)
+    layergroup_tasks = iter_pending("layergroup", layergroup_tasks, get_layergroup_name, results)
 
-    # create layergroups for each workspace
-    for workspace in workspaces:
-        layergroups_ws_results = sync_ws_layergroups(workspace, source_url, source_auth, target_url, target_auth)
-        success_layergroups.extend(layergroups_ws_results.success_objects)
-        failed_layergroups.extend(layergroups_ws_results.failed_objects)
+    layergroups = LayergroupWaves(results)
+    for task, fetched in iter_parallel(lambda task: (task, fetch_layergroup(*task, source)), layergroup_tasks):
+        layergroups.add(task, *fetched)
+
+    for wave in layergroups.get_waves():
+        run_parallel(lambda name: run_steps(layergroups.create_steps(name, target)), wave, result=results)
+
+    results.extend(layergroups.get_cycle_result())
+
+    return results
+
+
+class LayergroupWaves:
+    """
+    The fetched layergroups of a run, which are created in waves (see sync()).
+    """
+
+    def __init__(self, results: Result):
+        self.results = results
+        # fq name -> (workspace, layergroup object)
+        self.layergroups = {}
+        # fq names of the groups that could not be fetched or created
+        self.failed = set()
+        self.nested = {}
+        self.cycles = []
+        self.blocked = []
+
+    def add(self, task: tuple, layergroup_obj: Optional[dict], fetch_result: Result):
+        if layergroup_obj is None:
+            self.failed.add(get_layergroup_name(task))
+            self.results.extend(fetch_result)
+        else:
+            self.layergroups[get_layergroup_name(task)] = (task[0], layergroup_obj)
+
+    def get_waves(self) -> list:
+        self.nested = {name: get_nested_layergroups(layergroup_obj) for name, (_, layergroup_obj) in self.layergroups.items()}
+        waves, self.cycles, self.blocked = get_layergroup_waves(self.nested)
+        if self.layergroups:
+            print(f"[*] Creating {len(self.layergroups)} layergroups in {len(waves)} waves")
+        return waves
+
+    def create_steps(self, name: str, target):
+        failed_dependency = next((dependency for dependency in sorted(self.nested[name]) if dependency in self.failed), None)
+        if failed_dependency is not None:
+            reason = f"Skipped as '{failed_dependency}' could not be synced"
+            print(f"[!] Skipping '{name}': {reason}")
+            result = Result(failed_objects=[FailedObject(name=name, reason=reason, error="dependency")])
+        else:
+            result = yield from sync_fetched_layergroup_steps(*self.layergroups[name], target)
+
+        # the groups of a wave only contain groups of earlier waves, so no group of this wave waits for the result
+        if result.failed_objects:
+            self.failed.add(name)
+        return result
+
+    def get_cycle_result(self) -> Result:
+        return get_cycle_result(self.cycles, self.blocked)
+
+
+def get_layergroup_name(task: tuple):
+    workspace, layergroup = task
+    return fq_name(workspace, layergroup.get("name", "Unknown"))
 
-    return Result(success_objects=success_layergroups, failed_objects=failed_layergroups)
 
+def list_layergroups(workspace: Optional[str], source: GeoServerClient):
+    """
+    Fetch the list of layergroups of a workspace (or the global layergroups if workspace is None).
+    Returns a (lazy) iterator over (workspace, layergroup) tuples and a Result holding a possible failure.
+    """
+    return run_steps(list_layergroups_steps(workspace, source))
+
+
+def list_layergroups_steps(workspace: Optional[str], source):
+    # it is not an error if there are no layergroups
+    rest_path = get_layergroups_rest_path(workspace)
+    layergroups = yield source.get_rest_list(rest_path, "layerGroups", "layerGroup")
+    if layergroups is None:
+        failed = FailedObject(name=get_list_key(rest_path), reason="Failed to fetch layergroups from source", error="fetch")
+        return [], Result(failed_objects=[failed])
+
+    tasks = ((workspace, layergroup) for layergroup in layergroups)
+    return iter_found(tasks, f"layergroups for workspace '{workspace}' on source"), Result()
+
+
+def get_layergroups_rest_path(workspace: Optional[str]):
+    if workspace is None:
+        return "layergroups"
+    return "workspaces/" + workspace + "/layergroups"
+
+
+def sync_layergroup_steps(workspace: Optional[str], layergroup: dict, source, target):
+    layergroup_obj, results = yield from fetch_layergroup_steps(workspace, layergroup, source)
+
+    if layergroup_obj is None:
+        return results
+
+    return (yield from sync_fetched_layergroup_steps(workspace, layergroup_obj, target))
+
+
+def sync_fetched_layergroup_steps(workspace: Optional[str], layergroup_obj: dict, target):
+    # the layers, layergroups and styles are synced first if they are not selected themselves (see util.select)
+    missing = yield pull_dependencies(get_layergroup_requirements(layergroup_obj))
+    if missing is not None:
+        name = fq_name(workspace, layergroup_obj.get("layerGroup", {}).get("name", "Unknown"))
+        print(f"[!] Could not create layergroup '{name}': {missing}")
+        return Result(failed_objects=[FailedObject(name=name, reason=missing, error="dependency")])
+
+    return (yield from create_layergroup_steps(workspace, layergroup_obj, target))
+
+
+def fetch_layergroup(workspace: Optional[str], layergroup: dict, source: GeoServerClient):
+    """
+    Fetch a layergroup from the source GeoServer.
+    Returns the layergroup and an empty Result, or None and a Result holding the failure.
+    """
+    return run_steps(fetch_layergroup_steps(workspace, layergroup, source))
 
-def sync_ws_layergroups(workspace: Optional[str], source_url: str, source_auth: tuple, target_url: str, target_auth: tuple):
+
+def fetch_layergroup_steps(workspace: Optional[str], layergroup: dict, source):
+    href = layergroup["href"]
+
+    layergroup_obj = yield source.get(href)
+
+    if layergroup_obj is None:
+        err_msg_tpl = f"Failed to fetch layergroup details from '{href}'"
+        print(f"[!] {err_msg_tpl}")
+        return None, Result(failed_objects=[FailedObject(name=fq_name(workspace, layergroup.get("name", "Unknown")), reason=err_msg_tpl, error="fetch")])
+
+    return layergroup_obj, Result()
+
+
+def create_layergroup(workspace: Optional[str], layergroup_obj: dict, target: GeoServerClient):
+    return run_steps(create_layergroup_steps(workspace, layergroup_obj, target))
+
+
+def create_layergroup_steps(workspace: Optional[str], layergroup_obj: dict, target):
     success_layergroups = []
     failed_layergroups = []
 
+    layergroup_name = layergroup_obj.get("layerGroup", {}).get("name") # type: ignore
+
     if workspace is None:
-        workspace_prefix = ""
+        fq_layergroup_name = layergroup_name
     else:
-        workspace_prefix = "workspaces/" + workspace + "/"
+        fq_layergroup_name = f"{workspace}:{layergroup_name}"
 
-    layergroups_rest_path = workspace_prefix + "layergroups"
+    state_key = "layergroup:" + fq_layergroup_name
+    object_fingerprint, action = get_sync_action(state_key, layergroup_obj)
 
-    result = get_rest(layergroups_rest_path, source_url, source_auth)
-    if not result:
-        failed = FailedObject(name="None", reason="Failed to fetch layergroups from source")
-        failed_layergroups.append(failed)
-        return Result(success_objects=success_layergroups, failed_objects=failed_layergroups)
+    if action == UNCHANGED:
+        print(f"[=] Layergroup '{fq_layergroup_name}' is unchanged")
+        return Result(unchanged_objects=[fq_layergroup_name])
 
-    layergroups_json = result.get("layerGroups", {}) # type: ignore
+    layergroups_rest_path = get_layergroups_rest_path(workspace)
+    post_result = yield write_rest(target, action, layergroups_rest_path, layergroups_rest_path + "/" + layergroup_name, layergroup_obj)
 
-    if not layergroups_json:
-        # we do not append a failed object here, as it is not an error if there are no layergroups
-        return Result(success_objects=success_layergroups, failed_objects=failed_layergroups)
+    if post_result == True:
+        record(state_key, object_fingerprint)
+        print(f"[+] {'Updated' if action == UPDATE else 'Created'} layergroup '{fq_layergroup_name}' on target")
+        success_layergroups.append(fq_layergroup_name)
 
-    layergroups = layergroups_json.get("layerGroup", []) # type: ignore
-    print(f"[*] Found {len(layergroups)} layergroups for workspace '{workspace}' on source")
+    else:
+        err_msg_tpl = wrap_error(f"Failed to create layergroup '{fq_layergroup_name}' on target: {post_result}", post_result)
+        failed_layergroup = FailedObject(name=fq_layergroup_name, reason=err_msg_tpl)
+        failed_layergroups.append(failed_layergroup)
+        print(f"[!] {err_msg_tpl}")
 
-    for layergroup in layergroups:
-        href = layergroup["href"]
+    return Result(success_objects=success_layergroups, failed_objects=failed_layergroups)
 
-        layergroup_obj = get(href, source_auth)
 
-        layergroup_name = layergroup_obj.get("layerGroup", {}).get("name") # type: ignore
+def get_layergroup_dependencies(layergroup_obj: dict):
+    """
+    Returns the layers, layergroups and styles a layergroup references as ("layer" | "layergroup" | "style", workspace, name) tuples.
+    The workspace is None for global layergroups and styles.
+    """
+    layergroup = layergroup_obj.get("layerGroup", {})
+    dependencies = []
 
-        if workspace_prefix == "":
-            fq_layergroup_name = layergroup_name
-        else:
-            fq_layergroup_name = f"{workspace}:{layergroup_name}"
+    publishables = layergroup.get("publishables") or {}
+    published = publishables.get("published", [])
+    if isinstance(published, dict):
+        published = [published]
 
-        post_result = post_rest(layergroups_rest_path, target_url, target_auth, layergroup_obj) # type: ignore
+    for entry in published:
+        if not entry or not entry.get("name"):
+            continue
+        kind = "layergroup" if entry.get("@type") == "layerGroup" else "layer"
+        dependencies.append((kind, *split_qualified_name(entry["name"])))
 
-        if post_result == True:
-            print(f"[+] Created layergroup '{fq_layergroup_name}' on target")
-            success_layergroups.append(fq_layergroup_name)
+    styles = layergroup.get("styles") or {}
+    style_refs = styles.get("style", [])
+    if isinstance(style_refs, dict):
+        style_refs = [style_refs]
 
-        else:
-            err_msg_tpl = f"Failed to create layergroup '{fq_layergroup_name}' on target: {post_result}"
-            failed_layergroup = FailedObject(name=fq_layergroup_name, reason=err_msg_tpl)
-            failed_layergroups.append(failed_layergroup)
-            print(f"[!] {err_msg_tpl}")
-            continue
+    for style_ref in style_refs:
+        if style_ref and style_ref.get("name"):
+            dependencies.append(("style", *split_qualified_name(style_ref["name"])))
 
-    return Result(success_objects=success_layergroups, failed_objects=failed_layergroups)
+    return dependencies
+
+
+def get_layergroup_requirements(layergroup_obj: dict):
+    """
+    Returns the dependencies of a layergroup as (kind, workspace, name, store type) tuples (see sync.layers.get_layer_requirements).
+    """
+    return [(kind, workspace, name, None) for kind, workspace, name in get_layergroup_dependencies(layergroup_obj)]
+
+
+def get_nested_layergroups(layergroup_obj: dict) -> set:
+    """
+    Returns the fq names of the layergroups a layergroup contains.
+    """
+    return {fq_name(workspace, name) for kind, workspace, name in get_layergroup_dependencies(layergroup_obj) if kind == "layergroup"}
+
+
+def get_layergroup_waves(nested: dict) -> tuple:
+    """
+    Orders layergroups by the groups they contain, given as {name: set of nested names} (names that are
+    not keys are not synced by this run and ignored). Returns the waves, each a list of names whose nested
+    groups are all in earlier waves, the cycles as lists of names and the names that are not in a cycle,
+    but contain a group in a cycle.
+    """
+    open_counts = {name: 0 for name in nested}
+    parents = {name: [] for name in nested}
+    for name, children in nested.items():
+        for child in children:
+            if child in nested:
+                open_counts[name] += 1
+                parents[child].append(name)
+
+    waves = []
+    ready = sorted(name for name, count in open_counts.items() if count == 0)
+    while ready:
+        waves.append(ready)
+        next_ready = []
+        for name in ready:
+            for parent in parents[name]:
+                open_counts[parent] -= 1
+                if open_counts[parent] == 0:
+                    next_ready.append(parent)
+        ready = sorted(next_ready)
+
+    # every group left contains at least one other group left, following them leads into a cycle
+    left = {name for name, count in open_counts.items() if count > 0}
+    cycles = []
+    seen = set()
+    for start in sorted(left):
+        path, index = [], {}
+        name = start
+        while name not in index and name not in seen:
+            index[name] = len(path)
+            path.append(name)
+            name = min(child for child in nested[name] if child in left)
+        if name in index:
+            cycles.append(path[index[name]:])
+        seen.update(path)
+
+    in_cycles = {name for cycle in cycles for name in cycle}
+    return waves, cycles, sorted(left - in_cycles)
+
+
+def get_cycle_result(cycles: list, blocked: list) -> Result:
+    """
+    Reports the layergroups that can not be created because they contain each other (directly or by a
+    group they contain) as failed.
+    """
+    failed_layergroups = []
+    for cycle in cycles:
+        reason = "Part of a dependency cycle of layergroups: " + " -> ".join([*cycle, cycle[0]])
+        print(f"[!] {reason}")
+        failed_layergroups += [FailedObject(name=name, reason=reason, error="dependency") for name in cycle]
+    for name in blocked:
+        reason = "Skipped as it contains a layergroup in a dependency cycle"
+        print(f"[!] Skipping '{name}': {reason}")
+        failed_layergroups.append(FailedObject(name=name, reason=reason, error="dependency"))
+    return Result(failed_objects=failed_layergroups)
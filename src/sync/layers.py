@@ -12,117 +12,280 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from util.http import get, get_rest, post_rest, put_rest
+from typing import Optional
+from util.http import GeoServerClient, wrap_error
+from util.pool import iter_listed, run_parallel
+from util.journal import iter_pending, get_list_key
+from util.select import iter_selected, pull_dependencies
+from util.log import iter_found
+from util.state import get_sync_action, record, write_rest, CREATE, UNCHANGED, UPDATE
+from util.steps import run_steps, Parallel
 from model.models import Result, FailedObject
 
-def sync(workspaces: list[str], source_url: str, source_auth: tuple, target_url: str, target_auth: tuple):
+LAYER_TYPES = ["featureTypes", "coverages", "wmsLayers", "wmtsLayers"]
+
+# type of the store of the resources of each layer type
+LAYER_STORE_TYPES = {"featureTypes": "dataStores", "coverages": "coverageStores", "wmsLayers": "wmsStores", "wmtsLayers": "wmtsStores"}
+
+def sync(workspaces: list[str], source: GeoServerClient, target: GeoServerClient):
     """
     Fetch all layers for a given workspace from the source GeoServer and create them on the target GeoServer.
     """
 
-    success_layers = []
-    failed_layers = []
-    # created_layers = []
+    results = Result(kind="layer")
+
+    # the layer lists of all workspaces and layer types are read one after another,
+    # while the layers read so far are synced
+    layer_tasks = iter_listed(lambda args: list_layers(*args, source),
+                              [(workspace, layer_type) for workspace in workspaces for layer_type in LAYER_TYPES], results)
+    layer_tasks = iter_selected("layer", layer_tasks, get_layer_name)
+    layer_tasks = iter_pending("layer", layer_tasks, get_layer_name, results)
+
+    run_parallel(lambda args: sync_layer(*args, source, target), layer_tasks, result=results)
+
+    return results
 
-    for workspace in workspaces:
 
-        for layer_type in ["featureTypes", "coverages", "wmsLayers", "wmtsLayers"]:
-            rest_path = "workspaces/" + workspace + "/" + layer_type.lower()
-            get_result = get_rest(rest_path, source_url, source_auth)
+def get_layer_name(task: tuple):
+    workspace, _, layer = task
+    return workspace + ":" + layer.get("name", "Unknown")
+
+
+def list_layers(workspace: str, layer_type: str, source: GeoServerClient):
+    """
+    Fetch the list of layers of the given type in a workspace.
+    Returns a (lazy) iterator over (workspace, layer_type, layer) tuples and a Result holding a possible failure.
+    """
+    return run_steps(list_layers_steps(workspace, layer_type, source))
+
 
-            if not get_result:
-                failed = FailedObject(name="None", reason=f"Failed to fetch layer type '{layer_type}' from source")
-                failed_layers.append(failed)
-                continue
+def list_layers_steps(workspace: str, layer_type: str, source):
+    rest_path = "workspaces/" + workspace + "/" + layer_type.lower()
 
-            layers_obj = get_result.get(layer_type, {}) # type: ignore
-            if not layers_obj:
-                # this is not an error as there might be no layers
-                continue
+    # it is not an error if there are no layers
+    layers = yield source.get_rest_list(rest_path, layer_type, layer_type[:-1])
 
-            layers = layers_obj.get(layer_type[:-1], [])
+    if layers is None:
+        failed = FailedObject(name=get_list_key(rest_path), reason=f"Failed to fetch layer type '{layer_type}' from source", error="fetch")
+        return [], Result(failed_objects=[failed])
 
-            print(f"[*] Found {len(layers)} layers of type '{layer_type}' in workspace '{workspace}'")
+    tasks = ((workspace, layer_type, layer) for layer in layers)
+    return iter_found(tasks, f"layers of type '{layer_type}' in workspace '{workspace}'"), Result()
 
-            for layer in layers:
-                href = layer["href"]
 
-                layer_result = get(href, source_auth)
+def sync_layer(workspace: str, layer_type: str, layer: dict, source: GeoServerClient, target: GeoServerClient):
+    return run_steps(sync_layer_steps(workspace, layer_type, layer, source, target))
 
-                if layer_result is None:
-                    failed = FailedObject(name=layer.get("name", "Unknown"), reason=f"Failed to fetch layer details from '{href}'")
-                    failed_layers.append(failed)
-                    print(f"[!] {failed.reason}")
-                    continue
 
-                layer_obj = layer_result.get(layer_type[:-1], {}) # type: ignore
-                if not layer_obj:
-                    failed = FailedObject(name=layer.get("name", "Unknown"), reason=f"Layer object is empty for '{href}'")
-                    failed_layers.append(failed)
-                    print(f"[!] {failed.reason}")
-                    continue
+def sync_layer_steps(workspace: str, layer_type: str, layer: dict, source, target):
+    layer_result, layer_settings, results = yield from fetch_layer_with_settings_steps(workspace, layer_type, layer, source)
 
-                layer_name = layer_obj.get("name")
-                store = layer_obj.get("store", {})
+    if layer_result is None:
+        return results
 
-                if not store:
-                    err_msg_tpl = f"[!] Could not create layer '{workspace}:{layer_name}' - no store found in layer object."
-                    failed = FailedObject(name=layer_name, reason=err_msg_tpl)
-                    failed_layers.append(failed)
-                    print(f"{err_msg_tpl}")
-                    continue
+    layer_name = layer_result[layer_type[:-1]].get("name")
 
-                store_name_parts = store.get("name").split(":")
+    state_key = "layer:" + workspace + ":" + layer_name
+    object_fingerprint, action = get_sync_action(state_key, layer_result, layer_settings)
 
-                # Determine the store name as we need it to create the layer on the target GeoServer
-                if len(store_name_parts) == 2 and store_name_parts[0] == workspace:
-                    store_name = store_name_parts[1]
-                else:
-                    err_msg_tpl = f"[!] Could not create layer '{workspace}:{layer_name}' - invalid store format. Expected 'workspace:store_name'."
-                    failed = FailedObject(name=layer_name, reason=err_msg_tpl)
-                    failed_layers.append(failed)
-                    print(f"{err_msg_tpl}")
-                    continue
+    if action == UNCHANGED:
+        print(f"[=] Layer '{workspace}:{layer_name}' is unchanged")
+        return Result(unchanged_objects=[workspace + ":" + layer_name])
 
-                if layer_type == "featureTypes":
-                    # for feature type sources it is important to be posted against the "/workspaces/.../datastores/.../..." endpoint
-                    rest_path = "workspaces/" + workspace + "/datastores/" + store_name + "/" + layer_type.lower()
+    # the store and styles are synced first if they are not selected themselves (see util.select)
+    missing = yield pull_dependencies(get_layer_requirements(workspace, layer_type, layer_result, layer_settings))
+    if missing is not None:
+        print(f"[!] Could not create layer '{workspace}:{layer_name}': {missing}")
+        return Result(failed_objects=[FailedObject(name=workspace + ":" + layer_name, reason=missing, error="dependency")])
+
+    create_result = yield from create_layer_steps(workspace, layer_type, layer_result, target, action)
+
+    if create_result != True:
+        failed = FailedObject(name=workspace + ":" + layer_name, reason=create_result)
+        print(f"{create_result}")
+        return Result(failed_objects=[failed])
+
+    # we need to update to set styling, timing or caching properties
+    update_result = yield put_layer_settings(workspace, layer_name, layer_settings, target)
+
+    if update_result == True:
+        record(state_key, object_fingerprint)
+
+    return get_update_result(workspace, layer_name, update_result)
+
+
+def fetch_layer_with_settings(workspace: str, layer_type: str, layer: dict, source: GeoServerClient):
+    """
+    Fetch the resource and the layer settings of a layer from the source GeoServer at the same time,
+    the settings are addressed by the listed name, so they do not have to wait for the resource.
+    Returns the resource, the settings and an empty Result, or None, None and a Result holding the failure.
+    """
+    return run_steps(fetch_layer_with_settings_steps(workspace, layer_type, layer, source))
 
-                post_result = post_rest(rest_path, target_url, target_auth, layer_result) # type: ignore
 
-                if post_result == True:
-                    print(f"[+] Created layer '{workspace}:{layer_name}' of type '{layer_type[:-1]}' on target")
+def fetch_layer_with_settings_steps(workspace: str, layer_type: str, layer: dict, source):
+    (layer_result, results), (layer_settings, settings_results) = yield Parallel(
+        fetch_layer_steps(workspace, layer_type, layer, source),
+        fetch_layer_settings_steps(workspace, layer.get("name", "Unknown"), source))
+
+    if layer_result is None:
+        return None, None, results
+    if layer_settings is None:
+        return None, None, settings_results
+    return layer_result, layer_settings, Result()
+
+
+def fetch_layer_steps(workspace: str, layer_type: str, layer: dict, source):
+    """
+    Fetch the resource (featureType, coverage, ...) of a layer from the source GeoServer.
+    Returns the resource and an empty Result, or None and a Result holding the failure.
+    """
+    href = layer["href"]
+
+    layer_result = yield source.get(href)
+
+    if layer_result is None:
+        failed = FailedObject(name=workspace + ":" + layer.get("name", "Unknown"), reason=f"Failed to fetch layer details from '{href}'", error="fetch")
+        print(f"[!] {failed.reason}")
+        return None, Result(failed_objects=[failed])
+
+    layer_obj = layer_result.get(layer_type[:-1], {}) # type: ignore
+    if not layer_obj:
+        failed = FailedObject(name=workspace + ":" + layer.get("name", "Unknown"), reason=f"Layer object is empty for '{href}'", error="fetch")
+        print(f"[!] {failed.reason}")
+        return None, Result(failed_objects=[failed])
+
+    return layer_result, Result()
+
+
+def create_layer(workspace: str, layer_type: str, layer_result: dict, target: GeoServerClient, action: str = CREATE):
+    """
+    Create (or update, see util.state) the resource of a layer on the target GeoServer.
+    Returns True or an error message.
+    """
+    return run_steps(create_layer_steps(workspace, layer_type, layer_result, target, action))
+
+
+def create_layer_steps(workspace: str, layer_type: str, layer_result: dict, target, action: str = CREATE):
+    layer_name = layer_result[layer_type[:-1]].get("name")
+
+    post_path, err_msg_tpl = get_layer_post_path(workspace, layer_type, layer_result[layer_type[:-1]])
+
+    if post_path is None:
+        return err_msg_tpl
 
-                    # we need to update to set styling, timing or caching properties
-                    update_result = update_layer(workspace, layer_name, source_url, source_auth, target_url, target_auth)
+    put_path = "workspaces/" + workspace + "/" + layer_type.lower() + "/" + layer_name
+    post_result = yield write_rest(target, action, post_path, put_path, layer_result)
 
-                    if update_result == True:
-                        print(f"[+] Updated layer config for '{workspace}:{layer_name}' on target")
-                        success_layers.append(workspace + ":" + layer_name)
-                    else:
-                        err_msg_tpl = f"[!] Failed to update layer '{workspace}:{layer_name}' on target"
-                        failed = FailedObject(name=layer_name, reason=err_msg_tpl)
-                        failed_layers.append(failed)
-                        print(f"{err_msg_tpl}")
-                else:
-                    err_msg_tpl = f"[!] Could not create layer '{workspace}:{layer_name}' of type '{layer_type[:-1]}' on target: {post_result}"
-                    failed = FailedObject(name=layer_name, reason=err_msg_tpl)
-                    failed_layers.append(failed)
-                    print(f"{err_msg_tpl}")
+    if post_result != True:
+        return wrap_error(f"[!] Could not create layer '{workspace}:{layer_name}' of type '{layer_type[:-1]}' on target: {post_result}", post_result)
 
-    return Result(success_objects=success_layers, failed_objects=failed_layers)
+    print(f"[+] {'Updated' if action == UPDATE else 'Created'} layer '{workspace}:{layer_name}' of type '{layer_type[:-1]}' on target")
+    return True
 
 
-def update_layer(workspace: str, layer_name: str, source_url: str, source_auth: tuple, target_url: str, target_auth: tuple):
-    rest_path = "workspaces/" + workspace + "/layers/" + layer_name
-    layer_settings = get_rest(rest_path, source_url, source_auth)
+def get_update_result(workspace: str, layer_name: str, update_result):
+    if update_result == True:
+        print(f"[+] Updated layer config for '{workspace}:{layer_name}' on target")
+        return Result(success_objects=[workspace + ":" + layer_name])
+
+    err_msg_tpl = wrap_error(f"[!] Failed to update layer '{workspace}:{layer_name}' on target", update_result)
+    print(f"{err_msg_tpl}")
+    return Result(failed_objects=[FailedObject(name=workspace + ":" + layer_name, reason=err_msg_tpl)])
+
+
+def get_layer_post_path(workspace: str, layer_type: str, layer_obj: dict):
+    """
+    Determine the REST path to create the layer on the target GeoServer.
+    Returns the path and None, or None and an error message if the path can not be determined.
+    """
+    layer_name = layer_obj.get("name")
+    store = layer_obj.get("store", {})
+
+    if not store:
+        return None, f"[!] Could not create layer '{workspace}:{layer_name}' - no store found in layer object."
+
+    store_name_parts = store.get("name").split(":")
+
+    # Determine the store name as we need it to create the layer on the target GeoServer
+    if len(store_name_parts) == 2 and store_name_parts[0] == workspace:
+        store_name = store_name_parts[1]
+    else:
+        return None, f"[!] Could not create layer '{workspace}:{layer_name}' - invalid store format. Expected 'workspace:store_name'."
+
+    if layer_type == "featureTypes":
+        # for feature type sources it is important to be posted against the "/workspaces/.../datastores/.../..." endpoint
+        return "workspaces/" + workspace + "/datastores/" + store_name + "/" + layer_type.lower(), None
+
+    return "workspaces/" + workspace + "/" + layer_type.lower(), None
+
+
+def fetch_layer_settings_steps(workspace: str, layer_name: str, source):
+    """
+    Fetch the layer settings (styles, caching, ...) of a layer from the source GeoServer.
+    Returns the settings and an empty Result, or None and a Result holding the failure.
+    """
+    layer_settings = yield source.get_rest("workspaces/" + workspace + "/layers/" + layer_name)
 
     if not layer_settings:
         err_msg_tpl = f"[!] Could not fetch layer settings for '{workspace}:{layer_name}' from source"
         print(f"{err_msg_tpl}")
-        return err_msg_tpl
+        return None, Result(failed_objects=[FailedObject(name=workspace + ":" + layer_name, reason=err_msg_tpl, error="fetch")])
+
+    return layer_settings, Result()
 
+
+def put_layer_settings(workspace: str, layer_name: str, layer_settings: dict, target: GeoServerClient):
     # We need to post the layer settings to the target GeoServer
-    put_result = put_rest(rest_path, target_url, target_auth, layer_settings) # type: ignore
+    # (with the AsyncGeoServerClient, the caller awaits the request, see util.steps)
+    put_result = target.put_rest("workspaces/" + workspace + "/layers/" + layer_name, layer_settings) # type: ignore
 
     return put_result
+
+
+def get_layer_styles(layer_settings: dict):
+    """
+    Returns the (workspace, name) tuples of all styles (default and alternative) referenced by the layer settings.
+    The workspace is None for global styles.
+    """
+    layer = layer_settings.get("layer", {})
+
+    style_refs = []
+    if layer.get("defaultStyle"):
+        style_refs.append(layer["defaultStyle"])
+
+    styles = layer.get("styles") or {}
+    alternative_styles = styles.get("style", [])
+    if isinstance(alternative_styles, dict):
+        alternative_styles = [alternative_styles]
+    style_refs.extend(alternative_styles)
+
+    return [split_qualified_name(style_ref.get("name")) for style_ref in style_refs if style_ref.get("name")]
+
+
+def get_layer_requirements(workspace: str, layer_type: str, layer_result: dict, layer_settings: dict):
+    """
+    Returns the store and the styles a layer needs as (kind, workspace, name, store type) tuples.
+    """
+    requirements = []
+
+    store_name = layer_result[layer_type[:-1]].get("store", {}).get("name")
+    if store_name:
+        requirements.append(("store", *split_qualified_name(store_name), LAYER_STORE_TYPES[layer_type]))
+
+    requirements.extend(("style", style_workspace, style_name, None) for style_workspace, style_name in get_layer_styles(layer_settings))
+    return requirements
+
+
+def fq_name(workspace: Optional[str], name: str):
+    return name if workspace is None else f"{workspace}:{name}"
+
+
+def split_qualified_name(name: str):
+    """
+    Splits a name like 'workspace:name' into ('workspace', 'name'), a name without workspace into (None, 'name').
+    """
+    if ":" in name:
+        workspace, local_name = name.split(":", 1)
+        return workspace, local_name
+    return None, name
@@ -0,0 +1,263 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Syncs the whole catalog as one dependency graph instead of phase by phase.
+
+After listing the objects of all namespaces (list requests only), every object
+becomes a task of a Scheduler, which starts it as soon as the objects it depends
+on have been created on the target:
+
+    namespace -> store -> featureType/coverage/... -> layer settings -> layergroup
+                 style ----------------------------> layer settings -> layergroup
+
+The dependencies of layers (store, styles) and layergroups (layers, layergroups,
+styles) are only known after fetching the objects from the source, so these objects
+are synced in a fetch task and one or two create tasks.
+"""
+
+from typing import Optional
+from util.http import GeoServerClient
+from util.pool import map_parallel
+from util.scheduler import Scheduler
+from util.metrics import get_metrics
+from util.journal import iter_pending, get_list_key
+from util.select import iter_selected, pull_dependencies
+from util.state import get_sync_action, record, UNCHANGED
+from model.models import Result, FailedObject
+from sync.workspaces import sync_namespace, get_namespace_name
+from sync.datastores import STORE_TYPES, list_stores, sync_store, prepare_passwords, get_store_name
+from sync.styles import list_styles, sync_style, get_style_name
+from sync.layers import (LAYER_TYPES, list_layers, fetch_layer_with_settings, create_layer,
+                         put_layer_settings, get_update_result, get_layer_styles, split_qualified_name, fq_name,
+                         get_layer_name, get_layer_requirements)
+from sync.layergroups import (list_layergroups, fetch_layergroup, create_layergroup, get_layergroup_dependencies,
+                              get_layergroup_name, get_layergroup_requirements)
+
+# tasks with lower values are started first, so objects that are further down
+# the graph are finished before new objects are fetched from the source
+PRIORITY_LAYER = 0
+PRIORITY_RESOURCE = 1
+PRIORITY_LAYERGROUP = 2
+PRIORITY_STORE = 3
+PRIORITY_STYLE = 3
+PRIORITY_NAMESPACE = 4
+PRIORITY_FETCH_LAYER = 5
+PRIORITY_FETCH_LAYERGROUP = 6
+
+# the results of the single steps of layers and layergroups are reported as layer(group) results
+RESULT_KINDS = {
+    "fetch-layer": "layer",
+    "resource": "layer",
+    "fetch-layergroup": "layergroup",
+}
+
+
+def sync(source: GeoServerClient, target: GeoServerClient, workers: int):
+    """
+    Sync the whole catalog from the source GeoServer to the target GeoServer.
+    Returns the results for workspaces, stores, styles, layers and layergroups.
+    """
+    results = {kind: Result(kind=kind) for kind in ["store", "style", "layer", "layergroup"]}
+    # the workspace names are kept, as for the other engines
+    results = {"namespace": Result(kind="workspace", keep_names=True), **results}
+
+    namespaces = source.get_rest_list("namespaces", "namespaces", "namespace")
+    if namespaces is None:
+        results["namespace"].extend(Result(failed_objects=[FailedObject(name=get_list_key("namespaces"), reason="Failed to fetch namespaces from source", error="fetch")]))
+        return tuple(results.values())
+
+    namespaces = list(iter_selected("workspace", namespaces, get_namespace_name))
+    workspaces = [ns["name"] for ns in namespaces]
+    print(f"[*] Found {len(namespaces)} namespaces on source")
+
+    metrics = get_metrics()
+
+    def report(node, result: Result):
+        # the results are streamed as the tasks finish, so the journal is up to date if the run is interrupted
+        results[RESULT_KINDS.get(node.key[0], node.key[0])].extend(result, node.duration)
+        if node.duration:
+            metrics.add_time("task", node.key[0], node.duration)
+
+    scheduler = Scheduler(workers, report)
+
+    for ns in iter_pending("workspace", namespaces, get_namespace_name, results["namespace"]):
+        scheduler.add(("namespace", ns["name"]), ns["name"],
+                      lambda ns=ns: sync_namespace(ns, source, target), priority=PRIORITY_NAMESPACE)
+
+    # list all objects of the catalog, these are cheap requests compared to fetching and creating the objects
+    print("[*] Listing stores, styles, layers and layergroups on source...")
+    # (the lists are read completely by the workers, as all objects become tasks of the graph anyway)
+    store_lists = map_parallel(lambda args: read_list(*list_stores(*args, source)),
+                               [(workspace, store_type) for workspace in workspaces for store_type in STORE_TYPES], workers)
+    style_lists = map_parallel(lambda workspace: read_list(*list_styles(workspace, source)), [None, *workspaces], workers)
+    layer_lists = map_parallel(lambda args: read_list(*list_layers(*args, source)),
+                               [(workspace, layer_type) for workspace in workspaces for layer_type in LAYER_TYPES], workers)
+    layergroup_lists = map_parallel(lambda workspace: read_list(*list_layergroups(workspace, source)), [None, *workspaces], workers)
+
+    for kind, lists in [("store", store_lists), ("style", style_lists), ("layer", layer_lists), ("layergroup", layergroup_lists)]:
+        for _, list_result in lists:
+            results[kind].extend(list_result)
+
+    # only selected objects (see util.select) are added, objects done by a previous run (see util.journal)
+    # are not, so tasks depending on them can run
+    # filled by prepare_passwords() below, before the first store task runs
+    prefetched = {}
+    store_tasks = list(iter_pending_tasks("store", store_lists, get_store_name, results["store"]))
+    for workspace, store_type, store in store_tasks:
+        add_store(scheduler, workspace, store_type, store, source, target, prefetched)
+
+    for workspace, style in iter_pending_tasks("style", style_lists, get_style_name, results["style"]):
+        add_style(scheduler, workspace, style, source, target)
+
+    for workspace, layer_type, layer in iter_pending_tasks("layer", layer_lists, get_layer_name, results["layer"]):
+        add_layer(scheduler, workspace, layer_type, layer, source, target)
+
+    for workspace, layergroup in iter_pending_tasks("layergroup", layergroup_lists, get_layergroup_name, results["layergroup"]):
+        add_layergroup(scheduler, workspace, layergroup, source, target)
+
+    # ask for all unknown passwords before the first store is synced
+    prefetched.update(prepare_passwords(store_tasks, source))
+
+    print(f"[*] Syncing {len(scheduler.nodes)} tasks with {workers} workers...")
+
+    scheduler.run()
+
+    return tuple(results.values())
+
+
+def read_list(tasks, list_result: Result):
+    return list(tasks), list_result
+
+
+def iter_tasks(lists):
+    return (task for tasks, _ in lists for task in tasks)
+
+
+def iter_pending_tasks(kind: str, lists, get_name, result: Result):
+    return iter_pending(kind, iter_selected(kind, iter_tasks(lists), get_name), get_name, result)
+
+
+def namespace_deps(workspace: Optional[str]):
+    return [] if workspace is None else [("namespace", workspace)]
+
+
+def add_store(scheduler: Scheduler, workspace: str, store_type: str, store: dict, source: GeoServerClient, target: GeoServerClient,
+              prefetched: dict):
+    scheduler.add(("store", workspace, store["name"]), fq_name(workspace, store["name"]),
+                  lambda: sync_store(workspace, store_type, store, source, target, prefetched.pop(store["href"], None)),
+                  deps=namespace_deps(workspace), priority=PRIORITY_STORE)
+
+
+def add_style(scheduler: Scheduler, workspace: Optional[str], style: dict, source: GeoServerClient, target: GeoServerClient):
+    scheduler.add(("style", workspace, style["name"]), fq_name(workspace, style["name"]),
+                  lambda: sync_style(workspace, style, source, target),
+                  deps=namespace_deps(workspace), priority=PRIORITY_STYLE)
+
+
+def add_layer(scheduler: Scheduler, workspace: str, layer_type: str, layer: dict, source: GeoServerClient, target: GeoServerClient):
+    layer_name = layer["name"]
+    name = fq_name(workspace, layer_name)
+    fetch_key = ("fetch-layer", workspace, layer_name)
+    resource_key = ("resource", workspace, layer_name)
+    layer_key = ("layer", workspace, layer_name)
+
+    # filled by the fetch task, read by the create tasks
+    fetched = {}
+
+    def fetch():
+        layer_result, layer_settings, result = fetch_layer_with_settings(workspace, layer_type, layer, source)
+        if layer_result is None:
+            return result
+
+        state_key = "layer:" + name
+        object_fingerprint, action = get_sync_action(state_key, layer_result, layer_settings)
+
+        if action == UNCHANGED:
+            print(f"[=] Layer '{name}' is unchanged")
+            fetched["action"] = action
+            return Result(unchanged_objects=[name])
+
+        # dependencies that are not selected are not part of the graph, they are synced right away (see util.select)
+        missing = pull_dependencies(get_layer_requirements(workspace, layer_type, layer_result, layer_settings))
+        if missing is not None:
+            print(f"[!] Could not create layer '{name}': {missing}")
+            return Result(failed_objects=[FailedObject(name=name, reason=missing, error="dependency")])
+
+        fetched["resource"] = layer_result
+        fetched["settings"] = layer_settings
+        fetched["state"] = (state_key, object_fingerprint, action)
+
+        store_name = layer_result[layer_type[:-1]].get("store", {}).get("name")
+        if store_name:
+            scheduler.add_deps(resource_key, [("store", *split_qualified_name(store_name))])
+        scheduler.add_deps(layer_key, [("style", *style) for style in get_layer_styles(layer_settings)])
+
+        return Result()
+
+    def create_resource():
+        if fetched.get("action") == UNCHANGED:
+            return Result()
+
+        create_result = create_layer(workspace, layer_type, fetched.pop("resource"), target, fetched["state"][2])
+        if create_result != True:
+            print(f"{create_result}")
+            return Result(failed_objects=[FailedObject(name=name, reason=create_result)])
+        return Result()
+
+    def update():
+        if fetched.get("action") == UNCHANGED:
+            return Result()
+
+        update_result = put_layer_settings(workspace, layer_name, fetched.pop("settings"), target)
+        if update_result == True:
+            record(*fetched["state"][:2])
+        fetched.clear()
+        return get_update_result(workspace, layer_name, update_result)
+
+    scheduler.add(fetch_key, name, fetch, priority=PRIORITY_FETCH_LAYER)
+    scheduler.add(resource_key, name, create_resource,
+                  deps=[fetch_key, *namespace_deps(workspace)], priority=PRIORITY_RESOURCE)
+    scheduler.add(layer_key, name, update, deps=[resource_key], priority=PRIORITY_LAYER)
+
+
+def add_layergroup(scheduler: Scheduler, workspace: Optional[str], layergroup: dict, source: GeoServerClient, target: GeoServerClient):
+    layergroup_name = layergroup["name"]
+    fetch_key = ("fetch-layergroup", workspace, layergroup_name)
+    layergroup_key = ("layergroup", workspace, layergroup_name)
+
+    # filled by the fetch task, read by the create task
+    fetched = {}
+
+    def fetch():
+        layergroup_obj, result = fetch_layergroup(workspace, layergroup, source)
+        if layergroup_obj is None:
+            return result
+
+        missing = pull_dependencies(get_layergroup_requirements(layergroup_obj))
+        if missing is not None:
+            print(f"[!] Could not create layergroup '{fq_name(workspace, layergroup_name)}': {missing}")
+            return Result(failed_objects=[FailedObject(name=fq_name(workspace, layergroup_name), reason=missing, error="dependency")])
+
+        fetched["layergroup"] = layergroup_obj
+        scheduler.add_deps(layergroup_key, get_layergroup_dependencies(layergroup_obj))
+
+        return Result()
+
+    def create():
+        return create_layergroup(workspace, fetched.pop("layergroup"), target)
+
+    scheduler.add(fetch_key, fq_name(workspace, layergroup_name), fetch, priority=PRIORITY_FETCH_LAYERGROUP)
+    scheduler.add(layergroup_key, fq_name(workspace, layergroup_name), create,
+                  deps=[fetch_key, *namespace_deps(workspace)], priority=PRIORITY_LAYERGROUP)
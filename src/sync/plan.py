@@ -0,0 +1,272 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Planning (python src/main.py plan): estimates how long a sync takes without running it. Only the list
+endpoints of the source are read (as in watch mode), no object is fetched or written. The number of objects
+and requests of every phase follows from the lists, the duration from the latencies of both GeoServers
+(sampled with a few cheap GETs) and the configured concurrency. The password pre-flight and the tile layers
+(if enabled) are planned as phases of their own, the seeding of the tile caches is not. The estimate is broken
+down by workspace, and by shard with --shards, to find the workspaces that should be synced or sharded separately.
+"""
+
+import json
+import statistics
+import time
+from typing import Optional
+from util.http import GeoServerClient
+from util.async_http import DEFAULT_ASYNC_HTTP_CONFIG
+from util.pool import get_workers
+from util.select import get_selector
+from util.shard import ShardRing
+from util.limiter import DEFAULT_LIMITS_CONFIG
+from util.secrets import DEFAULT_SECRETS_CONFIG
+from sync.datastores import STORE_TYPES, PASSWORD_STORE_TYPES
+from sync.layers import LAYER_TYPES, split_qualified_name
+from sync.tiles import DEFAULT_GWC_CONFIG
+from sync.watch import DELETE_ORDER, list_catalog
+
+DEFAULT_PLAN_CONFIG = {
+    # number of GETs sent to each GeoServer to sample its latency
+    "samples": 5,
+    # a write (POST/PUT) takes this many times the sampled latency of the target
+    "write_latency_factor": 2.0,
+    # JSON file with the estimates by phase, workspace and shard, empty to disable
+    "report": "",
+}
+
+# the phases in the order they run: the password pre-flight fetches the details of the stores that can have a
+# password before the first store is synced (if [secrets] interactive), the tile layers are copied after the
+# catalog (if [gwc] enabled)
+PLAN_ORDER = ["workspace", "password", "store", "style", "layer", "layergroup", "tilelayer"]
+
+# the names of the phases that are not named after the kind of their objects
+PHASE_NAMES = {"password": "password pre-flight", "tilelayer": "tile layers"}
+
+# requests to sync one object: (GETs from the source, writes to the target)
+OBJECT_REQUESTS = {
+    # namespace
+    "workspace": (1, 1),
+    # details of a store that can have a password, which are not fetched again by the sync of the store
+    "password": (1, 0),
+    "store": (1, 1),
+    # entry and SLD, the SLD is posted in one request (two with style_upload = "two-step")
+    "style": (2, 1),
+    # resource and settings, the resource is posted and the settings are put
+    "layer": (2, 2),
+    "layergroup": (1, 1),
+    # one for every layer and layergroup, it replaces the tile layer GeoServer created with them
+    "tilelayer": (1, 1),
+}
+
+# kinds whose GETs are sent at the same time with more than one worker
+PARALLEL_READS = ["style", "layer"]
+
+
+def plan(config: dict, source: GeoServerClient, target: GeoServerClient, shards: Optional[int] = None) -> Optional[dict]:
+    """
+    Lists the selected objects of the source and returns the estimates of the sync (see log_plan()),
+    None if the latency of a GeoServer could not be sampled.
+    """
+    settings = {**DEFAULT_PLAN_CONFIG, **config.get("plan", {})}
+
+    # sampled first, so the lists do not slow the samples down
+    read_latency = sample_latency(source, settings["samples"])
+    target_latency = sample_latency(target, settings["samples"])
+    if read_latency is None or target_latency is None:
+        client = source if read_latency is None else target
+        print(f"[!] Could not sample the latency of {client.url}, nothing is planned")
+        return None
+    write_latency = target_latency * settings["write_latency_factor"]
+
+    print(f"[*] Listing the catalog of {source.url}...")
+    start = time.perf_counter()
+    listing, complete = list_catalog(source, get_selector())
+    list_seconds = time.perf_counter() - start
+    if not complete:
+        print("[!] Not all lists could be read, the objects in the missing lists are not planned")
+
+    reads, writes = get_concurrency(config)
+    sync_settings = config.get("sync", {})
+    object_requests = get_object_requests(config)
+    phases = {phase: new_estimate() for phase in get_phases(config)}
+    workspaces = {}
+
+    def add_object(phase: str, workspace: Optional[str], gets: int, posts: int):
+        read_round_trips = min(gets, 1) if phase in PARALLEL_READS and get_workers() > 1 else gets
+        seconds = read_round_trips * read_latency / reads + posts * write_latency / writes
+        add_requests(phases[phase], 1, gets, posts, seconds)
+        # the stores of the password pre-flight are only counted once by the workspaces
+        add_requests(workspaces.setdefault(workspace, new_estimate()), 0 if phase == "password" else 1, gets, posts, seconds)
+
+    for kind in reversed(DELETE_ORDER):
+        for name, path in listing[kind].items():
+            workspace = name if kind == "workspace" else split_qualified_name(name)[0]
+            gets, posts = object_requests[kind]
+            if kind == "store" and "password" in phases and is_password_store(path):
+                add_object("password", workspace, *object_requests["password"])
+                gets = 0
+            add_object(kind, workspace, gets, posts)
+            if kind in ["layer", "layergroup"] and "tilelayer" in phases:
+                add_object("tilelayer", workspace, *object_requests["tilelayer"])
+
+    list_requests = 3 + len(listing["workspace"]) * (2 + len(STORE_TYPES) + len(LAYER_TYPES))
+    if "tilelayer" in phases:
+        # the tile layers of the source
+        list_requests += 1
+
+    result = {
+        "source": source.url,
+        "target": target.url,
+        "engine": sync_settings.get("engine", "threads"),
+        "concurrency": {"reads": reads, "writes": writes},
+        "latency": {"source": read_latency, "target": target_latency, "write": write_latency},
+        "lists": {"requests": list_requests, "seconds": list_seconds},
+        "phases": phases,
+        "workspaces": dict(sorted(workspaces.items(), key=lambda item: -item[1]["seconds"])),
+        "total": sum_estimates(workspaces.values()),
+        "seed": {**DEFAULT_GWC_CONFIG, **config.get("gwc", {})}["seed"],
+    }
+    result["total"]["seconds"] += list_seconds
+
+    if shards:
+        ring = ShardRing(shards)
+        by_shard = {index: [] for index in range(1, shards + 1)}
+        for workspace, estimate in workspaces.items():
+            if workspace is not None:
+                by_shard[ring.get_shard(workspace)].append(estimate)
+        # the global styles and layergroups are synced by the coordinator
+        result["shards"] = {index: sum_estimates(estimates) for index, estimates in by_shard.items()}
+
+    if settings["report"]:
+        with open(settings["report"], "w", encoding="utf-8") as f:
+            json.dump({**result, "workspaces": {str(workspace): estimate for workspace, estimate in result["workspaces"].items()}}, f, indent=2)
+        print(f"[*] Wrote plan to '{settings['report']}'")
+
+    return result
+
+
+def sample_latency(client: GeoServerClient, samples: int) -> Optional[float]:
+    """
+    Returns the median duration in seconds of a few GETs of the version of a GeoServer (None if they failed).
+    """
+    durations = []
+    for _ in range(max(1, samples)):
+        start = time.perf_counter()
+        if client.get_rest("about/version") is not None:
+            durations.append(time.perf_counter() - start)
+    return statistics.median(durations) if durations else None
+
+
+def get_concurrency(config: dict) -> tuple[int, int]:
+    """
+    Returns the number of concurrent GETs and writes of a sync: the workers (or the max. requests in flight
+    of the asyncio engine), at most the max. of the adaptive limits (if enabled).
+    """
+    if config.get("sync", {}).get("engine", "threads") == "asyncio":
+        concurrency = int(config.get("http", {}).get("max_in_flight", DEFAULT_ASYNC_HTTP_CONFIG["max_in_flight"]))
+    else:
+        concurrency = get_workers()
+
+    limits = {**DEFAULT_LIMITS_CONFIG, **config.get("limits", {})}
+    if not limits["enabled"]:
+        return concurrency, concurrency
+    return min(concurrency, limits["max_reads"]), min(concurrency, limits["max_writes"])
+
+
+def get_phases(config: dict) -> list[str]:
+    """
+    Returns the phases of a sync with the given config, see PLAN_ORDER.
+    """
+    phases = list(PLAN_ORDER)
+    if not {**DEFAULT_SECRETS_CONFIG, **config.get("secrets", {})}["interactive"]:
+        # stores without password fail instead of asking for it
+        phases.remove("password")
+    if not {**DEFAULT_GWC_CONFIG, **config.get("gwc", {})}["enabled"]:
+        phases.remove("tilelayer")
+    return phases
+
+
+def get_object_requests(config: dict) -> dict:
+    """
+    Returns the requests to sync one object of every phase, see OBJECT_REQUESTS.
+    """
+    object_requests = dict(OBJECT_REQUESTS)
+    if config.get("sync", {}).get("style_upload", "single") != "single":
+        object_requests["style"] = (2, 2)
+    return object_requests
+
+
+def is_password_store(path: Optional[str]) -> bool:
+    # the listed REST path of a store, e.g. workspaces/topp/datastores/roads
+    parts = (path or "").split("/")
+    return len(parts) > 2 and parts[2] in [store_type.lower() for store_type in PASSWORD_STORE_TYPES]
+
+
+def new_estimate() -> dict:
+    return {"objects": 0, "reads": 0, "writes": 0, "seconds": 0.0}
+
+
+def add_requests(estimate: dict, objects: int, reads: int, writes: int, seconds: float):
+    estimate["objects"] += objects
+    estimate["reads"] += reads
+    estimate["writes"] += writes
+    estimate["seconds"] += seconds
+
+
+def sum_estimates(estimates) -> dict:
+    total = new_estimate()
+    for estimate in estimates:
+        for key in total:
+            total[key] += estimate[key]
+    return total
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.1f} s"
+    minutes = int(seconds // 60)
+    if minutes < 60:
+        return f"{minutes} min {int(seconds % 60)} s"
+    return f"{minutes // 60} h {minutes % 60} min"
+
+
+def log_plan(result: dict, limit: int = 20):
+    concurrency = result["concurrency"]
+    latency = result["latency"]
+    print(f"[*] Plan for syncing {result['source']} to {result['target']} with the {result['engine']} engine "
+          f"({concurrency['reads']} concurrent GETs, {concurrency['writes']} concurrent writes):")
+    print(f"[*] Latency: source {latency['source'] * 1000:.0f} ms, target {latency['target'] * 1000:.0f} ms "
+          f"(writes estimated at {latency['write'] * 1000:.0f} ms)")
+    print(f"[*] lists: {result['lists']['requests']} requests in {format_duration(result['lists']['seconds'])}")
+    for phase, estimate in result["phases"].items():
+        print(f"[*] {PHASE_NAMES.get(phase, phase + 's')}: {estimate['objects']} objects, {estimate['reads']} GETs, "
+              f"{estimate['writes']} writes, ~{format_duration(estimate['seconds'])}")
+
+    total = result["total"]
+    print(f"[*] Total: {total['objects']} objects, {total['reads'] + result['lists']['requests']} requests to source, "
+          f"{total['writes']} to target, ~{format_duration(total['seconds'])}")
+    if result["seed"]:
+        print("[*] Not included: seeding the tile caches of the target, which runs on the target after the sync")
+
+    workspaces = list(result["workspaces"].items())
+    print(f"[*] Workspaces by estimated duration" + (f" (the {limit} longest of {len(workspaces)}):" if len(workspaces) > limit else ":"))
+    width = max([len(str(workspace or "(global)")) for workspace, _ in workspaces[:limit]] + [9])
+    print(f"    {'workspace':<{width}} {'objects':>8} {'GETs':>8} {'writes':>8}  duration")
+    for workspace, estimate in workspaces[:limit]:
+        print(f"    {workspace or '(global)':<{width}} {estimate['objects']:>8} {estimate['reads']:>8} {estimate['writes']:>8}  "
+              f"~{format_duration(estimate['seconds'])}")
+
+    for index, estimate in result.get("shards", {}).items():
+        print(f"[*] Shard {index}/{len(result['shards'])}: {estimate['objects']} objects, ~{format_duration(estimate['seconds'])}")
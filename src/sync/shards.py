@@ -0,0 +1,169 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Sharded sync: a coordinator splits the workspaces among several worker processes by consistent
+hashing (see util.shard). Every worker (python src/main.py --shard <index>/<count>) syncs the
+stores, styles, layers and layergroups of its workspaces, while the coordinator syncs the global
+styles before and the global layergroups after the workers and merges the results of all shards.
+Workers can run on other hosts, see the [shard] section of the config.
+"""
+
+import json
+import os
+import shlex
+import subprocess
+import sys
+from typing import Optional
+from util.http import GeoServerClient
+from util.pool import iter_listed, map_parallel
+from util.secrets import get_secrets
+from util.select import iter_selected
+from util.journal import get_list_key
+from util.shard import ShardRing
+from util.metrics import get_metrics
+from model.models import Result, FailedObject
+from sync.workspaces import get_namespace_name
+from sync.datastores import PASSWORD_STORE_TYPES, list_stores, prepare_passwords, get_store_name
+from sync.styles import sync as sync_styles
+from sync.layergroups import sync as sync_layergroups
+from sync.tiles import sync as sync_tile_layers, get_gwc_config
+
+# the last line a worker prints, with the counts of its results (see print_shard_report)
+SHARD_REPORT_PREFIX = "[*] Shard report: "
+
+# the kinds of the results, in the order of the phases
+SHARD_KINDS = ["workspace", "store", "style", "layer", "layergroup"]
+
+# runs a worker on this host, "{index}" and "{count}" are replaced by the shard
+DEFAULT_SHARD_COMMAND = shlex.join([sys.executable, os.path.abspath(sys.argv[0])])
+
+
+def sync(source: GeoServerClient, target: GeoServerClient, count: int, worker_args: list[str], command: Optional[str] = None):
+    """
+    Sync the catalog with one worker process per shard that has workspaces.
+    Returns the merged results for workspaces, stores, styles, layers and layergroups.
+    """
+    results = {kind: Result(kind=kind) for kind in SHARD_KINDS}
+
+    namespaces = source.get_rest_list("namespaces", "namespaces", "namespace")
+    if namespaces is None:
+        results["workspace"].extend(Result(failed_objects=[FailedObject(name=get_list_key("namespaces"), reason="Failed to fetch namespaces from source", error="fetch")]))
+        return tuple(results.values())
+
+    ring = ShardRing(count)
+    shards = {}
+    for ns in iter_selected("workspace", namespaces, get_namespace_name):
+        shards.setdefault(ring.get_shard(get_namespace_name(ns)), []).append(get_namespace_name(ns))
+    print(f"[*] Splitting {sum(map(len, shards.values()))} workspaces among {count} shards: "
+          + ", ".join(f"{index}/{count}: {len(shards.get(index, []))}" for index in range(1, count + 1)))
+
+    metrics = get_metrics()
+
+    # the workers can not ask for passwords, so the unknown ones are asked for here and passed on
+    if get_secrets().interactive:
+        with metrics.timer("phase", "passwords"):
+            workspaces = [workspace for names in shards.values() for workspace in names]
+            store_tasks = iter_listed(lambda args: list_stores(*args, source),
+                                      [(workspace, store_type) for workspace in workspaces for store_type in PASSWORD_STORE_TYPES], Result())
+            prepare_passwords(list(iter_selected("store", store_tasks, get_store_name)), source)
+    answers = get_secrets().get_answers()
+
+    # layers of all shards may use global styles
+    with metrics.timer("phase", "styles"):
+        results["style"].extend(sync_styles([], source, target))
+
+    with metrics.timer("phase", "shards"):
+        reports = map_parallel(lambda index: run_worker(index, count, worker_args, command, answers), sorted(shards), len(shards) or None)
+
+    for index, report in zip(sorted(shards), reports):
+        if isinstance(report, str):
+            results["workspace"].extend(Result(failed_objects=[FailedObject(name=f"shard {index}/{count}", reason=report)]))
+            continue
+        for kind in SHARD_KINDS:
+            results[kind].extend(get_report_result(kind, report.get(kind, {})))
+
+    # global layergroups may contain layers of all shards
+    with metrics.timer("phase", "layergroups"):
+        results["layergroup"].extend(sync_layergroups([], source, target))
+
+    # the workers copy the tile layers of the objects in their workspaces
+    if get_gwc_config()["enabled"]:
+        with metrics.timer("phase", "tiles"):
+            sync_tile_layers(source, target, True)
+
+    return tuple(results.values())
+
+
+def run_worker(index: int, count: int, worker_args: list[str], command: Optional[str] = None, answers: Optional[dict] = None):
+    """
+    Runs the worker of a shard and prints its output.
+    Returns the report of the worker, or an error message if it failed.
+    """
+    args = shlex.split((command or DEFAULT_SHARD_COMMAND).format(index=index, count=count))
+    args += [*worker_args, "--shard", f"{index}/{count}"]
+    print(f"[*] Starting worker of shard {index}/{count}")
+
+    process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, bufsize=1)
+
+    # workers can not ask for passwords, they read the answers given to the coordinator from their stdin
+    # (see read_answers()), which ssh passes on as well, and the passwords stay out of the environment
+    try:
+        process.stdin.write(json.dumps(answers or {}) + "\n")
+        process.stdin.close()
+    except OSError:
+        # the worker exited before, which its exit code tells
+        pass
+
+    report = None
+    for line in process.stdout:
+        if line.startswith(SHARD_REPORT_PREFIX):
+            report = json.loads(line[len(SHARD_REPORT_PREFIX):])
+        else:
+            print(f"[{index}/{count}] {line}", end="")
+    process.wait()
+
+    if process.returncode != 0 or report is None:
+        return f"Worker of shard {index}/{count} failed with exit code {process.returncode}"
+    return report
+
+
+def get_report_result(kind: str, counts: dict) -> Result:
+    return Result(kind=kind, success_count=counts.get("success", 0), failed_count=counts.get("failed", 0),
+                  unchanged_count=counts.get("unchanged", 0), skipped_count=counts.get("skipped", 0),
+                  errors=dict(counts.get("errors", {})))
+
+
+def print_shard_report(results: tuple):
+    """
+    Prints the counts of the results of a worker for the coordinator, as the last line of its output.
+    """
+    report = {}
+    for kind, result in zip(SHARD_KINDS, results):
+        report[kind] = {"success": result.success_count, "failed": result.failed_count,
+                        "unchanged": result.unchanged_count, "skipped": result.skipped_count, "errors": result.errors}
+    print(SHARD_REPORT_PREFIX + json.dumps(report), flush=True)
+
+
+def read_answers():
+    """
+    Reads the password answers the coordinator passes on to a worker (see run_worker()),
+    nothing if the worker was started from a terminal.
+    """
+    if sys.stdin is None or sys.stdin.isatty():
+        return
+    line = sys.stdin.readline()
+    if line.strip():
+        get_secrets().add_answers(json.loads(line))
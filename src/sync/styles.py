@@ -13,122 +13,204 @@
 #  limitations under the License.
 
 import os
-from util.http import get, get_rest, post_rest, put_rest
+from urllib.parse import quote
+from util.http import GeoServerClient, wrap_error
+from util.pool import iter_listed, run_parallel
+from util.config import get_config
+from util.journal import iter_pending, get_list_key
+from util.select import iter_selected
+from util.log import iter_found
+from util.state import get_sync_action, record, write_rest, UNCHANGED, UPDATE
+from util.steps import run_steps, Parallel
 from typing import Optional
 from model.models import Result, FailedObject
+from sync.layers import fq_name
 
-def sync(workspaces: str, source_url: str, source_auth: tuple, target_url: str, target_auth: tuple):
+# content types to post an SLD to the styles endpoint, by SLD version
+SLD_CONTENT_TYPES = {"1.0.0": "application/vnd.ogc.sld+xml", "1.1.0": "application/vnd.ogc.se+xml"}
+
+# default styles that always exist (and are not synced)
+DEFAULT_STYLES = ["point", "line", "polygon", "raster", "generic"]
+
+# URLs of the targets that rejected an SLD upload as unsupported, so all other styles take the two-step way right away
+sld_upload_unsupported = set()
+
+
+def sync(workspaces: str, source: GeoServerClient, target: GeoServerClient):
     """
     Fetch all styles (with and without workspace) from the source GeoServer and create them on the target GeoServer.
     """
 
-    success_styles = []
-    failed_styles = []
+    results = Result(kind="style")
 
-    # create styles without workspace
-    styles_no_ws_results = sync_ws_styles(None, source_url, source_auth, target_url, target_auth)
-    success_styles.extend(styles_no_ws_results.success_objects)
-    failed_styles.extend(styles_no_ws_results.failed_objects)
+    # the styles without workspace and of each workspace are created while they are listed
+    style_tasks = iter_listed(lambda workspace: list_styles(workspace, source), [None, *workspaces], results)
+    style_tasks = iter_selected("style", style_tasks, get_style_name)
+    style_tasks = iter_pending("style", style_tasks, get_style_name, results)
 
-    # create styles of each workspace
-    for workspace in workspaces:
-        styles_ws_results = sync_ws_styles(workspace, source_url, source_auth, target_url, target_auth)
-        success_styles.extend(styles_ws_results.success_objects)
-        failed_styles.extend(styles_ws_results.failed_objects)
+    run_parallel(lambda args: sync_style(*args, source, target), style_tasks, result=results)
 
-    return Result(success_objects=success_styles, failed_objects=failed_styles)
+    return results
 
 
-def sync_ws_styles(workspace: Optional[str], source_url: str, source_auth: tuple, target_url: str, target_auth: tuple):
-    success_styles = []
-    failed_styles = []
+def get_style_name(task: tuple):
+    workspace, style = task
+    return fq_name(workspace, style.get("name", "Unknown"))
 
-    if workspace is None:
-        workspace_prefix = ""
-    else:
-        workspace_prefix = "workspaces/" + workspace + "/"
 
-    styles_rest_path = workspace_prefix + "styles"
+def list_styles(workspace: Optional[str], source: GeoServerClient):
+    """
+    Fetch the list of styles of a workspace (or the global styles if workspace is None).
+    Returns a (lazy) iterator over (workspace, style) tuples and a Result holding a possible failure.
+    """
+    return run_steps(list_styles_steps(workspace, source))
 
-    result = get_rest(styles_rest_path, source_url, source_auth)
-    if not result:
-        failed = FailedObject(name="None", reason="Failed to fetch styles from source")
-        failed_styles.append(failed)
-        return Result(success_objects=success_styles, failed_objects=failed_styles)
 
-    styles_json = result.get("styles", {}) # type: ignore
+def list_styles_steps(workspace: Optional[str], source):
+    styles_rest_path = get_styles_rest_path(workspace)
 
-    if not styles_json:
-        # we do not append a failed object here, as it is not an error if there are no styles
-        return Result(success_objects=success_styles, failed_objects=failed_styles)
+    # it is not an error if there are no styles
+    styles = yield source.get_rest_list(styles_rest_path, "styles", "style")
+    if styles is None:
+        failed = FailedObject(name=get_list_key(styles_rest_path), reason="Failed to fetch styles from source", error="fetch")
+        return [], Result(failed_objects=[failed])
 
-    styles = styles_json.get("style", []) # type: ignore
-    print(f"[*] Found {len(styles)} styles for workspace '{workspace}' on source")
+    return iter_style_tasks(workspace, iter_found(styles, f"styles for workspace '{workspace}' on source")), Result()
 
+
+def iter_style_tasks(workspace: Optional[str], styles):
     for style in styles:
-        href = style["href"]
         name = style["name"]
 
         # skip default styles that always exist
-        if workspace is None and name in ["point", "line", "polygon", "raster", "generic"]:
+        if workspace is None and name in DEFAULT_STYLES:
             print(f"[!] Skipping default style '{name}'")
             continue
 
-        style_obj = get(href, source_auth)
+        yield workspace, style
 
-        style_name = style_obj.get("style", {}).get("name") # type: ignore
 
-        if workspace_prefix == "":
-            fq_style_name = style_name
-        else:
-            fq_style_name = f"{workspace}:{style_name}"
-
-
-        # we have 2 steps for styles
-        # 1. create the style entry that references the SLD
-        # 2. create the SLD itself
-        post_result = post_rest(styles_rest_path, target_url, target_auth, style_obj) # type: ignore
-
-        if post_result == True:
-            print(f"[+] Created style entry for '{fq_style_name}' on target (1/2)")
-
-            sld_url = os.path.splitext(href)[0] + ".sld"
-            sld_response = get(sld_url, source_auth, False)
-
-            if sld_response is None:
-                err_msg_tpl = f"[!] Could not fetch SLD from '{sld_url}' from source (2/2)"
-                failed_style = FailedObject(name=fq_style_name, reason=err_msg_tpl)
-                failed_styles.append(failed_style)
-                print(f"[!] {err_msg_tpl}")
-                continue
-
-            if sld_response.ok:
-                headers = {"Content-Type": "application/vnd.ogc.sld+xml"}
-                sld_put_path = styles_rest_path + "/" + style_name
-
-                put_result = put_rest(sld_put_path, target_url, target_auth, sld_response.text, headers, False) # type: ignore
-
-                if put_result == True:
-                    print(f"[+] Created SLD for '{fq_style_name}' on target (2/2)")
-                    success_styles.append(fq_style_name)
-                else:
-                    err_msg_tpl = f"[!] Could not create SLD for style '{fq_style_name}' on target (2/2)"
-                    failed_style = FailedObject(name=fq_style_name, reason=err_msg_tpl)
-                    failed_styles.append(failed_style)
-                    print(f"[!] {err_msg_tpl}")
-                    continue
-            else:
-                err_msg_tpl = f"[!] Could not fetch SLD for style '{fq_style_name}' from source (2/2)"
-                failed_style = FailedObject(name=fq_style_name, reason=err_msg_tpl)
-                failed_styles.append(failed_style)
-                print(f"[!] {err_msg_tpl}")
-                continue
+def get_styles_rest_path(workspace: Optional[str]):
+    if workspace is None:
+        return "styles"
+    return "workspaces/" + workspace + "/styles"
+
+
+def get_sld_url(href: str):
+    return os.path.splitext(href)[0] + ".sld"
+
+
+def check_sld_upload(upload_result: str, target: GeoServerClient) -> bool:
+    """
+    Disables SLD uploads to the target if it does not support them (HTTP 405 or 415).
+    Returns True if the upload failed as unsupported, so the style can be created in two steps.
+    """
+    if getattr(upload_result, "code", 0) in (405, 415):
+        sld_upload_unsupported.add(target.url)
+        return True
+    return False
+
+
+def get_sld_content_type(style_obj: dict, target: GeoServerClient) -> Optional[str]:
+    """
+    Returns the content type to create the style by posting its SLD (one request instead of two),
+    or None if the style entry holds more than the SLD does (e.g. a legend) or uploads are disabled.
+    """
+    if target.url in sld_upload_unsupported or get_config().get("sync", {}).get("style_upload", "single") != "single":
+        return None
+
+    style = style_obj.get("style", {})
+    if style.get("format", "sld") != "sld" or style.get("legend"):
+        return None
+    return SLD_CONTENT_TYPES.get(style.get("languageVersion", {}).get("version", "1.0.0"))
+
 
+def sync_style(workspace: Optional[str], style: dict, source: GeoServerClient, target: GeoServerClient):
+    return run_steps(sync_style_steps(workspace, style, source, target))
+
+
+def sync_style_steps(workspace: Optional[str], style: dict, source, target):
+    success_styles = []
+    failed_styles = []
+
+    styles_rest_path = get_styles_rest_path(workspace)
+    href = style["href"]
+
+    # the SLD is addressed by the href, so it is fetched together with the style entry
+    sld_url = get_sld_url(href)
+    style_obj, sld_response = yield Parallel(lambda: source.get(href), lambda: source.get(sld_url, False))
+
+    if style_obj is None:
+        err_msg_tpl = f"Failed to fetch style details from '{href}'"
+        failed_styles.append(FailedObject(name=fq_name(workspace, style.get("name", "Unknown")), reason=err_msg_tpl, error="fetch"))
+        print(f"[!] {err_msg_tpl}")
+        return Result(success_objects=success_styles, failed_objects=failed_styles)
+
+    style_name = style_obj.get("style", {}).get("name") # type: ignore
+
+    if workspace is None:
+        fq_style_name = style_name
+    else:
+        fq_style_name = f"{workspace}:{style_name}"
+
+    if sld_response is None:
+        err_msg_tpl = f"[!] Could not fetch SLD from '{sld_url}' from source"
+        failed_style = FailedObject(name=fq_style_name, reason=err_msg_tpl, error="fetch")
+        failed_styles.append(failed_style)
+        print(f"[!] {err_msg_tpl}")
+        return Result(success_objects=success_styles, failed_objects=failed_styles)
+
+    state_key = "style:" + fq_style_name
+    object_fingerprint, action = get_sync_action(state_key, style_obj, sld_response.text)
+
+    if action == UNCHANGED:
+        print(f"[=] Style '{fq_style_name}' is unchanged")
+        return Result(unchanged_objects=[fq_style_name])
+
+    style_path = styles_rest_path + "/" + style_name
+
+    if get_sld_content_type(style_obj, target) is not None:
+        upload_result = yield write_rest(target, action, styles_rest_path + "?name=" + quote(style_name), style_path,
+                                         sld_response.text, {"Content-Type": get_sld_content_type(style_obj, target)}, False)
+
+        if upload_result == True:
+            record(state_key, object_fingerprint)
+            print(f"[+] {'Updated' if action == UPDATE else 'Created'} style '{fq_style_name}' with its SLD on target")
+            return Result(success_objects=[fq_style_name])
+
+        if not check_sld_upload(upload_result, target):
+            err_msg_tpl = wrap_error(f"Failed to create style '{fq_style_name}' on target: {upload_result}", upload_result)
+            print(f"[!] {err_msg_tpl}")
+            return Result(failed_objects=[FailedObject(name=fq_style_name, reason=err_msg_tpl)])
+
+        print(f"[!] Could not upload the SLD of style '{fq_style_name}' in one request, retrying in two: {upload_result}")
+
+    # we have 2 steps for styles
+    # 1. create the style entry that references the SLD
+    # 2. create the SLD itself
+    post_result = yield write_rest(target, action, styles_rest_path, style_path, style_obj)
+
+    if post_result == True:
+        print(f"[+] {'Updated' if action == UPDATE else 'Created'} style entry for '{fq_style_name}' on target (1/2)")
+
+        headers = {"Content-Type": "application/vnd.ogc.sld+xml"}
+
+        put_result = yield target.put_rest(style_path, sld_response.text, headers, False) # type: ignore
+
+        if put_result == True:
+            record(state_key, object_fingerprint)
+            print(f"[+] {'Updated' if action == UPDATE else 'Created'} SLD for '{fq_style_name}' on target (2/2)")
+            success_styles.append(fq_style_name)
         else:
-            err_msg_tpl = f"Failed to create style '{fq_style_name}' on target: {post_result}"
+            err_msg_tpl = wrap_error(f"[!] Could not create SLD for style '{fq_style_name}' on target (2/2)", put_result)
             failed_style = FailedObject(name=fq_style_name, reason=err_msg_tpl)
             failed_styles.append(failed_style)
             print(f"[!] {err_msg_tpl}")
-            continue
+
+    else:
+        err_msg_tpl = wrap_error(f"Failed to create style '{fq_style_name}' on target: {post_result}", post_result)
+        failed_style = FailedObject(name=fq_style_name, reason=err_msg_tpl)
+        failed_styles.append(failed_style)
+        print(f"[!] {err_msg_tpl}")
 
     return Result(success_objects=success_styles, failed_objects=failed_styles)
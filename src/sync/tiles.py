@@ -0,0 +1,307 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+GeoWebCache ([gwc] section): the tile layers (gridsets, formats, metatiling, expiry, ...) of the layers and
+layergroups are copied to the target after the catalog, so the target does not serve its tiles with the default
+settings. Optionally, seed tasks are submitted on the target afterwards, so its tile caches are warm before the
+clients are switched over.
+"""
+
+import time
+from collections import deque
+from fnmatch import fnmatchcase
+from typing import Optional
+from urllib.parse import quote
+from model.models import Result, FailedObject
+from util.config import get_config
+from util.http import GeoServerClient, wrap_error
+from util.journal import iter_pending, get_list_key
+from util.log import format_errors
+from util.pool import run_parallel
+from util.select import get_selector
+from util.state import get_sync_action, record, UNCHANGED, UPDATE
+from util.steps import run_steps
+
+DEFAULT_GWC_CONFIG = {
+    # copy the tile layers of the synced layers and layergroups
+    "enabled": False,
+    # submit seed tasks on the target after the sync
+    "seed": False,
+    # globs of the tile layers to seed (default: all copied tile layers)
+    "seed_layers": [],
+    # gridsets to seed (default: all gridsets of a tile layer)
+    "gridsets": [],
+    "zoom_start": 0,
+    "zoom_stop": 10,
+    # image format of the seeded tiles, the first format of a tile layer if it does not have this one
+    "format": "image/png",
+    # max. number of seeding threads on the target at once, and the threads of each seed task
+    "threads": 4,
+    "task_threads": 2,
+    # seconds between two requests of the seeding progress
+    "poll_interval": 10,
+}
+
+# status of a thread of a seed task in /gwc/rest/seed (see get_seed_status())
+SEED_PENDING = 0
+SEED_RUNNING = 1
+
+# polls after which a submitted seed task that was never seen in the status is taken as done
+SEED_UNSEEN_POLLS = 3
+
+
+def get_gwc_config() -> dict:
+    return {**DEFAULT_GWC_CONFIG, **get_config().get("gwc", {})}
+
+
+def sync(source: GeoServerClient, target: GeoServerClient, global_only: bool = False):
+    """
+    Fetch the tile layers of all selected layers and layergroups from the source GeoServer and create them on the target GeoServer.
+    With global_only, only the tile layers of the global layergroups are synced (by the coordinator of a sharded sync).
+    """
+    names, results = get_tile_layer_tasks(list_tile_layers(source), global_only)
+    if names is None:
+        return results
+
+    run_parallel(lambda name: sync_tile_layer(name, source, target), names, result=results)
+
+    log_tile_layers(results)
+    return results
+
+
+def get_tile_layer_tasks(names: Optional[list], global_only: bool = False):
+    """
+    Returns the listed tile layers of the selected layers and layergroups that are not done by a previous run and the
+    Result of the phase, or None and the failure if the list could not be fetched (names is None).
+    """
+    if names is None:
+        failed = FailedObject(name=get_list_key("layers", "gwc/rest"), reason="Failed to fetch tile layers from source", error="fetch")
+        return None, Result(failed_objects=[failed])
+
+    results = Result(kind="tilelayer")
+    names = [name for name in names if selects_tile_layer(name) and not (global_only and ":" in name)]
+    print(f"[*] Found {len(names)} tile layers on source")
+    return iter_pending("tilelayer", names, lambda name: name, results), results
+
+
+def list_tile_layers(client: GeoServerClient) -> Optional[list]:
+    """
+    Returns the names of the tile layers of a GeoServer, None if the list could not be fetched.
+    """
+    return run_steps(list_tile_layers_steps(client))
+
+
+def list_tile_layers_steps(client):
+    return get_tile_layer_names((yield client.get(f"{client.url}/gwc/rest/layers.json")))
+
+
+def get_tile_layer_names(layers) -> Optional[list]:
+    # the list is a JSON array of names, older versions wrap it in an object
+    if isinstance(layers, dict):
+        layers = next(iter(layers.values()), [])
+        if isinstance(layers, dict):
+            layers = next(iter(layers.values()), [])
+    if not isinstance(layers, list):
+        return None
+    return [layer if isinstance(layer, str) else layer.get("name", "Unknown") for layer in layers]
+
+
+def selects_tile_layer(name: str) -> bool:
+    # a tile layer has the name of its layer or layergroup
+    selector = get_selector()
+    return selector.selects("layer", name) or selector.selects("layergroup", name)
+
+
+def get_tile_layer_url(client, name: str) -> str:
+    return f"{client.url}/gwc/rest/layers/{quote(name, safe=':')}.json"
+
+
+def sync_tile_layer(name: str, source: GeoServerClient, target: GeoServerClient):
+    return run_steps(sync_tile_layer_steps(name, source, target))
+
+
+def sync_tile_layer_steps(name: str, source, target):
+    tile_layer = yield source.get(get_tile_layer_url(source, name))
+
+    if tile_layer is None:
+        err_msg_tpl = f"Failed to fetch tile layer details from '{get_tile_layer_url(source, name)}'"
+        print(f"[!] {err_msg_tpl}")
+        return Result(failed_objects=[FailedObject(name=name, reason=err_msg_tpl, error="fetch")])
+
+    tile_layer = strip_tile_layer(tile_layer)
+
+    state_key = "tilelayer:" + name
+    object_fingerprint, action = get_sync_action(state_key, tile_layer)
+
+    if action == UNCHANGED:
+        print(f"[=] Tile layer '{name}' is unchanged")
+        return Result(unchanged_objects=[name])
+
+    # GeoServer usually creates a tile layer with the layer, which is replaced, otherwise it is created
+    write_result = yield target.write_gwc("POST", "layers/" + quote(name, safe=":"), tile_layer, "PUT")
+
+    if write_result != True:
+        err_msg_tpl = wrap_error(f"Failed to create tile layer '{name}' on target: {write_result}", write_result)
+        print(f"[!] {err_msg_tpl}")
+        return Result(failed_objects=[FailedObject(name=name, reason=err_msg_tpl)])
+
+    record(state_key, object_fingerprint)
+    print(f"[+] {'Updated' if action == UPDATE else 'Created'} tile layer '{name}' on target")
+    return Result(success_objects=[name])
+
+
+def strip_tile_layer(tile_layer: dict) -> dict:
+    """
+    Removes the id of the layer or layergroup from a tile layer, which differs on the target,
+    so the target finds the layer by the name of the tile layer.
+    """
+    return {key: {field: value for field, value in layer.items() if field != "id"} if isinstance(layer, dict) else layer
+            for key, layer in tile_layer.items()}
+
+
+def log_tile_layers(results: Result):
+    print(f"[*] Created {results.success_count} tile layers on target GeoServer.")
+    if results.unchanged_count:
+        print(f"[*] Skipped {results.unchanged_count} unchanged tile layers.")
+    if results.skipped_count:
+        print(f"[*] Skipped {results.skipped_count} tile layers done by previous runs.")
+    if results.failed_count:
+        print(f"[*] Failed to create {results.failed_count} tile layers ({format_errors(results)}).")
+
+
+def seed(target: GeoServerClient) -> bool:
+    """
+    Submits seed tasks for the selected tile layers of the target, at most as many at once as the thread budget
+    allows, and prints the progress until all tasks are done. Returns False if a task could not be submitted.
+    """
+    settings = get_gwc_config()
+    names = list_tile_layers(target)
+    if names is None:
+        print("[!] Could not seed the tile caches: failed to fetch the tile layers from target")
+        return False
+
+    patterns = settings["seed_layers"]
+    names = [name for name in names if selects_tile_layer(name) and (not patterns or any(fnmatchcase(name, pattern) for pattern in patterns))]
+
+    tasks = deque()
+    for name in names:
+        tile_layer = target.get(get_tile_layer_url(target, name))
+        if tile_layer is None:
+            print(f"[!] Could not seed tile layer '{name}': failed to fetch it from target")
+            continue
+        tasks.extend(get_seed_requests(name, tile_layer, settings))
+
+    total = len(tasks)
+    task_threads = max(1, min(settings["task_threads"], settings["threads"]))
+    print(f"[*] Seeding {len(names)} tile layers on {target.url} ({total} tasks, max. {settings['threads']} threads)...")
+
+    # tasks submitted but not seen in the status yet (by the poll they were submitted in), and the ids of the tasks
+    # seen so far, which are done once they left the status
+    unseen = deque()
+    seen, own = set(), set()
+    submitted = failed = poll = 0
+    while True:
+        poll += 1
+        status = get_seed_status(target)
+        if status is None:
+            print("[!] Could not fetch the seeding progress from target, no more tasks are submitted")
+            return False
+
+        running = [thread for thread in status if thread[4] in [SEED_PENDING, SEED_RUNNING]]
+        running_ids = {thread[3] for thread in running}
+        # every task that shows up is one submitted before (in order), the others were submitted by someone else
+        for task_id in sorted(running_ids - seen):
+            if unseen:
+                unseen.popleft()
+                own.add(task_id)
+        seen |= running_ids
+        # tasks that are still not seen after some polls were done before they could be seen
+        while unseen and unseen[0] <= poll - SEED_UNSEEN_POLLS:
+            unseen.popleft()
+
+        running_tasks = len(running_ids & own)
+        done, tiles = get_seed_progress(running)
+        print(f"[*] Seeding: {submitted - running_tasks - len(unseen)} of {total} tasks done, "
+              f"{running_tasks + len(unseen)} running ({done} of {tiles} tiles), {len(tasks)} waiting")
+
+        # the threads of the tasks that are not in the status yet are counted as well
+        threads = len(running) + len(unseen) * task_threads
+        while tasks and threads + task_threads <= settings["threads"]:
+            name, seed_request = tasks.popleft()
+            seed_result = target.write_gwc("POST", "seed/" + quote(name, safe=":"), {"seedRequest": {**seed_request, "threadCount": task_threads}})
+            if seed_result == True:
+                submitted += 1
+                unseen.append(poll)
+                threads += task_threads
+            else:
+                failed += 1
+                print(f"[!] Could not submit seed task for '{name}' ({seed_request['gridSetId']}): {seed_result}")
+
+        if not tasks and not running_tasks and not unseen:
+            break
+        time.sleep(settings["poll_interval"])
+
+    print(f"[*] Seeded {submitted} tasks on {target.url}" + (f", {failed} could not be submitted" if failed else ""))
+    return failed == 0
+
+
+def get_seed_requests(name: str, tile_layer: dict, settings: dict) -> list:
+    """
+    Returns a seed request (without threads) for each gridset of a tile layer that should be seeded.
+    """
+    layer = next(iter(tile_layer.values()), {})
+    formats = get_values(layer.get("mimeFormats"))
+    image_format = settings["format"] if not formats or settings["format"] in formats else formats[0]
+
+    requests = []
+    for subset in get_values(layer.get("gridSubsets")):
+        gridset = subset.get("gridSetName")
+        if gridset is None or (settings["gridsets"] and gridset not in settings["gridsets"]):
+            continue
+        zoom_start = max(settings["zoom_start"], subset.get("zoomStart", settings["zoom_start"]))
+        zoom_stop = min(settings["zoom_stop"], subset.get("zoomStop", settings["zoom_stop"]))
+        if zoom_start > zoom_stop:
+            continue
+        requests.append((name, {"name": name, "gridSetId": gridset, "zoomStart": zoom_start, "zoomStop": zoom_stop,
+                                "format": image_format, "type": "seed"}))
+    return requests
+
+
+def get_values(value) -> list:
+    # lists are either JSON arrays or objects with a single key holding the array (or a single value)
+    if isinstance(value, dict):
+        value = next(iter(value.values()), [])
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def get_seed_status(client: GeoServerClient) -> Optional[list]:
+    """
+    Returns the threads of all seed tasks of a GeoServer as [tiles done, tiles, seconds remaining, task id, status].
+    """
+    status = client.get(f"{client.url}/gwc/rest/seed.json")
+    if status is None:
+        return None
+    return [thread for thread in status.get("long-array-array", []) if len(thread) >= 5]
+
+
+def get_seed_progress(threads: list) -> tuple[int, int]:
+    # every thread of a task reports the tiles of the whole task
+    tasks = {}
+    for thread in threads:
+        done, tiles = tasks.get(thread[3], (0, 0))
+        tasks[thread[3]] = (max(done, thread[0]), max(tiles, thread[1]))
+    return sum(done for done, _ in tasks.values()), sum(tiles for _, tiles in tasks.values())
@@ -0,0 +1,224 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Verification (python src/main.py verify): compares the catalog of the target with the one of the source,
+e.g. after a sync, as a successful request does not prove that the target holds the same objects
+(defaults are filled in, bounding boxes recomputed, SLDs rewritten, ...). Both catalogs are listed
+concurrently, the objects on both sides are fetched concurrently by the workers, normalized (without
+hrefs, dates and encrypted passwords) and compared by their hash. Missing, extra and divergent objects
+(with the differing fields) are printed and written to a JSON lines report.
+"""
+
+import json
+import threading
+from typing import Iterator, Optional
+from xml.etree import ElementTree
+from util.http import GeoServerClient
+from util.pool import call_parallel, iter_parallel
+from util.select import get_selector
+from util.state import fingerprint
+from sync.watch import DELETE_ORDER, list_catalog
+
+DEFAULT_VERIFY_CONFIG = {
+    # JSON lines file with every object that differs, empty to disable
+    "report": "verify_report.jsonl",
+    # fields that are not compared (at any depth), in addition to VOLATILE_FIELDS
+    "ignore": [],
+    # max. number of differing fields reported per object
+    "max_diffs": 20,
+}
+
+# fields that differ between GeoServers even if the objects are the same
+VOLATILE_FIELDS = ["href", "dateCreated", "dateModified"]
+
+# connection parameters that are stored encrypted by every GeoServer with its own key, as entries of
+# the connection parameters of data stores or as fields of e.g. cascaded WMS and WMTS stores
+SECRET_PARAMETERS = ["passwd", "password"]
+
+# the kinds in the order they are verified
+VERIFY_ORDER = list(reversed(DELETE_ORDER))
+
+# the value of a field that only one of the objects has
+MISSING = "<missing>"
+
+
+class VerifyReport:
+    """
+    Writes the objects that differ to a JSON lines file and counts the objects by kind and status.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "w", encoding="utf-8") if path else None
+        # kind -> status (equal, missing, extra, divergent or failed) -> count
+        self.counts = {kind: {} for kind in VERIFY_ORDER}
+
+    def add(self, kind: str, name: str, status: str, diffs: Optional[list] = None, reason: Optional[str] = None):
+        with self.lock:
+            self.counts[kind][status] = self.counts[kind].get(status, 0) + 1
+            if status == "equal" or self.file is None:
+                return
+            entry = {"kind": kind, "name": name, "status": status}
+            if diffs:
+                entry["diffs"] = [{"field": field, "source": source, "target": target} for field, source, target in diffs]
+            if reason:
+                entry["reason"] = reason
+            self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    @property
+    def equal(self) -> bool:
+        return all(status == "equal" for counts in self.counts.values() for status in counts)
+
+
+def verify(source: GeoServerClient, target: GeoServerClient, config: dict) -> VerifyReport:
+    """
+    Compares all selected objects of the source and the target and returns the report.
+    """
+    settings = {**DEFAULT_VERIFY_CONFIG, **config.get("verify", {})}
+    ignore = set(VOLATILE_FIELDS) | set(settings["ignore"])
+    urls = [source.url, target.url]
+    report = VerifyReport(settings["report"])
+
+    selector = get_selector()
+    (source_listing, source_complete), (target_listing, target_complete) = call_parallel(
+        lambda: list_catalog(source, selector), lambda: list_catalog(target, selector))
+    if not (source_complete and target_complete):
+        print("[!] Not all lists could be read, objects in the missing lists are reported as missing or extra")
+
+    def compare(item: tuple) -> tuple:
+        kind, name, source_path, target_path = item
+        source_obj, target_obj = call_parallel(lambda: fetch_object(source, kind, name, source_path),
+                                               lambda: fetch_object(target, kind, name, target_path))
+        if source_obj is None or target_obj is None:
+            return kind, name, "failed", None, f"Could not fetch the {kind} from the {'source' if source_obj is None else 'target'}"
+        source_obj, target_obj = normalize(source_obj, ignore, urls), normalize(target_obj, ignore, urls)
+        if fingerprint(source_obj) == fingerprint(target_obj):
+            return kind, name, "equal", None, None
+        return kind, name, "divergent", list(iter_diffs(source_obj, target_obj, settings["max_diffs"])), None
+
+    try:
+        for kind in VERIFY_ORDER:
+            source_objects, target_objects = source_listing[kind], target_listing[kind]
+            print(f"[*] Verifying {len(source_objects)} {kind}s of the source against {len(target_objects)} on the target")
+
+            for name in sorted(set(source_objects) - set(target_objects)):
+                print(f"[!] {kind} '{name}' is missing on the target")
+                report.add(kind, name, "missing")
+            for name in sorted(set(target_objects) - set(source_objects)):
+                print(f"[!] {kind} '{name}' exists on the target only")
+                report.add(kind, name, "extra")
+
+            common = ((kind, name, path, target_objects[name]) for name, path in source_objects.items() if name in target_objects)
+            for kind, name, status, diffs, reason in iter_parallel(compare, common):
+                if status == "divergent":
+                    print(f"[!] {kind} '{name}' differs: " + ", ".join(field for field, _, _ in diffs))
+                elif status == "failed":
+                    print(f"[!] {kind} '{name}' could not be verified: {reason}")
+                report.add(kind, name, status, diffs, reason)
+    finally:
+        report.close()
+    return report
+
+
+def fetch_object(client: GeoServerClient, kind: str, name: str, path: Optional[str]) -> Optional[dict]:
+    """
+    Fetches everything the sync writes for an object: the namespace of a workspace, the resource and the settings
+    of a layer, the entry and the SLD of a style. Returns None if a part could not be fetched.
+    """
+    if path is None:
+        return None
+    if kind == "workspace":
+        return client.get_rest("namespaces/" + name)
+    if kind == "layer":
+        workspace, layer = name.split(":", 1)
+        resource, settings = client.get_rest(path), client.get_rest(f"workspaces/{workspace}/layers/{layer}")
+        return None if resource is None or settings is None else {"resource": resource, "settings": settings}
+    if kind == "style":
+        style, sld = client.get_rest(path), client.get(f"{client.url}/rest/{path}.sld", False)
+        return None if style is None or sld is None else {"style": style, "sld": canonicalize_sld(sld.text)}
+    return client.get_rest(path)
+
+
+def canonicalize_sld(sld: str) -> str:
+    """
+    Returns the canonical form of an SLD, without the formatting, so only its content is compared.
+    """
+    try:
+        return ElementTree.canonicalize(sld, strip_text=True)
+    except ElementTree.ParseError:
+        return sld.strip()
+
+
+def normalize(value, ignore: set, urls: list[str]):
+    """
+    Removes the ignored fields and encrypted passwords (at any depth), turns the key-value entries of e.g.
+    connection parameters and metadata into dicts and replaces the URLs of the GeoServers by a placeholder.
+    """
+    if isinstance(value, dict):
+        entries = value.get("entry")
+        if len(value) == 1 and entries is not None:
+            entries = entries if isinstance(entries, list) else [entries]
+            if all(isinstance(entry, dict) and "@key" in entry for entry in entries):
+                value = {entry["@key"]: entry.get("$") for entry in entries}
+        return {key: normalize(item, ignore, urls) for key, item in value.items()
+                if key not in ignore and key not in SECRET_PARAMETERS}
+    if isinstance(value, list):
+        return [normalize(item, ignore, urls) for item in value]
+    if isinstance(value, str):
+        for url in urls:
+            value = value.replace(url, "{geoserver}")
+    return value
+
+
+def iter_diffs(source_value, target_value, limit: int, field: str = "") -> Iterator[tuple]:
+    """
+    Yields the differing fields of two normalized objects as (field, source value, target value), at most limit.
+    """
+    count = 0
+    for diff in walk_diffs(source_value, target_value, field):
+        if count >= limit:
+            yield "...", None, None
+            return
+        count += 1
+        yield diff
+
+
+def walk_diffs(source_value, target_value, field: str) -> Iterator[tuple]:
+    if isinstance(source_value, dict) and isinstance(target_value, dict):
+        for key in sorted(set(source_value) | set(target_value)):
+            yield from walk_diffs(source_value.get(key, MISSING), target_value.get(key, MISSING), f"{field}.{key}" if field else key)
+    elif isinstance(source_value, list) and isinstance(target_value, list) and len(source_value) == len(target_value):
+        for index, (source_item, target_item) in enumerate(zip(source_value, target_value)):
+            yield from walk_diffs(source_item, target_item, f"{field}[{index}]")
+    elif source_value != target_value:
+        yield field, source_value, target_value
+
+
+def log_report(report: VerifyReport, target_url: str):
+    print(f"[*] Verification of {target_url} completed:")
+    for kind, counts in report.counts.items():
+        if counts:
+            print(f"[*] {kind}s: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    if report.equal:
+        print("[*] The target holds the same objects as the source.")
+    else:
+        print("[!] The target differs from the source" + (f", see '{report.path}'" if report.path else "") + ".")
@@ -0,0 +1,242 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Watch mode (python src/main.py watch): keeps the target in sync with a source that is still being edited,
+by polling the source until interrupted. A poll only reads the list endpoints of the source and compares
+the names with the previous poll: new objects (and the ones that failed before) are synced by the usual
+sync modules, restricted to them by a selector (see util.select), objects that disappeared are deleted on
+the target (if enabled). Changes within existing objects are found by a full incremental sync every
+full_sync_every polls, which compares the fingerprints of all objects (see util.state).
+"""
+
+import glob
+import time
+from typing import Callable, Optional
+from util.http import GeoServerClient, extract_rest_sub_path_from_href
+from util.metrics import get_metrics, LAG_BUCKETS
+from util.pool import iter_parallel
+from util.results import get_results_writer, iter_records
+from util.select import Selector, get_selector, set_selector
+from util.state import get_state
+from sync.datastores import STORE_TYPES
+from sync.layers import LAYER_TYPES, fq_name
+from sync.styles import DEFAULT_STYLES, get_styles_rest_path
+from sync.layergroups import get_layergroups_rest_path
+
+DEFAULT_WATCH_CONFIG = {
+    # seconds between the starts of two polls
+    "interval": 300,
+    # every n-th poll syncs all objects (incremental), to find changes within existing objects, 0: only the first poll
+    "full_sync_every": 12,
+    # delete the objects on the target that were deleted on the source
+    "deletes": False,
+}
+
+# the kinds of objects, in the order they are deleted on the target
+DELETE_ORDER = ["layergroup", "layer", "style", "store", "workspace"]
+
+
+def watch(config: dict, source: GeoServerClient, target: GeoServerClient, run_sync: Callable[[], Optional[tuple]],
+          after_poll: Optional[Callable[[], None]] = None):
+    """
+    Polls the source and syncs its changes to the target until interrupted.
+    run_sync syncs the objects selected by the current selector and returns the results (see main.sync_catalog),
+    after_poll is called after every poll, e.g. to save the state.
+    """
+    settings = {**DEFAULT_WATCH_CONFIG, **config.get("watch", {})}
+    interval = float(settings["interval"])
+    full_sync_every = int(settings["full_sync_every"])
+    user_selector = get_selector()
+    metrics = get_metrics()
+
+    known = None
+    failed = {}
+    last_poll = last_full_poll = None
+    poll = 0
+
+    print(f"[*] Watching {source.url} every {interval:g} s (Ctrl+C to stop)")
+    try:
+        while True:
+            poll += 1
+            start = time.time()
+
+            with metrics.timer("watch", "list"):
+                listing, complete = list_catalog(source, user_selector)
+            if not complete:
+                print("[!] Not all lists could be read from the source, no objects are deleted in this poll")
+
+            results = None
+            if known is None or (full_sync_every > 0 and (poll - 1) % full_sync_every == 0):
+                print(f"[*] Poll {poll}: syncing all objects")
+                results = run_sync()
+                since, last_full_poll = last_full_poll, start
+            else:
+                changes = get_changes(listing, known, failed)
+                if changes:
+                    print(f"[*] Poll {poll}: syncing {sum(map(len, changes.values()))} new or failed objects")
+                    set_selector(get_change_selector(changes, user_selector))
+                    try:
+                        results = run_sync()
+                    finally:
+                        set_selector(user_selector)
+                since = last_poll
+
+            deleted = not_deleted = {}
+            if settings["deletes"] and known is not None and complete:
+                deleted = {kind: {name: path for name, path in known[kind].items() if name not in listing[kind]}
+                           for kind in DELETE_ORDER}
+                not_deleted = delete_objects(deleted, target)
+
+            failed = get_failed(listing) if results is not None else {}
+            # objects that could not be deleted are deleted in the next poll
+            known = {kind: {**(known[kind] if known is not None and not complete else {}), **listing[kind],
+                            **not_deleted.get(kind, {})} for kind in DELETE_ORDER}
+
+            synced = sum(result.success_count for result in results) if results is not None else 0
+            deleted_count = sum(map(len, deleted.values())) - sum(map(len, not_deleted.values()))
+            lag = ""
+            if (synced or deleted_count) and since is not None:
+                # the changes were made after the source was read the last time without them
+                metrics.add_time("watch", "lag", time.time() - since, LAG_BUCKETS)
+                lag = f", replication lag up to {time.time() - since:.1f} s"
+            metrics.add_time("watch", "poll", time.time() - start)
+            print(f"[*] Poll {poll} done in {time.time() - start:.1f} s: {synced} objects synced, "
+                  f"{deleted_count} deleted, {sum(map(len, failed.values()))} failed{lag}")
+
+            if after_poll is not None:
+                after_poll()
+            last_poll = start
+            time.sleep(max(0.0, start + interval - time.time()))
+    except KeyboardInterrupt:
+        print(f"[*] Stopped watching after {poll} polls")
+
+
+def list_catalog(client: GeoServerClient, selector: Selector) -> tuple[dict, bool]:
+    """
+    Lists the selected objects of a GeoServer from the list endpoints only, by kind as {name: REST path}.
+    The lists of the workspaces are read concurrently. Returns the listing and whether all lists could be read.
+    """
+    listing = {kind: {} for kind in DELETE_ORDER}
+    complete = add_listed(listing, "workspace", None, client.get_rest_list("namespaces", "namespaces", "namespace"),
+                          lambda ns: "workspaces/" + ns.get("name", "Unknown"), selector)
+
+    for workspace_listing, workspace_complete in iter_parallel(lambda workspace: list_workspace(client, selector, workspace),
+                                                               [None, *listing["workspace"]]):
+        for kind, objects in workspace_listing.items():
+            listing[kind].update(objects)
+        complete = complete and workspace_complete
+
+    return listing, complete
+
+
+def list_workspace(client: GeoServerClient, selector: Selector, workspace: Optional[str]) -> tuple[dict, bool]:
+    """
+    Lists the selected stores, layers, styles and layergroups of a workspace (the global ones if workspace is None).
+    """
+    listing = {kind: {} for kind in DELETE_ORDER}
+    complete = True
+
+    def get_href_path(entry: dict) -> Optional[str]:
+        return extract_rest_sub_path_from_href(entry.get("href"), client.url)
+
+    lists = [("style", get_styles_rest_path(workspace), "styles", "style"),
+             ("layergroup", get_layergroups_rest_path(workspace), "layerGroups", "layerGroup")]
+    if workspace is not None:
+        lists += [("store", f"workspaces/{workspace}/{store_type.lower()}", store_type, store_type[:-1]) for store_type in STORE_TYPES]
+        lists += [("layer", f"workspaces/{workspace}/{layer_type.lower()}", layer_type, layer_type[:-1]) for layer_type in LAYER_TYPES]
+
+    for kind, path, *keys in lists:
+        complete = add_listed(listing, kind, workspace, client.get_rest_list(path, *keys), get_href_path, selector) and complete
+    return listing, complete
+
+
+def add_listed(listing: dict, kind: str, workspace: Optional[str], entries, get_path: Callable[[dict], Optional[str]],
+               selector: Selector) -> bool:
+    """
+    Adds the selected entries of a list to the listing, returns False if the list could not be read.
+    """
+    if entries is None:
+        return False
+    for entry in entries:
+        name = fq_name(workspace, entry.get("name", "Unknown"))
+        if selector.selects(kind, name) and not (kind == "style" and workspace is None and name in DEFAULT_STYLES):
+            listing[kind][name] = get_path(entry)
+    return True
+
+
+def get_changes(listing: dict, known: dict, failed: dict) -> dict:
+    """
+    Returns the names of the new objects and of the objects that failed in the last poll, by kind.
+    """
+    changes = {}
+    for kind in DELETE_ORDER:
+        names = {name for name in listing[kind] if name not in known[kind]} | failed.get(kind, set())
+        if names:
+            changes[kind] = sorted(names)
+    return changes
+
+
+def get_change_selector(changes: dict, user_selector: Selector) -> Selector:
+    """
+    Returns a selector for the changed objects only, which includes the workspaces they are in (so their lists are read).
+    The exclude rules of the user still apply, e.g. to dependencies.
+    """
+    workspaces = set(changes.get("workspace", []))
+    workspaces.update(name.split(":", 1)[0] for kind, names in changes.items() if kind != "workspace"
+                      for name in names if ":" in name)
+    include = {kind: [glob.escape(name) for name in names] for kind, names in changes.items()}
+    include["workspace"] = [glob.escape(workspace) for workspace in sorted(workspaces)]
+
+    change_selector = Selector(include)
+    change_selector.exclude = user_selector.exclude
+    return change_selector
+
+
+def get_failed(listing: dict) -> dict:
+    """
+    Returns the names of the listed objects that failed in the last sync (from the results file), by kind.
+    """
+    failed = {}
+    writer = get_results_writer()
+    if not writer.path:
+        return failed
+    for record in iter_records(writer.path):
+        if record["status"] == "failed" and record["name"] in listing.get(record["kind"], {}):
+            failed.setdefault(record["kind"], set()).add(record["name"])
+    return failed
+
+
+def delete_objects(deleted: dict, target: GeoServerClient) -> dict:
+    """
+    Deletes the objects (by kind as {name: REST path}) on the target, the contained objects first.
+    Returns the objects that could not be deleted.
+    """
+    not_deleted = {}
+    state = get_state()
+    for kind in DELETE_ORDER:
+        for name, path in sorted(deleted.get(kind, {}).items()):
+            if path is None:
+                continue
+            # objects that still use the deleted one are updated (or deleted with it), styles lose their SLD file
+            params = {"recurse": "true", "purge": "true"} if kind == "style" else {"recurse": "true"}
+            delete_result = target.delete_rest(path, params)
+            if delete_result == True:
+                print(f"[-] Deleted {kind} '{name}' on target")
+                if state is not None:
+                    state.discard(("namespace" if kind == "workspace" else kind) + ":" + name)
+            else:
+                print(f"[!] Failed to delete {kind} '{name}' on target: {delete_result}")
+                not_deleted.setdefault(kind, {})[name] = path
+    return not_deleted
@@ -12,49 +12,82 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from util.http import get, get_rest, post_rest
+from util.http import GeoServerClient, wrap_error
+from util.pool import run_parallel
+from util.journal import iter_pending, get_list_key
+from util.select import iter_selected
+from util.log import iter_found
+from util.state import get_sync_action, record, write_rest, UNCHANGED, UPDATE
+from util.steps import run_steps
 from model.models import Result, FailedObject
 
-def sync(source_url: str, source_auth: tuple, target_url: str, target_auth: tuple):
+def sync(source: GeoServerClient, target: GeoServerClient):
     """
     Fetch all namespaces from the source GeoServer and create them on the target GeoServer.
     This will also create the corresponding workspaces if they do not exist.
     """
-    result = get_rest("namespaces", source_url, source_auth)
-    if not result:
-        failed_ns = FailedObject(name="None", reason="Failed to fetch namespaces from source")
-        return Result(success_objects=[], failed_objects=[failed_ns])
+    namespaces, results = get_namespace_tasks(source.get_rest_list("namespaces", "namespaces", "namespace"))
+    return run_parallel(lambda ns: sync_namespace(ns, source, target), namespaces, result=results)
 
-    namespaces = result.get("namespaces", {}).get("namespace", []) # type: ignore
-    print(f"[*] Found {len(namespaces)} namespaces on source")
 
+def get_namespace_tasks(namespaces):
+    """
+    Returns the listed namespaces (None if the list could not be fetched) that are selected and not done by a previous run,
+    and the Result of the phase.
+    """
+    if namespaces is None:
+        failed_ns = FailedObject(name=get_list_key("namespaces"), reason="Failed to fetch namespaces from source", error="fetch")
+        return [], Result(success_objects=[], failed_objects=[failed_ns])
+
+    # the names are kept, as the later phases run per workspace
+    results = Result(kind="workspace", keep_names=True)
+    namespaces = iter_selected("workspace", iter_found(namespaces, "namespaces on source"), get_namespace_name)
+    return iter_pending("workspace", namespaces, get_namespace_name, results), results
+
+
+def get_namespace_name(ns: dict):
+    return ns.get("name", "Unknown")
+
+
+def sync_namespace(ns: dict, source: GeoServerClient, target: GeoServerClient):
+    return run_steps(sync_namespace_steps(ns, source, target))
+
+
+def sync_namespace_steps(ns: dict, source, target):
     success_workspaces = []
     failed_workspaces = []
     err_msg_tpl = "Failed to fetch namespace details from '{href}'"
 
-    for ns in namespaces:
-        href = ns["href"]
+    href = ns["href"]
+
+    namespace_obj = yield source.get(href)
+
+    if namespace_obj is None:
+        failed_ns = FailedObject(name=ns.get("name", "Unknown"), reason=err_msg_tpl.format(href=href), error="fetch")
+        failed_workspaces.append(failed_ns)
+        print(f"[!] {err_msg_tpl.format(href=href)}")
+        return Result(success_objects=success_workspaces, failed_objects=failed_workspaces)
 
-        namespace_obj = get(href, source_auth)
+    ws_name = namespace_obj.get("namespace", {}).get("prefix") # type: ignore
 
-        if namespace_obj is None:
-            failed_ns = FailedObject(name=ns.get("name", "Unknown"), reason=err_msg_tpl.format(href=href))
-            failed_workspaces.append(failed_ns)
-            print(f"[!] {err_msg_tpl.format(href=href)}")
-            continue
+    state_key = "namespace:" + ws_name
+    object_fingerprint, action = get_sync_action(state_key, namespace_obj)
 
-        ws_name = namespace_obj.get("namespace", {}).get("prefix") # type: ignore
+    if action == UNCHANGED:
+        print(f"[=] Namespace '{ws_name}' is unchanged")
+        return Result(unchanged_objects=[ws_name])
 
-        post_result = post_rest("namespaces", target_url, target_auth, namespace_obj) # type: ignore
+    post_result = yield write_rest(target, action, "namespaces", "namespaces/" + ws_name, namespace_obj)
 
-        if post_result == True:
-            success_workspaces.append(ws_name)
-            print(f"[+] Created namespace '{ws_name}' on target")
+    if post_result == True:
+        record(state_key, object_fingerprint)
+        success_workspaces.append(ws_name)
+        print(f"[+] {'Updated' if action == UPDATE else 'Created'} namespace '{ws_name}' on target")
 
-        else:
-            err_msg_tpl = f"Failed to create namespace '{ws_name}' on target: {post_result}"
-            failed_ns = FailedObject(name=ws_name, reason=err_msg_tpl)
-            failed_workspaces.append(failed_ns)
-            print(f"[!] {err_msg_tpl}")
+    else:
+        err_msg_tpl = wrap_error(f"Failed to create namespace '{ws_name}' on target: {post_result}", post_result)
+        failed_ns = FailedObject(name=ws_name, reason=err_msg_tpl)
+        failed_workspaces.append(failed_ns)
+        print(f"[!] {err_msg_tpl}")
 
     return Result(success_objects=success_workspaces, failed_objects=failed_workspaces)
@@ -0,0 +1,315 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+import random
+import time
+from typing import Optional
+from urllib.parse import urlparse
+from util.http import DEFAULT_HTTP_CONFIG, RETRY_STATUS_CODES, RequestError, extract_rest_sub_path_from_href
+from util.jsonstream import iter_json_list
+from util.metrics import get_metrics
+from util.limiter import get_limiter, is_overloaded
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_ASYNC_HTTP_CONFIG = {
+    "max_in_flight": 200,
+    "http2": False,
+}
+
+
+class AsyncGeoServerClient:
+    """
+    Asyncio based counterpart of util.http.GeoServerClient.
+
+    All methods have the same signatures and return values as the blocking
+    client, but must be awaited. The number of requests in flight is limited
+    per host by a semaphore, the connection pool is sized accordingly.
+    Optionally HTTP/2 is used, which multiplexes all requests to a host over
+    a few connections.
+    """
+
+    def __init__(self, url: str, auth: tuple, max_in_flight: int = 200, http2: bool = False, connect_timeout: float = 10,
+                 read_timeout: float = 120, retries: int = 3, backoff_factor: float = 0.5, backoff_jitter: float = 0.5,
+                 name: str = ""):
+        if httpx is None:
+            raise RuntimeError("The asyncio engine requires the 'httpx' package (pip install 'httpx[http2]').")
+
+        self.url = url.rstrip("/")
+        # name of the client in the metrics (e.g. 'source')
+        self.name = name or self.url
+        self.auth = auth
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self.semaphores = {}
+        # optional util.cache.ResponseCache for GET requests
+        self.cache = None
+        # url -> (lock, number of requests holding or waiting for it), see get_cached_response()
+        self.url_locks = {}
+        # optional "read" and "write" util.limiter.AsyncAdaptiveLimiter, see util.limiter.create_limiters()
+        self.limiters = None
+        # optional util.fanout.AsyncSharedResponses, if the responses are shared by several targets
+        self.shared_responses = None
+
+        self.client = httpx.AsyncClient(
+            auth=auth,
+            http2=http2,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def get_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self.semaphores:
+            self.semaphores[host] = asyncio.Semaphore(self.max_in_flight)
+        return self.semaphores[host]
+
+    async def request(self, method: str, url: str, **kwargs):
+        """
+        Sends a request and returns the response. Idempotent requests (GET, PUT) are retried
+        with jittered exponential backoff on connection errors and transient HTTP errors.
+        Raises httpx.HTTPError if the request finally failed on the transport level.
+        The request (incl. all retries) is recorded in the metrics.
+        """
+        retries = self.retries if method in ["GET", "HEAD", "PUT"] else 0
+        limiter = get_limiter(self.limiters, method)
+        start = time.perf_counter()
+
+        attempt = 0
+        while True:
+            try:
+                response = await self.send(limiter, method, url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                    get_metrics().record_request(self.name, method, url, response.status_code, len(response.content),
+                                                 time.perf_counter() - start, attempt)
+                    return response
+            except httpx.HTTPError:
+                if attempt >= retries:
+                    get_metrics().record_request(self.name, method, url, 0, 0, time.perf_counter() - start, attempt)
+                    raise
+
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt) + random.uniform(0, self.backoff_jitter))
+            attempt += 1
+
+    async def send(self, limiter, method: str, url: str, **kwargs):
+        """
+        Sends a single attempt of a request, within the adaptive limit of concurrent requests (if any).
+        """
+        if limiter is None:
+            async with self.get_semaphore(url):
+                return await self.client.request(method, url, **kwargs)
+
+        await limiter.acquire()
+        attempt_start = time.perf_counter()
+        try:
+            async with self.get_semaphore(url):
+                response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            await limiter.release(time.perf_counter() - attempt_start, True)
+            raise
+        await limiter.release(time.perf_counter() - attempt_start, is_overloaded(response.status_code))
+        return response
+
+    async def get_response(self, url: str):
+        """
+        Sends a GET request, using the response cache if the client has one.
+        In a fan-out sync, the response is fetched only once for all targets.
+        """
+        if self.shared_responses is not None:
+            return await self.shared_responses.get(url, lambda: self.get_cached_response(url))
+        return await self.get_cached_response(url)
+
+    async def get_cached_response(self, url: str):
+        if self.cache is None:
+            return await self.request("GET", url)
+
+        # concurrent identical GETs are only sent once, the lock is kept as long as a request waits for it
+        url_lock, count = self.url_locks.get(url, (None, 0))
+        if url_lock is None:
+            url_lock = asyncio.Lock()
+        self.url_locks[url] = (url_lock, count + 1)
+        try:
+            async with url_lock:
+                # the cache reads and writes SQLite, so it is not called on the event loop
+                cached = await asyncio.to_thread(self.cache.get_fresh, url)
+                if cached is not None:
+                    return cached
+
+                validators = await asyncio.to_thread(self.cache.get_validators, url)
+                response = await self.request("GET", url, headers=validators)
+
+                if response.status_code == 304:
+                    cached = await asyncio.to_thread(self.cache.revalidated, url)
+                    if cached is not None:
+                        return cached
+                    response = await self.request("GET", url)
+
+                if response.status_code == 200:
+                    await asyncio.to_thread(self.cache.put, url, response.headers, response.content)
+
+                return response
+        finally:
+            url_lock, count = self.url_locks[url]
+            if count == 1:
+                del self.url_locks[url]
+            else:
+                self.url_locks[url] = (url_lock, count - 1)
+
+    async def get(self, url: str, return_json_result: bool = True):
+        try:
+            response = await self.get_response(url)
+        except httpx.HTTPError as e:
+            print(f"[!] Error while fetching {url}: {e}")
+            return None
+
+        if response.status_code < 300:
+            if return_json_result:
+                return response.json()
+            return response
+        else:
+            print(f"[!] Error while fetching {url}")
+            print(f"[!] HTTP Status {response.status_code}: {response.text}")
+            return None
+
+    async def get_rest(self, path: str, format: str = "json"):
+        url = f"{self.url}/rest/{path}.{format}"
+        return await self.get(url)
+
+    async def get_rest_list(self, path: str, *keys: str):
+        """
+        Same as GeoServerClient.get_rest_list(), but the response is read as a whole.
+        """
+        response = await self.get(f"{self.url}/rest/{path}.json", False)
+        return None if response is None else iter_json_list([response.text], *keys)
+
+    async def get_rest_by_href(self, href: str, format: str = "json"):
+
+        sub_path = extract_rest_sub_path_from_href(href, self.url)
+
+        if not sub_path:
+            return None
+
+        source_obj = await self.get_rest(sub_path, format)
+
+        if not source_obj:
+            return None
+
+        return source_obj
+
+    async def post_rest(self, path: str, data: dict, headers: dict = {"Content-Type": "application/json"}, post_json: bool = True, update_path: Optional[str] = None):
+        """
+        Creates an object. If update_path is given and the object already exists,
+        it is updated by a PUT request to update_path instead.
+        """
+        url = f"{self.url}/rest/{path}"
+
+        try:
+            if post_json:
+                response = await self.request("POST", url, json=data, headers=headers)
+            else:
+                response = await self.request("POST", url, content=data, headers=headers)
+        except httpx.HTTPError as e:
+            return RequestError(f"[!] Error while posting to '{url}': {e}", "transport")
+
+        msg = None
+
+        if response.status_code == 201:
+            return True
+        elif response.status_code == 409 and update_path is not None:
+            return await self.put_rest(update_path, data, headers, post_json)
+        elif response.status_code == 401:
+            msg = RequestError(f"[!] Unauthorized – check credentials for {self.url}.", "unauthorized", 401)
+        elif response.status_code == 409:
+            msg = RequestError(f"[!] Target resource in '{path}' already exists.", "conflict", 409)
+        else:
+            msg = RequestError(f"[!] Error while posting to '{url}' - HTTP Status Code {response.status_code}: {response.text}", "http", response.status_code)
+
+        return msg
+
+    async def put_rest(self, path: str, data: dict, headers: dict = {"Content-Type": "application/json"}, put_json: bool = True):
+        url = f"{self.url}/rest/{path}"
+
+        try:
+            if put_json:
+                response = await self.request("PUT", url, json=data, headers=headers)
+            else:
+                response = await self.request("PUT", url, content=data, headers=headers)
+        except httpx.HTTPError as e:
+            return RequestError(f"[!] Error while putting to '{url}': {e}", "transport")
+
+        msg = None
+
+        if response.is_success:
+            return True
+        elif response.status_code == 401:
+            msg = RequestError(f"[!] Unauthorized – check credentials for {self.url}.", "unauthorized", 401)
+            return msg
+        elif response.status_code == 409:
+            msg = RequestError(f"[!] Target resource in '{path}' already exists.", "conflict", 409)
+        else:
+            msg = RequestError(f"[!] Error while putting to '{url}' - HTTP Status Code {response.status_code}: {response.text}", "http", response.status_code)
+
+        return msg
+
+
+    async def write_gwc(self, method: str, path: str, data: dict, create_method: Optional[str] = None):
+        """
+        Same as GeoServerClient.write_gwc().
+        """
+        url = f"{self.url}/gwc/rest/{path}.json"
+
+        try:
+            response = await self.request(method, url, json=data)
+            if response.status_code == 404 and create_method is not None:
+                method = create_method
+                response = await self.request(method, url, json=data)
+        except httpx.HTTPError as e:
+            return RequestError(f"[!] Error while {'posting' if method == 'POST' else 'putting'} to '{url}': {e}", "transport")
+
+        if response.is_success:
+            return True
+        elif response.status_code == 401:
+            return RequestError(f"[!] Unauthorized – check credentials for {self.url}.", "unauthorized", 401)
+        return RequestError(f"[!] Error while {'posting' if method == 'POST' else 'putting'} to '{url}' - HTTP Status Code {response.status_code}: {response.text}", "http", response.status_code)
+
+
+def create_async_client(endpoint_config: dict, http_config: dict, name: str = "") -> AsyncGeoServerClient:
+    """
+    Creates an AsyncGeoServerClient for a [source] or [target] config section.
+    Connection settings are taken from the [http] section, where missing
+    values fall back to the defaults.
+    """
+    settings = {**DEFAULT_HTTP_CONFIG, **DEFAULT_ASYNC_HTTP_CONFIG, **(http_config or {})}
+
+    return AsyncGeoServerClient(
+        endpoint_config["url"],
+        (endpoint_config["user"], endpoint_config["password"]),
+        max_in_flight=settings["max_in_flight"],
+        http2=settings["http2"],
+        connect_timeout=settings["connect_timeout"],
+        read_timeout=settings["read_timeout"],
+        retries=settings["retries"],
+        backoff_factor=settings["backoff_factor"],
+        backoff_jitter=settings["backoff_jitter"],
+        name=name,
+    )
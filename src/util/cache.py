@@ -0,0 +1,236 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+DEFAULT_CACHE_CONFIG = {
+    "enabled": False,
+    "path": "source_cache.sqlite",
+    "ttl": 3600,
+    "max_age": 7 * 24 * 3600,
+    "max_size_mb": 512,
+    "memo_size": 10000,
+}
+
+
+class CachedResponse:
+    """
+    A cached GET response, offering the parts of requests.Response that are used by the sync modules.
+    """
+
+    def __init__(self, content: bytes, content_type: Optional[str] = None):
+        self.status_code = 200
+        self.ok = True
+        self.content = content
+        self.headers = {"Content-Type": content_type} if content_type else {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """
+    Cache for GET responses of the source GeoServer.
+
+    Responses are kept in an in-process LRU memo (so identical GETs within one run are
+    only sent once) and in a SQLite database that survives the run. Entries younger than
+    ttl seconds are used without any request. Older entries are revalidated with
+    If-None-Match/If-Modified-Since if the server sent an ETag or Last-Modified header,
+    otherwise they are fetched again. Entries older than max_age are removed, and the
+    oldest entries are removed if the database grows beyond max_size_mb.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600, max_age: float = 7 * 24 * 3600, max_size_mb: float = 512, memo_size: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.memo_size = memo_size
+
+        self.lock = threading.Lock()
+        self.memo = OrderedDict()
+        self.url_locks = {}
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                content BLOB NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)")
+        self.db.commit()
+
+        self.evict()
+        self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+    @contextmanager
+    def url_lock(self, url: str):
+        """
+        Serializes requests for the same URL, so concurrent identical GETs are only sent once.
+        """
+        with self.lock:
+            url_lock, count = self.url_locks.get(url, (threading.Lock(), 0))
+            self.url_locks[url] = (url_lock, count + 1)
+        try:
+            with url_lock:
+                yield
+        finally:
+            with self.lock:
+                url_lock, count = self.url_locks[url]
+                if count == 1:
+                    del self.url_locks[url]
+                else:
+                    self.url_locks[url] = (url_lock, count - 1)
+
+    def expire(self):
+        """
+        Makes all responses stale, so the next GETs revalidate (or fetch) them again, e.g. every poll of the watch mode,
+        as the source is edited while the tool runs. Identical GETs after this are only sent once, as before.
+        """
+        with self.lock:
+            self.memo.clear()
+            self.ttl = 0
+
+    def get_fresh(self, url: str) -> Optional[CachedResponse]:
+        """
+        Returns the cached response if it was fetched in this run or is younger than ttl.
+        """
+        with self.lock:
+            if url in self.memo:
+                self.memo.move_to_end(url)
+                self.hits += 1
+                return self.memo[url]
+
+            row = self.db.execute("SELECT content, content_type, fetched_at FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None or time.time() - row[2] > self.ttl:
+                return None
+
+            self.hits += 1
+            return self._memoize(url, CachedResponse(row[0], row[1]))
+
+    def get_validators(self, url: str) -> dict:
+        """
+        Returns the headers for a conditional request for a stale entry (empty if there is none).
+        """
+        with self.lock:
+            row = self.db.execute("SELECT etag, last_modified FROM responses WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row is not None:
+            if row[0]:
+                headers["If-None-Match"] = row[0]
+            if row[1]:
+                headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def revalidated(self, url: str) -> Optional[CachedResponse]:
+        """
+        Marks a stale entry as fresh after the server answered 304 Not Modified and returns it.
+        """
+        with self.lock:
+            row = self.db.execute("SELECT content, content_type FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.revalidations += 1
+            return self._memoize(url, CachedResponse(row[0], row[1]))
+
+    def put(self, url: str, headers, content: bytes):
+        """
+        Stores a successful response.
+        """
+        with self.lock:
+            self.misses += 1
+            old_size = self.db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (url, content, content_type, etag, last_modified, fetched_at, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, content, headers.get("Content-Type"), headers.get("ETag"), headers.get("Last-Modified"), time.time(), len(content)))
+            self.size += len(content) - (old_size[0] if old_size else 0)
+            self._memoize(url, CachedResponse(content, headers.get("Content-Type")))
+
+            if self.misses % 500 == 0:
+                self.db.commit()
+            if self.size > self.max_size:
+                self._evict_oldest()
+
+    def evict(self):
+        """
+        Removes expired entries and the oldest entries if the cache is too large.
+        """
+        with self.lock:
+            self.db.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - self.max_age,))
+            self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if self.size > self.max_size:
+                self._evict_oldest()
+            self.db.commit()
+
+    def _evict_oldest(self):
+        # remove the oldest entries until the cache is at 90% of its max size
+        target_size = self.max_size * 0.9
+        rows = self.db.execute("SELECT url, size FROM responses ORDER BY fetched_at").fetchall()
+        evicted = []
+        for url, size in rows:
+            if self.size <= target_size:
+                break
+            evicted.append((url,))
+            self.size -= size
+        self.db.executemany("DELETE FROM responses WHERE url = ?", evicted)
+        self.db.commit()
+
+    def _memoize(self, url: str, response: CachedResponse) -> CachedResponse:
+        self.memo[url] = response
+        self.memo.move_to_end(url)
+        while len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+        return response
+
+
+def create_cache(cache_config: dict) -> Optional[ResponseCache]:
+    """
+    Creates the source response cache from the [cache] section, None if it is not enabled.
+    """
+    settings = {**DEFAULT_CACHE_CONFIG, **(cache_config or {})}
+    if not settings["enabled"]:
+        return None
+
+    return ResponseCache(
+        settings["path"],
+        ttl=settings["ttl"],
+        max_age=settings["max_age"],
+        max_size_mb=settings["max_size_mb"],
+        memo_size=settings["memo_size"],
+    )
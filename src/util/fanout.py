@@ -0,0 +1,261 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from contextvars import ContextVar
+from typing import Callable
+from util.results import DEFAULT_RESULTS_CONFIG
+from util.journal import DEFAULT_JOURNAL_CONFIG
+
+# max. number of source responses kept for the targets that did not read them yet
+DEFAULT_FANOUT_BUFFER = 1000
+
+# files written for every target, which get the name of the target in their name
+TARGET_PATHS = [
+    ("sync", "state_file", "sync_state.json"),
+    ("results", "file", DEFAULT_RESULTS_CONFIG["file"]),
+    ("journal", "file", DEFAULT_JOURNAL_CONFIG["file"]),
+]
+
+# name of the target synced in the current context (thread or task), None with a single target
+current_target = ContextVar("current_target", default=None)
+
+
+class SharedEntry:
+    """
+    A response of the source in the buffer of SharedResponses and the targets that read it.
+    """
+
+    def __init__(self, future):
+        self.future = future
+        self.readers = set()
+
+
+class SharedResponses:
+    """
+    GET responses of the source, shared by the targets of a fan-out sync: every response is fetched once,
+    by the first target asking for it, and kept until all other targets read it as well.
+    As the targets sync the same objects in about the same order, the buffer holds the responses
+    between the slowest and the fastest target. A target that is ahead while the buffer is full waits
+    before fetching more, except the slowest one, which evicts the oldest responses instead,
+    so a target that is far behind reads them from the source again.
+    """
+
+    def __init__(self, targets: list[str], buffer: int = DEFAULT_FANOUT_BUFFER):
+        self.buffer = max(buffer, 1)
+        self.active = set(targets)
+        # responses read by every target, to find the slowest one
+        self.reads = {name: 0 for name in targets}
+        self.entries = {}
+        self.fetched = 0
+        self.shared = 0
+        self.evicted = 0
+        self.waits = 0
+
+    def take(self, name: str, url: str):
+        """
+        Returns the entry of the url and whether the target has to fetch it, (None, True) to fetch it
+        without sharing and (None, False) if the target has to wait for the buffer.
+        """
+        entry = self.entries.get(url)
+        if entry is not None and name in entry.readers:
+            # asked again by the same target, e.g. for a dependency of another object
+            return None, True
+
+        if entry is None:
+            if len(self.entries) >= self.buffer and not self.is_slowest(name):
+                return None, False
+            self.evict()
+            entry = self.entries[url] = SharedEntry(self.create_future())
+            self.fetched += 1
+            fetch = True
+        else:
+            self.shared += 1
+            fetch = False
+
+        entry.readers.add(name)
+        self.reads[name] += 1
+        self.drop(url, entry)
+        return entry, fetch
+
+    def is_slowest(self, name: str) -> bool:
+        return self.reads[name] <= min(self.reads[active] for active in self.active)
+
+    def evict(self):
+        while len(self.entries) >= self.buffer:
+            url = next((url for url, entry in self.entries.items() if entry.future.done()), None)
+            if url is None:
+                break
+            del self.entries[url]
+            self.evicted += 1
+
+    def drop(self, url: str, entry: SharedEntry):
+        """
+        Removes a response once all targets read it, and a failed fetch, which the other targets repeat on their own.
+        """
+        if entry.future.done() and self.entries.get(url) is entry:
+            if entry.future.exception() is not None or self.active <= entry.readers:
+                del self.entries[url]
+
+    def remove(self, name: str):
+        self.active.discard(name)
+        for url, entry in list(self.entries.items()):
+            self.drop(url, entry)
+
+    def create_future(self):
+        return Future()
+
+    def log(self):
+        print(f"[*] Shared source responses: {self.fetched} fetched, {self.shared} reused by other targets, "
+              f"{self.evicted} evicted, targets waited {self.waits} times for slower ones")
+
+
+class ThreadSharedResponses(SharedResponses):
+    """
+    SharedResponses for the worker threads of the threads and dag engines.
+    """
+
+    def __init__(self, targets: list[str], buffer: int = DEFAULT_FANOUT_BUFFER):
+        super().__init__(targets, buffer)
+        self.condition = threading.Condition()
+
+    def get(self, url: str, fetch: Callable):
+        """
+        Returns the response of fetch() for the url, fetched by this or another target.
+        """
+        name = current_target.get()
+        if name not in self.active:
+            return fetch()
+
+        with self.condition:
+            entry, owner = self.take(name, url)
+            if entry is None and not owner:
+                self.waits += 1
+                while entry is None and not owner:
+                    self.condition.wait()
+                    entry, owner = self.take(name, url)
+            # the buffer or the slowest target changed
+            self.condition.notify_all()
+
+        if entry is None:
+            return fetch()
+        if owner:
+            try:
+                entry.future.set_result(fetch())
+            except BaseException as e:
+                entry.future.set_exception(e)
+            with self.condition:
+                self.drop(url, entry)
+                self.condition.notify_all()
+        return entry.future.result()
+
+    def remove(self, name: str):
+        """
+        Stops sharing with a target that finished, so it does not hold back the others.
+        """
+        with self.condition:
+            super().remove(name)
+            self.condition.notify_all()
+
+
+class AsyncSharedResponses(SharedResponses):
+    """
+    Same as ThreadSharedResponses for the tasks of an event loop.
+    """
+
+    def __init__(self, targets: list[str], buffer: int = DEFAULT_FANOUT_BUFFER):
+        super().__init__(targets, buffer)
+        self.condition = asyncio.Condition()
+
+    def create_future(self):
+        return asyncio.get_running_loop().create_future()
+
+    async def get(self, url: str, fetch: Callable):
+        name = current_target.get()
+        if name not in self.active:
+            return await fetch()
+
+        async with self.condition:
+            entry, owner = self.take(name, url)
+            if entry is None and not owner:
+                self.waits += 1
+                while entry is None and not owner:
+                    await self.condition.wait()
+                    entry, owner = self.take(name, url)
+            self.condition.notify_all()
+
+        if entry is None:
+            return await fetch()
+        if owner:
+            try:
+                entry.future.set_result(await fetch())
+            except BaseException as e:
+                entry.future.set_exception(e)
+            async with self.condition:
+                self.drop(url, entry)
+                self.condition.notify_all()
+        return await entry.future
+
+    async def remove(self, name: str):
+        async with self.condition:
+            super().remove(name)
+            self.condition.notify_all()
+
+
+def get_targets(config: dict) -> list[dict]:
+    """
+    Returns the target GeoServers, the [[targets]] of the config (each with a unique name) or its [target].
+    """
+    targets = config.get("targets")
+    if not targets:
+        targets = [{"name": "target", **config.get("target", {})}]
+    elif "target" in config:
+        raise ValueError("Configure either [target] or [[targets]], not both")
+
+    names = set()
+    for index, target in enumerate(targets, start=1):
+        target.setdefault("name", f"target{index}")
+        if None in [target.get(key) for key in ["url", "user", "password"]]:
+            raise ValueError(f"One or more required config values of target '{target['name']}' are missing.")
+        if target["name"] in names or not target["name"].replace("-", "").replace("_", "").isalnum():
+            raise ValueError(f"Invalid or duplicate target name '{target['name']}' (letters, digits, - and _ only)")
+        names.add(target["name"])
+    return targets
+
+
+def get_target_path(path: str, name: str) -> str:
+    if not path:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{name}{ext}"
+
+
+def get_target_config(config: dict, target: dict) -> dict:
+    """
+    Returns the config to sync a target of a fan-out sync: the target as [target] and
+    the state, results and journal files with the name of the target in their name.
+    """
+    target_config = {key: value for key, value in config.items() if key != "targets"}
+    target_config["target"] = target
+    for section, key, default in TARGET_PATHS:
+        settings = target_config[section] = dict(config.get(section, {}))
+        settings[key] = get_target_path(settings.get(key, default), target["name"])
+    return target_config
+
+
+def get_fanout_buffer(config: dict) -> int:
+    return int(config.get("sync", {}).get("fanout_buffer", DEFAULT_FANOUT_BUFFER))
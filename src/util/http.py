@@ -12,98 +12,388 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import codecs
 import re
+import time
+from typing import Optional
+from urllib.parse import quote
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from util.jsonstream import iter_json_list
+from util.metrics import get_metrics
+from util.limiter import get_limiter, is_overloaded
 
-def get(url: str, auth: tuple, return_json_result: bool = True):
-    response = requests.get(url, auth=auth)
-    if response.ok:
-        if return_json_result:
-            return response.json()
+# status codes that are worth retrying for idempotent requests
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+DEFAULT_HTTP_CONFIG = {
+    "pool_size": 10,
+    "connect_timeout": 10,
+    "read_timeout": 120,
+    "retries": 3,
+    "backoff_factor": 0.5,
+    "backoff_jitter": 0.5,
+}
+
+
+class RequestError(str):
+    """
+    The message of a failed write, returned by the clients instead of True. It is a string like the other error
+    messages, but also holds the class of the error (transport, unauthorized, conflict or http, see FailedObject)
+    and the HTTP status code (0 if there was no response), so they do not have to be parsed from the message.
+    """
+
+    def __new__(cls, message: str, error: str = "http", code: int = 0):
+        request_error = super().__new__(cls, message)
+        request_error.error = error
+        request_error.code = code
+        return request_error
+
+
+def wrap_error(message: str, result) -> str:
+    """
+    Returns a message about a failed write, with the error class and status code of its result (if it has them).
+    """
+    if isinstance(result, RequestError):
+        return RequestError(message, result.error, result.code)
+    return message
+
+
+class GeoServerClient:
+    """
+    HTTP client for the REST API of a single GeoServer endpoint.
+
+    Keeps a pooled keep-alive session, so that connections (and TLS handshakes)
+    are reused across requests. Idempotent requests (GET, PUT) are retried with
+    jittered exponential backoff on connection errors and transient HTTP errors.
+    POST requests are never retried, as they are not idempotent.
+    """
+
+    def __init__(self, url: str, auth: tuple, pool_size: int = 10, connect_timeout: float = 10,
+                 read_timeout: float = 120, retries: int = 3, backoff_factor: float = 0.5, backoff_jitter: float = 0.5,
+                 name: str = ""):
+        self.url = url.rstrip("/")
+        # name of the client in the metrics (e.g. 'source')
+        self.name = name or self.url
+        self.auth = auth
+        self.timeout = (connect_timeout, read_timeout)
+        # optional util.cache.ResponseCache for GET requests
+        self.cache = None
+        # optional util.snapshot.SnapshotWriter that receives all successful GET responses
+        self.snapshot = None
+        # optional "read" and "write" util.limiter.AdaptiveLimiter, see create_limiters()
+        self.limiters = None
+        # optional util.fanout.ThreadSharedResponses, if the responses are shared by several targets
+        self.shared_responses = None
+
+        retry = Retry(
+            total=retries,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=["GET", "HEAD", "PUT"],
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def request(self, method: str, url: str, **kwargs):
+        """
+        Sends a request (retried, see above) and records it in the metrics.
+        Waits while the adaptive limit of concurrent requests (if any) is reached.
+        Raises requests.RequestException if the request finally failed on the transport level.
+        """
+        limiter = get_limiter(self.limiters, method)
+        if limiter is not None:
+            limiter.acquire()
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            get_metrics().record_request(self.name, method, url, 0, 0, time.perf_counter() - start)
+            if limiter is not None:
+                limiter.release(time.perf_counter() - start, True)
+            raise
+
+        # streamed responses are recorded with their announced size
+        size = int(response.headers.get("Content-Length") or 0) if kwargs.get("stream") else len(response.content)
+        retries = getattr(response.raw, "retries", None)
+        retry_count = len(retries.history) if retries is not None else 0
+        get_metrics().record_request(self.name, method, url, response.status_code, size, time.perf_counter() - start, retry_count)
+        if limiter is not None:
+            limiter.release(time.perf_counter() - start, is_overloaded(response.status_code, retry_count))
         return response
-    else:
-        print(f"[!] Error while fetching {url}")
-        print(f"[!] HTTP Status {response.status_code}: {response.text}")
-        return None
 
+    def get(self, url: str, return_json_result: bool = True):
+        try:
+            response = self.get_response(url)
+        except requests.RequestException as e:
+            print(f"[!] Error while fetching {url}: {e}")
+            return None
 
-def get_rest(path: str, base_url: str, auth: tuple, format: str = "json"):
-    url = f"{base_url}/rest/{path}.{format}"
-    return get(url, auth)
+        if response.ok:
+            if self.snapshot is not None:
+                self.snapshot.write(url, response)
+            if return_json_result:
+                return response.json()
+            return response
+        else:
+            print(f"[!] Error while fetching {url}")
+            print(f"[!] HTTP Status {response.status_code}: {response.text}")
+            return None
 
+    def get_response(self, url: str):
+        """
+        Sends a GET request, using the response cache if the client has one.
+        In a fan-out sync, the response is fetched only once for all targets.
+        """
+        if self.shared_responses is not None:
+            return self.shared_responses.get(url, lambda: self.get_cached_response(url))
+        return self.get_cached_response(url)
 
-def extract_rest_sub_path_from_href(href: str, source_url: str):
-    if href is None or href == "":
-        print("[!] No href provided to fetch the resource.")
-        return None
+    def get_cached_response(self, url: str):
+        if self.cache is None:
+            return self.request("GET", url)
 
-    # we would extract a subpath like "namespaces/test" from a href
-    # "http://localhost:8081/geoserver/rest/namespaces/test.json"
-    match = re.search(re.escape(source_url) + r'/rest/([^?]+?)(?:\.\w+)?$', href)
+        with self.cache.url_lock(url):
+            cached = self.cache.get_fresh(url)
+            if cached is not None:
+                return cached
 
-    if match:
-        sub_path = match.group(1)
-        return sub_path
-    else:
-        print(f"[!] Could not extract subpath from href: {href}")
-        return None
+            response = self.request("GET", url, headers=self.cache.get_validators(url))
 
+            if response.status_code == 304:
+                cached = self.cache.revalidated(url)
+                if cached is not None:
+                    return cached
+                response = self.request("GET", url)
 
-def get_rest_by_href(href: str, source_url: str, auth: tuple, format: str = "json"):
+            if response.status_code == 200:
+                self.cache.put(url, response.headers, response.content)
 
-    sub_path = extract_rest_sub_path_from_href(href, source_url)
+            return response
 
-    if not sub_path:
-        return None
+    def get_rest(self, path: str, format: str = "json"):
+        url = f"{self.url}/rest/{path}.{format}"
+        return self.get(url)
 
-    source_obj = get_rest(sub_path, source_url, auth, format)
+    def get_rest_list(self, path: str, *keys: str):
+        """
+        Fetches a list endpoint (e.g. 'workspaces/<ws>/featuretypes') and returns an iterator over the
+        entries found under keys (see util.jsonstream.iter_json_list), or None if the request failed.
+        The response is parsed while it is read, so huge lists are never held in memory as a whole.
+        """
+        url = f"{self.url}/rest/{path}.json"
 
-    if not source_obj:
-        return None
+        if self.cache is not None or self.snapshot is not None or self.shared_responses is not None:
+            # cached, recorded and shared responses are read as a whole
+            response = self.get(url, False)
+            return None if response is None else iter_json_list([response.text], *keys)
 
-    return source_obj
+        try:
+            response = self.request("GET", url, stream=True)
+        except requests.RequestException as e:
+            print(f"[!] Error while fetching {url}: {e}")
+            return None
 
+        if not response.ok:
+            print(f"[!] Error while fetching {url}")
+            print(f"[!] HTTP Status {response.status_code}: {response.text}")
+            response.close()
+            return None
 
-def post_rest(path: str, base_url: str, auth: tuple, data: dict, headers: dict = {"Content-Type": "application/json"}, post_json: bool = True):
-    url = f"{base_url}/rest/{path}"
+        return iter_response_list(response, keys)
 
-    if post_json:
-        response = requests.post(url, json=data, auth=auth, headers=headers)
-    else:
-        response = requests.post(url, data=data, auth=auth, headers=headers)
+    def get_rest_by_href(self, href: str, format: str = "json"):
 
-    msg = None
+        sub_path = extract_rest_sub_path_from_href(href, self.url)
 
-    if response.status_code == 201:
-        return True
-    elif response.status_code == 401:
-        msg = f"[!] Unauthorized – check credentials for {base_url}."
-    elif response.status_code == 409:
-        msg = f"[!] Target resource in '{path}' already exists."
-    else:
-        msg = f"[!] Error while posting to '{url}' - HTTP Status Code {response.status_code}: {response.text}"
+        if not sub_path:
+            return None
 
-    return msg
+        source_obj = self.get_rest(sub_path, format)
 
+        if not source_obj:
+            return None
 
-def put_rest(path: str, base_url: str, auth: tuple, data: dict, headers: dict = {"Content-Type": "application/json"}, put_json: bool = True):
-    url = f"{base_url}/rest/{path}"
+        return source_obj
 
-    if put_json:
-        response = requests.put(url, json=data, auth=auth, headers=headers)
-    else:
-        response = requests.put(url, data=data, auth=auth, headers=headers)
+    def post_rest(self, path: str, data: dict, headers: dict = {"Content-Type": "application/json"}, post_json: bool = True, update_path: Optional[str] = None):
+        """
+        Creates an object. If update_path is given and the object already exists,
+        it is updated by a PUT request to update_path instead.
+        """
+        url = f"{self.url}/rest/{path}"
+
+        try:
+            if post_json:
+                response = self.request("POST", url, json=data, headers=headers)
+            else:
+                response = self.request("POST", url, data=data, headers=headers)
+        except requests.RequestException as e:
+            return RequestError(f"[!] Error while posting to '{url}': {e}", "transport")
 
-    msg = None
+        msg = None
+
+        if response.status_code == 201:
+            return True
+        elif response.status_code == 409 and update_path is not None:
+            return self.put_rest(update_path, data, headers, post_json)
+        elif response.status_code == 401:
+            msg = RequestError(f"[!] Unauthorized – check credentials for {self.url}.", "unauthorized", 401)
+        elif response.status_code == 409:
+            msg = RequestError(f"[!] Target resource in '{path}' already exists.", "conflict", 409)
+        else:
+            msg = RequestError(f"[!] Error while posting to '{url}' - HTTP Status Code {response.status_code}: {response.text}", "http", response.status_code)
 
-    if response.ok:
-        return True
-    elif response.status_code == 401:
-        msg = f"[!] Unauthorized – check credentials for {base_url}."
         return msg
-    elif response.status_code == 409:
-        msg = f"[!] Target resource in '{path}' already exists."
-    else:
-        msg = f"[!] Error while putting to '{url}' - HTTP Status Code {response.status_code}: {response.text}"
 
-    return msg
+    def put_rest(self, path: str, data: dict, headers: dict = {"Content-Type": "application/json"}, put_json: bool = True):
+        url = f"{self.url}/rest/{path}"
+
+        try:
+            if put_json:
+                response = self.request("PUT", url, json=data, headers=headers)
+            else:
+                response = self.request("PUT", url, data=data, headers=headers)
+        except requests.RequestException as e:
+            return RequestError(f"[!] Error while putting to '{url}': {e}", "transport")
+
+        msg = None
+
+        if response.ok:
+            return True
+        elif response.status_code == 401:
+            msg = RequestError(f"[!] Unauthorized – check credentials for {self.url}.", "unauthorized", 401)
+            return msg
+        elif response.status_code == 409:
+            msg = RequestError(f"[!] Target resource in '{path}' already exists.", "conflict", 409)
+        else:
+            msg = RequestError(f"[!] Error while putting to '{url}' - HTTP Status Code {response.status_code}: {response.text}", "http", response.status_code)
+
+        return msg
+
+    def write_gwc(self, method: str, path: str, data: dict, create_method: Optional[str] = None):
+        """
+        Sends a JSON object to the GeoWebCache REST API (e.g. 'layers/topp:roads'). If create_method is given and
+        the object does not exist yet (404), it is created by a request with that method instead.
+        """
+        url = f"{self.url}/gwc/rest/{path}.json"
+
+        try:
+            response = self.request(method, url, json=data)
+            if response.status_code == 404 and create_method is not None:
+                method = create_method
+                response = self.request(method, url, json=data)
+        except requests.RequestException as e:
+            return RequestError(f"[!] Error while {'posting' if method == 'POST' else 'putting'} to '{url}': {e}", "transport")
+
+        if response.ok:
+            return True
+        elif response.status_code == 401:
+            return RequestError(f"[!] Unauthorized – check credentials for {self.url}.", "unauthorized", 401)
+        return RequestError(f"[!] Error while {'posting' if method == 'POST' else 'putting'} to '{url}' - HTTP Status Code {response.status_code}: {response.text}", "http", response.status_code)
+
+    def put_resource(self, path: str, file):
+        """
+        Uploads a file to a path in the data directory (e.g. 'data/roads/roads.shp') via the resource endpoint.
+        The file is streamed from the open file object, so it is never held in memory as a whole.
+        """
+        url = f"{self.url}/rest/resource/{quote(path)}"
+
+        try:
+            response = self.request("PUT", url, data=file, headers={"Content-Type": "application/octet-stream"})
+        except requests.RequestException as e:
+            return RequestError(f"[!] Error while putting to '{url}': {e}", "transport")
+
+        if response.ok:
+            return True
+        elif response.status_code == 401:
+            return RequestError(f"[!] Unauthorized – check credentials for {self.url}.", "unauthorized", 401)
+        return RequestError(f"[!] Error while putting to '{url}' - HTTP Status Code {response.status_code}: {response.text}", "http", response.status_code)
+
+    def get_resource_size(self, path: str) -> Optional[int]:
+        """
+        Returns the size of a file in the data directory, -1 if the size is unknown, None if the file does not exist.
+        """
+        url = f"{self.url}/rest/resource/{quote(path)}"
+
+        try:
+            response = self.request("HEAD", url)
+        except requests.RequestException:
+            return None
+
+        if not response.ok:
+            return None
+        return int(response.headers.get("Content-Length") or -1)
+
+    def delete_rest(self, path: str, params: Optional[dict] = None):
+        """
+        Deletes an object, an object that does not exist (anymore) counts as deleted.
+        """
+        url = f"{self.url}/rest/{path}"
+
+        try:
+            response = self.request("DELETE", url, params=params)
+        except requests.RequestException as e:
+            return RequestError(f"[!] Error while deleting '{url}': {e}", "transport")
+
+        if response.ok or response.status_code == 404:
+            return True
+        elif response.status_code == 401:
+            return RequestError(f"[!] Unauthorized – check credentials for {self.url}.", "unauthorized", 401)
+        return RequestError(f"[!] Error while deleting '{url}' - HTTP Status Code {response.status_code}: {response.text}", "http", response.status_code)
+
+
+def create_client(endpoint_config: dict, http_config: dict, name: str = "") -> GeoServerClient:
+    """
+    Creates a GeoServerClient for a [source] or [target] config section.
+    Connection settings are taken from the [http] section, where missing
+    values fall back to DEFAULT_HTTP_CONFIG.
+    """
+    settings = {**DEFAULT_HTTP_CONFIG, **(http_config or {})}
+
+    return GeoServerClient(
+        endpoint_config["url"],
+        (endpoint_config["user"], endpoint_config["password"]),
+        pool_size=settings["pool_size"],
+        connect_timeout=settings["connect_timeout"],
+        read_timeout=settings["read_timeout"],
+        retries=settings["retries"],
+        backoff_factor=settings["backoff_factor"],
+        backoff_jitter=settings["backoff_jitter"],
+        name=name,
+    )
+
+
+def iter_response_list(response: requests.Response, keys: tuple):
+    # the connection is released when the list is read completely (or the iterator is closed)
+    with response:
+        chunks = codecs.iterdecode(response.iter_content(chunk_size=64 * 1024), "utf-8")
+        yield from iter_json_list(chunks, *keys)
+
+
+def extract_rest_sub_path_from_href(href: str, source_url: str):
+    if href is None or href == "":
+        print("[!] No href provided to fetch the resource.")
+        return None
+
+    # we would extract a subpath like "namespaces/test" from a href
+    # "http://localhost:8081/geoserver/rest/namespaces/test.json"
+    match = re.search(re.escape(source_url) + r'/rest/([^?]+?)(?:\.\w+)?$', href)
+
+    if match:
+        sub_path = match.group(1)
+        return sub_path
+    else:
+        print(f"[!] Could not extract subpath from href: {href}")
+        return None
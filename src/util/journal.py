@@ -0,0 +1,144 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import json
+import os
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, Optional
+from model.models import Result
+from util.results import get_results_writer
+
+DEFAULT_JOURNAL_CONFIG = {
+    # append-only JSON-lines file with every finished object, empty to disable
+    "file": "sync_journal.jsonl",
+}
+
+# modes of a run that continues the journal of the previous runs
+RESUME = "resume"
+RETRY_FAILED = "retry-failed"
+
+# per context, as every target of a fan-out sync has its own journal (see util.fanout)
+journal = ContextVar("journal", default=None)
+
+
+class Journal:
+    """
+    Records every finished object (synced, unchanged or failed) as soon as it is known,
+    so a run that was interrupted can be resumed (mode RESUME) without repeating the objects done so far,
+    or only the objects that failed can be synced again (mode RETRY_FAILED).
+    A run without a mode starts a new journal.
+    """
+
+    def __init__(self, path: str, target_url: str, mode: Optional[str] = None):
+        self.path = path
+        self.target_url = target_url
+        self.mode = mode
+        # status of the objects finished by the previous runs, by (kind, name)
+        self.entries = {}
+
+        if mode is not None:
+            self.load()
+
+        self.file = open(path, "a" if mode is not None else "w", encoding="utf-8")
+        self.append({"run": datetime.now(timezone.utc).isoformat(timespec="seconds"), "target": target_url, "mode": mode})
+
+    def load(self):
+        if not os.path.exists(self.path):
+            raise ValueError(f"No journal found at '{self.path}' to {self.mode}")
+
+        target = None
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line of a run that was killed while writing it
+                    continue
+                if "run" in entry:
+                    target = entry.get("target")
+                elif target == self.target_url:
+                    self.entries[(entry["kind"], entry["name"])] = entry["status"]
+
+    def append(self, entry: dict):
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        # the journal must survive the process being killed
+        self.file.flush()
+
+    def write(self, record):
+        self.append({"kind": record.kind, "name": record.name, "status": record.status, "error": record.error})
+
+    def skip(self, kind: str, name: str) -> bool:
+        """
+        Returns whether the object is skipped in this run, as it was done by a previous one.
+        Objects the previous runs did not get to (e.g. of a list that could not be fetched) are never skipped.
+        """
+        if self.mode == RESUME:
+            return (kind, name) in self.entries
+        if self.mode == RETRY_FAILED:
+            return (kind, name) in self.entries and self.entries[(kind, name)] != "failed"
+        return False
+
+    def count(self, status: Optional[str] = None) -> int:
+        return sum(1 for entry_status in self.entries.values() if status is None or entry_status == status)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def init_journal(config: dict, target_url: str, mode: Optional[str] = None) -> Optional[Journal]:
+    """
+    Opens the journal configured in the [journal] section and passes the result records to it.
+    """
+    settings = {**DEFAULT_JOURNAL_CONFIG, **config.get("journal", {})}
+    if not settings["file"]:
+        if mode is not None:
+            raise ValueError(f"--{mode} needs a journal, see the [journal] section of the config")
+        journal.set(None)
+        return None
+
+    run_journal = Journal(settings["file"], target_url, mode)
+    journal.set(run_journal)
+    get_results_writer().journal = run_journal
+    if mode == RESUME:
+        print(f"[*] Resuming: {run_journal.count()} objects were finished by previous runs")
+    elif mode == RETRY_FAILED:
+        print(f"[*] Retrying {run_journal.count('failed')} objects that failed in previous runs")
+    return run_journal
+
+
+def get_list_key(rest_path: str, api: str = "rest") -> str:
+    """
+    Returns the name a list (e.g. 'workspaces/topp/featuretypes') is recorded under if it could not be fetched,
+    its path on the GeoServer. Object names can not contain a '/', so it never clashes with the name of an object.
+    """
+    return api + "/" + rest_path
+
+
+def get_journal() -> Optional[Journal]:
+    return journal.get()
+
+
+def iter_pending(kind: str, tasks: Iterable, get_name: Callable[..., str], result: Result) -> Iterator:
+    """
+    Yields the tasks whose objects (named by get_name) are not skipped by the journal,
+    the skipped objects are added to result.
+    """
+    run_journal = journal.get()
+    for task in tasks:
+        if run_journal is not None and run_journal.skip(kind, get_name(task)):
+            result.extend(Result(skipped_objects=[get_name(task)]))
+        else:
+            yield task
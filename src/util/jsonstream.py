@@ -0,0 +1,139 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import re
+from json import JSONDecoder, JSONDecodeError
+from typing import Iterable
+
+WHITESPACE = " \t\n\r"
+# the rest of a buffer that might continue a number in the next chunk
+NUMBER_END = re.compile(r"[0-9+\-.eE]*\Z")
+
+
+class JsonStream:
+    """
+    Reads JSON values one after another from an iterable of text chunks.
+    Only the value that is currently read (and the rest of the current chunk) is held in memory.
+    """
+
+    def __init__(self, chunks: Iterable[str]):
+        self.chunks = iter(chunks)
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+        self.decoder = JSONDecoder()
+
+    def read_more(self) -> bool:
+        if self.exhausted:
+            return False
+        for chunk in self.chunks:
+            if chunk:
+                self.buffer = self.buffer[self.pos:] + chunk
+                self.pos = 0
+                return True
+        self.exhausted = True
+        return False
+
+    def peek(self) -> str:
+        """
+        Returns the next non-whitespace character without consuming it ('' at the end of the stream).
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except JSONDecodeError:
+                # the value is continued in the next chunk
+                if self.read_more():
+                    continue
+                raise
+
+            # a number at the end of the buffer might be continued in the next chunk as well, also if the
+            # buffer ends within its fraction or exponent ("12." + "5", "1e" + "-3"), which is not decoded then
+            if NUMBER_END.match(self.buffer, end) and self.read_more():
+                continue
+
+            self.pos = end
+            return value
+
+    def find_key(self, key: str) -> bool:
+        """
+        Moves to the value of key in the object that starts at the current position.
+        Returns False (and skips the value) if it is not an object or has no such key.
+        """
+        if self.peek() != "{":
+            self.read_value()
+            return False
+
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return False
+
+        while True:
+            current_key = self.read_value()
+            self.expect(":")
+            if current_key == key:
+                return True
+            self.read_value()
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("}")
+                return False
+
+
+def iter_json_list(chunks: Iterable[str], *keys: str):
+    """
+    Yields the entries of the list found under the given keys of a JSON document, e.g.
+    iter_json_list(chunks, "featureTypes", "featureType") for {"featureTypes": {"featureType": [...]}}.
+    Nothing is yielded if a key is missing or empty (GeoServer returns {"featureTypes": ""}
+    for empty lists), a single object instead of a list is yielded as the only entry.
+    """
+    stream = JsonStream(chunks)
+    for key in keys:
+        if not stream.find_key(key):
+            return
+
+    if stream.peek() != "[":
+        value = stream.read_value()
+        if value:
+            yield value
+        return
+
+    stream.expect("[")
+    if stream.peek() == "]":
+        return
+
+    while True:
+        yield stream.read_value()
+        if stream.peek() == ",":
+            stream.pos += 1
+        else:
+            stream.expect("]")
+            return
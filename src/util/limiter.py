@@ -0,0 +1,160 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import asyncio
+import threading
+import time
+from typing import Optional
+
+DEFAULT_LIMITS_CONFIG = {
+    "enabled": False,
+    "max_reads": 16,
+    "max_writes": 4,
+    "min": 1,
+    "latency_target": 0.0,
+}
+
+# the limit is cut by this factor on overload (multiplicative decrease)
+DECREASE_FACTOR = 0.5
+# without latency_target, requests slower than this many times the lowest latency seen count as overload ...
+LATENCY_TOLERANCE = 3.0
+# ... but never requests faster than this (in seconds)
+MIN_LATENCY_TARGET = 0.2
+
+# all limiters, for the summary at the end of a run
+limiters = []
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit that adapts to a GeoServer by AIMD (additive increase, multiplicative decrease),
+    as TCP congestion control does: every request that is answered in time raises the limit by 1/limit,
+    so the limit grows by one per round of requests, while an overloaded answer (HTTP 429 or 5xx,
+    a transport error, retries or a latency above the target) halves it. The limit is decreased at most
+    once per round trip, as all requests in flight see the same overload.
+    """
+
+    def __init__(self, name: str, maximum: int, minimum: int = 1, latency_target: float = 0.0):
+        self.name = name
+        self.maximum = max(maximum, 1)
+        self.minimum = min(max(minimum, 1), self.maximum)
+        # start in the middle, the target is not known yet
+        self.limit = float(max(self.minimum, self.maximum // 2))
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.min_latency = None
+        self.last_decrease = 0.0
+        self.decreases = 0
+        self.requests = 0
+        self.lowest = self.highest = int(self.limit)
+        limiters.append(self)
+
+    @property
+    def allowed(self) -> int:
+        return int(self.limit)
+
+    def update(self, latency: float, overloaded: bool):
+        self.requests += 1
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        target = self.latency_target or max(LATENCY_TOLERANCE * self.min_latency, MIN_LATENCY_TARGET)
+
+        if overloaded or latency > target:
+            now = time.monotonic()
+            if now - self.last_decrease >= latency:
+                self.limit = max(self.minimum, self.limit * DECREASE_FACTOR)
+                self.last_decrease = now
+                self.decreases += 1
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+        self.lowest = min(self.lowest, self.allowed)
+        self.highest = max(self.highest, self.allowed)
+
+
+class AdaptiveLimiter(AdaptiveLimit):
+    """
+    Blocks the threads sending requests while the limit is reached.
+    """
+
+    def __init__(self, name: str, maximum: int, minimum: int = 1, latency_target: float = 0.0):
+        super().__init__(name, maximum, minimum, latency_target)
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.allowed:
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, overloaded: bool):
+        with self.condition:
+            self.in_flight -= 1
+            self.update(latency, overloaded)
+            self.condition.notify_all()
+
+
+class AsyncAdaptiveLimiter(AdaptiveLimit):
+    """
+    Same as AdaptiveLimiter for the tasks of an event loop.
+    """
+
+    def __init__(self, name: str, maximum: int, minimum: int = 1, latency_target: float = 0.0):
+        super().__init__(name, maximum, minimum, latency_target)
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.allowed)
+            self.in_flight += 1
+
+    async def release(self, latency: float, overloaded: bool):
+        async with self.condition:
+            self.in_flight -= 1
+            self.update(latency, overloaded)
+            self.condition.notify_all()
+
+
+def is_overloaded(status: int, retries: int = 0) -> bool:
+    """
+    Returns whether a response (status 0: transport error) shows that the GeoServer is overloaded.
+    """
+    return status == 0 or status == 429 or status >= 500 or retries > 0
+
+
+def create_limiters(config: dict, name: str, limiter_class: type = AdaptiveLimiter) -> Optional[dict]:
+    """
+    Creates the "read" and "write" limiters of a client from the [limits] section, None if they are not enabled.
+    """
+    settings = {**DEFAULT_LIMITS_CONFIG, **config.get("limits", {})}
+    if not settings["enabled"]:
+        return None
+
+    return {
+        "read": limiter_class(f"{name} reads", settings["max_reads"], settings["min"], settings["latency_target"]),
+        "write": limiter_class(f"{name} writes", settings["max_writes"], settings["min"], settings["latency_target"]),
+    }
+
+
+def get_limiter(client_limiters: Optional[dict], method: str):
+    if client_limiters is None:
+        return None
+    return client_limiters["read" if method in ["GET", "HEAD"] else "write"]
+
+
+def log_limits():
+    # the watch mode creates new limiters for every poll, only the last ones are shown
+    for limiter in {limiter.name: limiter for limiter in limiters}.values():
+        if limiter.requests:
+            print(f"[*] Concurrent {limiter.name}: {limiter.allowed} at the end, between {limiter.lowest} and "
+                  f"{limiter.highest} (max. {limiter.maximum}), reduced {limiter.decreases} times on overload")
@@ -12,94 +12,100 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from typing import Iterable
 from model.models import Result
+from util.results import get_results_writer, iter_records
+from util.metrics import Metrics
+
+
+def iter_found(items: Iterable, what: str):
+    """
+    Yields the items of a list that is read lazily and prints how many were found once all are read.
+    """
+    count = 0
+    for item in items:
+        count += 1
+        yield item
+    print(f"[*] Found {count} {what}")
+
+
+# kinds of the result records and how they are called in the summary
+RESULT_KINDS = [("workspace", "workspaces"), ("store", "datastores"), ("style", "styles"),
+                ("layer", "layers"), ("layergroup", "layergroups")]
+
 
 def log_results(workspaces_results: Result, store_results: Result, styles_results: Result, layers_results: Result, layergroups_results: Result):
+    """
+    Prints the number of created, unchanged and failed objects of each kind.
+    The single objects are listed from the results file in verbose mode only.
+    """
+    summaries = [(label, get_summary(kind, results)) for (kind, label), results in
+                 zip(RESULT_KINDS, [workspaces_results, store_results, styles_results, layers_results, layergroups_results])]
+
     print("[*] Synchronization completed - Summary of successes:")
+    for label, summary in summaries:
+        if summary.success_count:
+            print(f"[*] Created {summary.success_count} {label} on target GeoServer.")
+        else:
+            print(f"[*] No new {label} were created on the target GeoServer.")
 
-    created_workspaces = workspaces_results.success_objects
-    created_stores = store_results.success_objects
-    created_styles = styles_results.success_objects
-    created_layers = layers_results.success_objects
-    created_layergroups = layergroups_results.success_objects
-
-    failed_workspaces = workspaces_results.failed_objects
-    failed_stores = store_results.failed_objects
-    failed_styles = styles_results.failed_objects
-    failed_layers = layers_results.failed_objects
-    failed_layergroups = layergroups_results.failed_objects
-
-    if created_workspaces:
-        print(
-            f"[*] Created {len(created_workspaces)} workspaces on target GeoServer:")
-        for ws in created_workspaces:
-            print(f" - {ws}")
-    else:
-        print("[*] No new workspaces were created on the target GeoServer.")
-
-    if created_stores:
-        print(
-            f"[*] Created {len(created_stores)} datastores on target GeoServer:")
-        for store in created_stores:
-            print(f" - {store}")
-    else:
-        print("[*] No new datastores were created on the target GeoServer.")
-
-    if created_styles:
-        print(f"[*] Created {len(created_styles)} styles on target GeoServer:")
-        for style in created_styles:
-            print(f" - {style}")
-    else:
-        print("[*] No new styles were created on the target GeoServer.")
-
-    if created_layers:
-        print(f"[*] Created {len(created_layers)} layers on target GeoServer:")
-        for layer in created_layers:
-            print(f" - {layer}")
-    else:
-        print("[*] No new layers were created on the target GeoServer.")
-
-    if layergroups_results:
-        print(
-            f"[*] Created {len(created_layergroups)} layergroups on target GeoServer:")
-        for layergroup in created_layergroups:
-            print(f" - {layergroup}")
-    else:
-        print("[*] No new layergroups were created on the target GeoServer.")
+    # only in incremental mode
+    for label, summary in summaries:
+        if summary.unchanged_count:
+            print(f"[*] Skipped {summary.unchanged_count} unchanged {label}.")
+    # only with --resume or --retry-failed
+    for label, summary in summaries:
+        if summary.skipped_count:
+            print(f"[*] Skipped {summary.skipped_count} {label} done by previous runs.")
 
     print("[*] Summary of fails and objects that could NOT be created:")
+    for label, summary in summaries:
+        if summary.failed_count:
+            print(f"[*] Failed to create {summary.failed_count} {label} ({format_errors(summary)}).")
+        else:
+            print(f"[*] No {label} failed to be created on the target GeoServer.")
+
+    log_records()
+
+
+def get_summary(kind: str, results: Result) -> Result:
+    """
+    Returns the results as an aggregated Result, e.g. the single failure of a phase that stopped early.
+    """
+    if results.kind is not None:
+        return results
+    summary = Result(kind=kind)
+    summary.extend(results)
+    return summary
+
+
+def format_errors(results: Result) -> str:
+    return ", ".join(f"{count} {error}" for error, count in sorted(results.errors.items(), key=lambda item: -item[1]))
+
+
+def log_records():
+    """
+    Closes the results file and prints the objects written to it in verbose mode.
+    """
+    writer = get_results_writer()
+    writer.close()
+    if not writer.path:
+        return
+
+    if writer.verbose:
+        for record in iter_records(writer.path):
+            line = f" - {record['kind']} {record['name']}: {record['status']}"
+            if record["reason"]:
+                line += f" - {record['reason']}"
+            print(line)
+    print(f"[*] Wrote the results of {writer.count} objects to '{writer.path}'")
+
+
+def log_metrics(metrics: Metrics):
+    for client, total in metrics.get_totals().items():
+        print(f"[*] {total['requests']} requests to {client} ({total['failed']} failed, {total['retries']} retries) "
+              f"in {total['seconds']:.1f} s, {total['bytes'] / 1024 / 1024:.1f} MB")
 
-    if failed_workspaces:
-        print(f"[*] Failed to create {len(failed_workspaces)} workspaces:")
-        for failed in failed_workspaces:
-            print(f" - {failed.name}: {failed.reason}")
-    else:
-        print("[*] No workspaces failed to be created on the target GeoServer.")
-
-    if failed_stores:
-        print(f"[*] Failed to create {len(failed_stores)} datastores:")
-        for failed in failed_stores:
-            print(f" - {failed.name}: {failed.reason}")
-    else:
-        print("[*] No datastores failed to be created on the target GeoServer.")
-
-    if failed_styles:
-        print(f"[*] Failed to create {len(failed_styles)} styles:")
-        for failed in failed_styles:
-            print(f" - {failed.name}: {failed.reason}")
-    else:
-        print("[*] No styles failed to be created on the target GeoServer.")
-
-    if failed_layers:
-        print(f"[*] Failed to create {len(failed_layers)} layers:")
-        for failed in failed_layers:
-            print(f" - {failed.name}: {failed.reason}")
-    else:
-        print("[*] No layers failed to be created on the target GeoServer.")
-
-    if failed_layergroups:
-        print(f"[*] Failed to create {len(failed_layergroups)} layergroups:")
-        for failed in failed_layergroups:
-            print(f" - {failed.name}: {failed.reason}")
-    else:
-        print("[*] No layergroups failed to be created on the target GeoServer.")
+    phases = [(name, timer.sum) for (kind, name), timer in metrics.timers.items() if kind == "phase"]
+    if phases:
+        print("[*] Duration of the phases: " + ", ".join(f"{name} {seconds:.1f} s" for name, seconds in phases))
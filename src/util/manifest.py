@@ -0,0 +1,76 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+DEFAULT_MANIFEST_PATH = "files_manifest.jsonl"
+
+
+class FileManifest:
+    """
+    Records every file uploaded to a target with its size, modification time and checksum (append-only JSON lines),
+    so the files a target already has are not uploaded again, e.g. by a run that continues an interrupted one.
+    The entries of other targets in the same file are ignored.
+    """
+
+    def __init__(self, path: str, target_url: str):
+        self.path = path
+        self.target_url = target_url
+        # path in the data directory -> {"size", "mtime", "sha256"} of the last upload
+        self.files = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            self.load()
+
+        self.file = open(path, "a", encoding="utf-8")
+        self.append({"run": datetime.now(timezone.utc).isoformat(timespec="seconds"), "target": target_url})
+
+    def load(self):
+        target = None
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line of a run that was killed while writing it
+                    continue
+                if "run" in entry:
+                    target = entry.get("target")
+                elif target == self.target_url:
+                    self.files[entry["path"]] = {key: entry.get(key) for key in ["size", "mtime", "sha256"]}
+
+    def get(self, path: str) -> Optional[dict]:
+        with self.lock:
+            return self.files.get(path)
+
+    def add(self, path: str, size: int, mtime: float, sha256: str):
+        with self.lock:
+            self.files[path] = {"size": size, "mtime": mtime, "sha256": sha256}
+            self.append({"path": path, "size": size, "mtime": mtime, "sha256": sha256})
+
+    def append(self, entry: dict):
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        # an interrupted transfer continues after the last file that was uploaded completely
+        self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
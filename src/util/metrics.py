@@ -0,0 +1,243 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+# upper bounds (in seconds) of the replication lag histogram buckets of the watch mode
+LAG_BUCKETS = [1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 86400]
+
+metrics = None
+
+
+class Histogram:
+    def __init__(self, bounds: list = LATENCY_BUCKETS):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.bounds = bounds
+        self.buckets = [0] * len(bounds)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.bounds):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def cumulative_buckets(self):
+        total = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            total += count
+            yield bound, total
+
+    def to_json(self):
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "max_s": round(self.max, 6),
+            "buckets": {str(bound): count for bound, count in self.cumulative_buckets()},
+        }
+
+
+class Metrics:
+    """
+    Collects the metrics of a run: every HTTP request (by client, method, endpoint class
+    and status) with its latency and size, the request time per workspace and timers
+    for phases and tasks. The report is written as JSON or in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = time.time()
+        # (client, method, endpoint, status) -> [Histogram, bytes]
+        self.requests = {}
+        self.retries = {}
+        # (client, workspace) -> Histogram
+        self.workspaces = {}
+        # (kind, name) -> Histogram
+        self.timers = {}
+
+    def record_request(self, client: str, method: str, url: str, status: int, size: int, seconds: float, retries: int = 0):
+        """
+        Records a request, status is 0 if it failed without response.
+        """
+        path = get_rest_path(url)
+        key = (client, method, get_endpoint_class(path), status)
+        workspace = get_workspace(path)
+
+        with self.lock:
+            entry = self.requests.setdefault(key, [Histogram(), 0])
+            entry[0].observe(seconds)
+            entry[1] += size
+            if retries:
+                self.retries[client] = self.retries.get(client, 0) + retries
+            if workspace is not None:
+                self.workspaces.setdefault((client, workspace), Histogram()).observe(seconds)
+
+    def add_time(self, kind: str, name: str, seconds: float, bounds: list = LATENCY_BUCKETS):
+        with self.lock:
+            self.timers.setdefault((kind, name), Histogram(bounds)).observe(seconds)
+
+    @contextmanager
+    def timer(self, kind: str, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(kind, name, time.perf_counter() - start)
+
+    def get_totals(self):
+        """
+        Returns the number of requests, the request time, the bytes and the retries per client.
+        """
+        totals = {}
+        with self.lock:
+            for (client, _, _, status), (histogram, size) in self.requests.items():
+                total = totals.setdefault(client, {"requests": 0, "failed": 0, "seconds": 0.0, "bytes": 0, "retries": self.retries.get(client, 0)})
+                total["requests"] += histogram.count
+                total["seconds"] += histogram.sum
+                total["bytes"] += size
+                if status == 0 or status >= 400:
+                    total["failed"] += histogram.count
+        return totals
+
+    def to_json(self):
+        totals = self.get_totals()
+        with self.lock:
+            return {
+                "started": self.start,
+                "duration_s": round(time.time() - self.start, 3),
+                "totals": totals,
+                "requests": [
+                    {"client": client, "method": method, "endpoint": endpoint, "status": status, "bytes": size, "latency": histogram.to_json()}
+                    for (client, method, endpoint, status), (histogram, size) in sorted(self.requests.items())
+                ],
+                "workspaces": [
+                    {"client": client, "workspace": workspace, "latency": histogram.to_json()}
+                    for (client, workspace), histogram in sorted(self.workspaces.items())
+                ],
+                "timers": [
+                    {"kind": kind, "name": name, "duration": histogram.to_json()}
+                    for (kind, name), histogram in sorted(self.timers.items())
+                ],
+            }
+
+    def to_prometheus(self):
+        lines = []
+
+        def add_histogram(name: str, labels: str, histogram: Histogram):
+            for bound, count in histogram.cumulative_buckets():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        with self.lock:
+            lines.append("# HELP geoserver_sync_request_duration_seconds Duration of the HTTP requests to the GeoServers.")
+            lines.append("# TYPE geoserver_sync_request_duration_seconds histogram")
+            for (client, method, endpoint, status), (histogram, _) in sorted(self.requests.items()):
+                add_histogram("geoserver_sync_request_duration_seconds",
+                              f'client="{escape(client)}",method="{method}",endpoint="{endpoint}",status="{status}"', histogram)
+
+            lines.append("# HELP geoserver_sync_response_bytes_total Size of the HTTP response bodies.")
+            lines.append("# TYPE geoserver_sync_response_bytes_total counter")
+            for (client, method, endpoint, status), (_, size) in sorted(self.requests.items()):
+                lines.append(f'geoserver_sync_response_bytes_total{{client="{escape(client)}",method="{method}",endpoint="{endpoint}",status="{status}"}} {size}')
+
+            lines.append("# HELP geoserver_sync_retries_total Retried HTTP requests.")
+            lines.append("# TYPE geoserver_sync_retries_total counter")
+            for client, retries in sorted(self.retries.items()):
+                lines.append(f'geoserver_sync_retries_total{{client="{escape(client)}"}} {retries}')
+
+            lines.append("# HELP geoserver_sync_workspace_request_duration_seconds Duration of the HTTP requests per workspace.")
+            lines.append("# TYPE geoserver_sync_workspace_request_duration_seconds histogram")
+            for (client, workspace), histogram in sorted(self.workspaces.items()):
+                add_histogram("geoserver_sync_workspace_request_duration_seconds", f'client="{escape(client)}",workspace="{escape(workspace)}"', histogram)
+
+            lines.append("# HELP geoserver_sync_duration_seconds Duration of the sync phases and tasks.")
+            lines.append("# TYPE geoserver_sync_duration_seconds histogram")
+            for (kind, name), histogram in sorted(self.timers.items()):
+                add_histogram("geoserver_sync_duration_seconds", f'kind="{kind}",name="{escape(name)}"', histogram)
+
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str):
+        """
+        Writes the report in the Prometheus text format if path ends with .prom, as JSON otherwise.
+        """
+        content = self.to_prometheus() if path.endswith(".prom") else json.dumps(self.to_json(), indent=1)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+def get_metrics() -> Metrics:
+    global metrics
+    if metrics is None:
+        metrics = Metrics()
+    return metrics
+
+
+def escape(label_value: str) -> str:
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def get_rest_path(url: str) -> str:
+    path = urlparse(url).path
+    index = path.find("/rest/")
+    return path[index + len("/rest/"):] if index >= 0 else path
+
+
+def get_endpoint_class(path: str) -> str:
+    """
+    Returns the endpoint class of a REST path, e.g. 'featuretypes' for
+    'workspaces/ws/datastores/ds/featuretypes/ft.json' and 'featuretypes.list' for
+    'workspaces/ws/featuretypes.json'. SLD requests get the suffix '.sld'.
+    """
+    path, ext = os.path.splitext(path)
+    segments = [segment for segment in path.split("/") if segment]
+
+    # the workspace is not an endpoint of its own for objects in a workspace
+    if len(segments) > 2 and segments[0] == "workspaces":
+        segments = segments[2:]
+
+    if not segments:
+        return "other"
+
+    if len(segments) % 2:
+        endpoint = segments[-1] + ".list"
+    else:
+        endpoint = segments[-2]
+
+    if ext == ".sld":
+        endpoint += ".sld"
+    return re.sub(r"[^a-zA-Z0-9_.]", "_", endpoint)
+
+
+def get_workspace(path: str):
+    segments = path.split("/")
+    if len(segments) > 1 and segments[0] in ["workspaces", "namespaces"]:
+        return os.path.splitext(segments[1])[0]
+    return None
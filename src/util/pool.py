@@ -0,0 +1,123 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Callable, Iterable, Iterator, Optional
+from model.models import Result
+from util.config import get_config
+
+# runs the additional calls of call_parallel()
+helper_executor = None
+helper_lock = threading.Lock()
+
+def get_workers() -> int:
+    """
+    Returns the number of worker threads configured in the [sync] section (defaults to 1).
+    """
+    workers = get_config().get("sync", {}).get("workers", 1)
+    return max(1, int(workers))
+
+
+def iter_parallel(fn: Callable, items: Iterable, workers: Optional[int] = None) -> Iterator:
+    """
+    Calls fn for every item and yields the results in the order of the items.
+    With more than one worker the calls are distributed across a thread pool,
+    otherwise they are run one after another in the calling thread.
+    Items are taken from the iterable (in the calling thread) only as workers become
+    free, so a lazily produced iterable is never held in memory as a whole.
+    """
+    if workers is None:
+        workers = get_workers()
+
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            # the workers see the context of the caller, e.g. the target of a fan-out sync (see util.fanout)
+            pending.append(executor.submit(copy_context().run, fn, item))
+            # keep some calls queued, so the workers do not idle while waiting for the first one
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def call_parallel(*fns: Callable) -> list:
+    """
+    Calls the functions concurrently and returns their results, e.g. to send independent
+    requests for the same object at once. The first function is called in the calling thread,
+    the others in a separate pool, so this may be used within the workers of iter_parallel().
+    """
+    if len(fns) <= 1 or get_workers() <= 1:
+        return [fn() for fn in fns]
+
+    futures = [get_helper_executor().submit(copy_context().run, fn) for fn in fns[1:]]
+    first = fns[0]()
+    # calls the pool did not start yet are made here, so the callers never wait for each other's helpers
+    return [first, *(fn() if future.cancel() else future.result() for fn, future in zip(fns[1:], futures))]
+
+
+def get_helper_executor() -> ThreadPoolExecutor:
+    global helper_executor
+    with helper_lock:
+        if helper_executor is None:
+            helper_executor = ThreadPoolExecutor(max_workers=get_workers(), thread_name_prefix="helper")
+    return helper_executor
+
+
+def map_parallel(fn: Callable, items: Iterable, workers: Optional[int] = None) -> list:
+    """
+    Same as iter_parallel(), but returns a list.
+    """
+    return list(iter_parallel(fn, items, workers))
+
+
+def run_parallel(fn: Callable[..., Result], items: Iterable, workers: Optional[int] = None,
+                 result: Optional[Result] = None) -> Result:
+    """
+    Calls fn (which must return a Result) for every item and merges all results into one,
+    the given result (e.g. an aggregated one that streams its objects) or a new one.
+    Every call builds its own Result, the merge happens in the calling thread only.
+    """
+    def call(item):
+        start = time.perf_counter()
+        item_result = fn(item)
+        return item_result, time.perf_counter() - start
+
+    if result is None:
+        result = Result()
+    for item_result, duration in iter_parallel(call, items, workers):
+        result.extend(item_result, duration)
+    return result
+
+
+def iter_listed(list_fn: Callable, lists: Iterable, result: Result) -> Iterator:
+    """
+    Calls list_fn (which must return an iterable of tasks and a Result) for every item
+    of lists and yields the tasks, the Results are merged into result.
+    The lists are fetched one after another while their tasks are consumed,
+    e.g. by run_parallel(), so only the tasks in flight are held in memory.
+    """
+    for item in lists:
+        tasks, list_result = list_fn(item)
+        result.extend(list_result)
+        yield from tasks
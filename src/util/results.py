@@ -0,0 +1,88 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import json
+import threading
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+DEFAULT_RESULTS_CONFIG = {
+    # JSON-lines file the outcome of every object is written to, empty to disable
+    "file": "sync_results.jsonl",
+    # also print every object in the summary
+    "verbose": False,
+}
+
+# per context, as every target of a fan-out sync has its own results file (see util.fanout)
+results_writer = ContextVar("results_writer", default=None)
+
+
+class ResultsWriter:
+    """
+    Writes result records to a JSON-lines file as they are produced, and to the journal (if set).
+    Without a path the records are not written to a file, only the counters of the results are kept.
+    """
+
+    def __init__(self, path: str = "", verbose: bool = False):
+        self.path = path
+        self.verbose = verbose
+        self.count = 0
+        self.lock = threading.Lock()
+        self.file = open(path, "w", encoding="utf-8") if path else None
+        # util.journal.Journal, objects skipped because of the journal are not written to it
+        self.journal = None
+
+    def write(self, record):
+        with self.lock:
+            if self.journal is not None and record.status != "skipped":
+                self.journal.write(record)
+            if self.file is not None:
+                self.file.write(json.dumps({name: getattr(record, name) for name in record.__slots__}, ensure_ascii=False) + "\n")
+                self.count += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def init_results(config: dict, verbose: bool = False) -> ResultsWriter:
+    """
+    Opens the results file configured in the [results] section, replacing the one of the last run.
+    """
+    settings = {**DEFAULT_RESULTS_CONFIG, **config.get("results", {})}
+    writer = ResultsWriter(settings["file"], verbose or settings["verbose"])
+    results_writer.set(writer)
+    return writer
+
+
+def get_results_writer() -> ResultsWriter:
+    writer = results_writer.get()
+    if writer is None:
+        writer = ResultsWriter()
+        results_writer.set(writer)
+    return writer
+
+
+def close_results():
+    writer = results_writer.get()
+    if writer is not None:
+        writer.close()
+
+
+def iter_records(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
@@ -0,0 +1,198 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from typing import Callable, Hashable, Iterable, Optional
+from model.models import Result, FailedObject
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Node:
+    key: Hashable
+    name: str
+    fn: Callable[[], Result]
+    priority: int
+    state: str = PENDING
+    open_deps: int = 0
+    dependents: list = field(default_factory=list)
+    # seconds the task has been running
+    duration: float = 0.0
+
+
+class Scheduler:
+    """
+    Runs tasks as soon as all of their dependencies have been run successfully.
+
+    Every task is a function returning a Result, a task succeeded if its Result has no
+    failed objects. Tasks whose dependencies failed are skipped (and reported as failed),
+    so a failure only affects the subtree below it. An object may be synced in several
+    steps (tasks with the same name), then a failure is only reported once.
+    Dependencies on keys that have not been added (yet) are considered to be fulfilled,
+    as the object is not managed by this run. So all tasks should be added before
+    dependencies between them are declared.
+
+    Tasks may add dependencies to other (still pending) tasks while running, e.g. after
+    fetching an object that references other objects. Among all runnable tasks the ones
+    with the lowest priority value are started first.
+
+    If on_result is given, it is called with every task and its Result as soon as the task
+    is finished or skipped (while the scheduler is locked).
+    """
+
+    def __init__(self, workers: int, on_result: Optional[Callable[[Node, Result], None]] = None):
+        self.workers = max(1, workers)
+        self.on_result = on_result
+        self.nodes = {}
+        self.results = {}
+        self.ready = []
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def add(self, key: Hashable, name: str, fn: Callable[[], Result], deps: Iterable[Hashable] = (), priority: int = 0):
+        with self.lock:
+            if key in self.nodes:
+                raise ValueError(f"Task '{key}' was already added")
+            node = Node(key=key, name=name, fn=fn, priority=priority)
+            self.nodes[key] = node
+            self._add_deps(node, deps)
+
+    def add_deps(self, key: Hashable, deps: Iterable[Hashable]):
+        """
+        Adds dependencies to a task that has not been started yet.
+        Tasks that have already been skipped stay skipped.
+        """
+        with self.lock:
+            node = self.nodes[key]
+            if node.state == FAILED:
+                return
+            if node.state != PENDING:
+                raise ValueError(f"Task '{key}' has already been started")
+            self._add_deps(node, deps)
+
+    def _add_deps(self, node: Node, deps: Iterable[Hashable]):
+        # a node is in the ready queue if it has no open dependencies,
+        # so it will be removed from there in _next_ready() if deps are added later
+        for dep in deps:
+            dep_node = self.nodes.get(dep)
+            if dep_node is None or dep_node is node or dep_node.state == DONE:
+                continue
+            if dep_node.state == FAILED:
+                self._skip(node, dep_node)
+                return
+            dep_node.dependents.append(node)
+            node.open_deps += 1
+
+        if node.open_deps == 0 and node.state == PENDING:
+            heapq.heappush(self.ready, (node.priority, next(self.counter), node))
+
+    def _skip(self, node: Node, failed_dep: Node):
+        if node.state != PENDING:
+            return
+        node.state = FAILED
+        if failed_dep.name == node.name:
+            # an earlier step of the same object failed, which has already been reported
+            self._set_result(node, Result())
+        else:
+            reason = f"Skipped as '{failed_dep.name}' could not be synced"
+            print(f"[!] Skipping '{node.name}': {reason}")
+            self._set_result(node, Result(failed_objects=[FailedObject(name=node.name, reason=reason, error="dependency")]))
+        for dependent in node.dependents:
+            self._skip(dependent, node)
+
+    def _set_result(self, node: Node, result: Result):
+        self.results[node.key] = result
+        if self.on_result is not None:
+            self.on_result(node, result)
+
+    def _finish(self, node: Node, result: Result):
+        self._set_result(node, result)
+
+        if result.failed_objects:
+            node.state = FAILED
+            for dependent in node.dependents:
+                self._skip(dependent, node)
+            return
+
+        node.state = DONE
+        for dependent in node.dependents:
+            dependent.open_deps -= 1
+            if dependent.open_deps == 0 and dependent.state == PENDING:
+                heapq.heappush(self.ready, (dependent.priority, next(self.counter), dependent))
+
+    def _next_ready(self):
+        while self.ready:
+            _, _, node = heapq.heappop(self.ready)
+            if node.state == PENDING and node.open_deps == 0:
+                return node
+        return None
+
+    def _run_node(self, node: Node) -> Result:
+        start = time.perf_counter()
+        try:
+            return node.fn()
+        finally:
+            node.duration = time.perf_counter() - start
+
+    def run(self) -> dict:
+        """
+        Runs all tasks and returns their results by key.
+        Tasks that can never run because of a dependency cycle are reported as failed.
+        """
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                with self.lock:
+                    while len(running) < self.workers:
+                        node = self._next_ready()
+                        if node is None:
+                            break
+                        node.state = RUNNING
+                        running[executor.submit(copy_context().run, self._run_node, node)] = node
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    node = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"[!] Unexpected error while syncing '{node.name}': {e}")
+                        result = Result(failed_objects=[FailedObject(name=node.name, reason=f"Unexpected error: {e}", error="unexpected")])
+                    with self.lock:
+                        self._finish(node, result)
+
+        with self.lock:
+            for node in self.nodes.values():
+                if node.state == PENDING:
+                    node.state = FAILED
+                    reason = "Could not be synced because of a dependency cycle"
+                    print(f"[!] {reason}: '{node.name}'")
+                    self._set_result(node, Result(failed_objects=[FailedObject(name=node.name, reason=reason, error="dependency")]))
+
+        return self.results
@@ -0,0 +1,199 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import getpass
+import os
+import re
+import shlex
+import subprocess
+import threading
+import tomllib
+from typing import Optional
+
+DEFAULT_SECRETS_CONFIG = {
+    "file": "",
+    "env": True,
+    "helper": "",
+    "interactive": True,
+}
+
+ENV_PREFIX = "GEOSERVER_SYNC_PASSWORD_"
+
+secrets = None
+
+
+class SecretResolver:
+    """
+    Resolves the raw passwords of stores without asking the user, if possible.
+
+    A password is looked up by a list of keys: the store key 'workspace:store' first,
+    followed by keys for the connection of the store from the most specific to the least
+    specific one (e.g. 'user@host:port/database', 'host:port/database', ..., 'host'), so one
+    entry can cover all stores that share a database or host. The sources are asked in this
+    order: [stores] of the secrets file, environment variables, answers given before,
+    [hosts] of the secrets file, the credential helper. Only if none of them knows the
+    password, the user is asked (if interactive) and the answer is reused for all stores
+    with the same connection.
+    """
+
+    def __init__(self, stores: dict = {}, hosts: dict = {}, env: bool = True, helper: str = "", interactive: bool = True):
+        self.stores = stores
+        self.hosts = hosts
+        self.env = env
+        self.helper = helper
+        self.interactive = interactive
+        self.answers = {}
+        self.lock = threading.Lock()
+        # password prompts must not interleave when stores are synced concurrently
+        self.prompt_lock = threading.Lock()
+
+    def lookup(self, keys: list[str]) -> Optional[str]:
+        """
+        Returns the password for the given keys from the non-interactive sources, None if it is unknown.
+        """
+        store_key, host_keys = keys[0], keys[1:]
+
+        password = self.stores.get(store_key) or self.get_env(store_key)
+        if password:
+            return password
+
+        with self.lock:
+            for key in keys:
+                if key in self.answers:
+                    return self.answers[key]
+
+        for key in host_keys:
+            password = self.hosts.get(key) or self.get_env(key)
+            if password:
+                return password
+
+        if self.helper:
+            password = self.run_helper(keys)
+            if password:
+                with self.lock:
+                    self.answers[get_share_key(keys)] = password
+                return password
+
+        return None
+
+    def get_password(self, keys: list[str], label: str) -> Optional[str]:
+        """
+        Returns the password for the given keys, asks the user if it is unknown (and the resolver is interactive).
+        """
+        password = self.lookup(keys)
+        if password is not None or not self.interactive:
+            return password
+
+        with self.prompt_lock:
+            # another thread might have asked for the same connection in the meantime
+            password = self.lookup(keys)
+            if password is None:
+                password = self.prompt(keys, label, 0)
+        return password
+
+    def prompt_missing(self, missing: list[tuple[list[str], str]]):
+        """
+        Asks the user for all given (keys, label) passwords in one batch, once per connection.
+        """
+        by_share_key = {}
+        for keys, label in missing:
+            by_share_key.setdefault(get_share_key(keys), []).append((keys, label))
+
+        with self.prompt_lock:
+            for entries in by_share_key.values():
+                keys, label = entries[0]
+                if self.lookup(keys) is None:
+                    self.prompt(keys, label, len(entries) - 1)
+
+    def prompt(self, keys: list[str], label: str, others: int) -> str:
+        share_key = get_share_key(keys)
+        if others:
+            label += f" (and {others} more stores on '{share_key}')"
+        password = getpass.getpass(f"[?] Please enter the password for {label}: ")
+        with self.lock:
+            self.answers[share_key] = password
+        return password
+
+    def get_env(self, key: str) -> Optional[str]:
+        if not self.env:
+            return None
+        return os.environ.get(get_env_name(key))
+
+    def get_answers(self) -> dict:
+        """
+        Returns the answers given so far by their keys, to pass them on to other processes.
+        """
+        with self.lock:
+            return dict(self.answers)
+
+    def add_answers(self, answers: dict):
+        # answers given to another process (see sync/shards.py)
+        with self.lock:
+            self.answers.update(answers)
+
+    def run_helper(self, keys: list[str]) -> Optional[str]:
+        # the helper gets the keys as environment variables and prints the password to stdout
+        env = {
+            **os.environ,
+            "GEOSERVER_SYNC_STORE": keys[0],
+            "GEOSERVER_SYNC_CONNECTION": get_share_key(keys) if len(keys) > 1 else "",
+        }
+        try:
+            completed = subprocess.run(shlex.split(self.helper), env=env, capture_output=True, text=True, timeout=60)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"[!] Credential helper failed for '{keys[0]}': {e}")
+            return None
+
+        if completed.returncode != 0:
+            return None
+        return completed.stdout.strip("\r\n") or None
+
+
+def init_secrets(config: dict) -> SecretResolver:
+    """
+    Creates the secret resolver from the [secrets] section.
+    """
+    global secrets
+    settings = {**DEFAULT_SECRETS_CONFIG, **config.get("secrets", {})}
+
+    stores, hosts = {}, {}
+    if settings["file"]:
+        try:
+            with open(settings["file"], "rb") as f:
+                content = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            raise ValueError(f"Could not read secrets file '{settings['file']}': {e}")
+        stores = content.get("stores", {})
+        hosts = content.get("hosts", {})
+
+    secrets = SecretResolver(stores, hosts, settings["env"], settings["helper"], settings["interactive"])
+    return secrets
+
+
+def get_secrets() -> SecretResolver:
+    global secrets
+    if secrets is None:
+        secrets = SecretResolver()
+    return secrets
+
+
+def get_env_name(key: str) -> str:
+    return ENV_PREFIX + re.sub(r"[^A-Z0-9]", "_", key.upper())
+
+
+def get_share_key(keys: list[str]) -> str:
+    """
+    Returns the key an answer is remembered for: the most specific connection key, the store key if there is none.
+    """
+    return keys[1] if len(keys) > 1 else keys[0]
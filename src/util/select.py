@@ -0,0 +1,181 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import fnmatch
+import re
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator, Optional
+from util.shard import ShardRing
+
+# the kinds of objects rules can be given for, as named in the [select] section and on the command line
+SELECT_KINDS = {"workspaces": "workspace", "stores": "store", "styles": "style", "layers": "layer", "layergroups": "layergroup"}
+
+selector = None
+# syncs the objects selected objects depend on (see sync.dependencies),
+# per context, as every target of a fan-out sync pulls its own dependencies (see util.fanout)
+puller = ContextVar("puller", default=None)
+
+
+class Selector:
+    """
+    Decides by include and exclude rules which objects are synced. Rules are glob patterns
+    (or regular expressions with a "re:" prefix) of workspace-qualified names, e.g. "topp:roads*".
+
+    Include rules for stores, styles, layers or layergroups select only the objects matching them,
+    objects of the other kinds are synced if they are needed (see sync.dependencies). Include rules
+    for workspaces alone select all objects of these workspaces, but no global styles and layergroups.
+    Exclude rules always win (also over dependencies), objects of an excluded workspace are not synced either.
+
+    The worker of a shard (see sync.shards) treats the workspaces of the other shards and all global objects as excluded.
+    """
+
+    def __init__(self, include: Optional[dict] = None, exclude: Optional[dict] = None, shard: Optional[tuple[int, int]] = None):
+        self.include = {kind: [compile_rule(rule) for rule in rules] for kind, rules in (include or {}).items() if rules}
+        self.exclude = {kind: [compile_rule(rule) for rule in rules] for kind, rules in (exclude or {}).items() if rules}
+        # the workspaces the objects matched by include rules (other than for workspaces) can be in
+        self.include_workspaces = [compile_workspace_rule(rule) for kind, rules in (include or {}).items()
+                                   if kind != "workspace" for rule in rules]
+        self.shard = shard
+        self.ring = None if shard is None else ShardRing(shard[1])
+
+    @property
+    def active(self) -> bool:
+        return bool(self.include or self.exclude or self.shard)
+
+    def selects(self, kind: str, name: str) -> bool:
+        if self.excludes(kind, name):
+            return False
+        if kind == "workspace":
+            return self.selects_workspace(name)
+
+        if ":" in name and not self.selects_workspace(name.split(":", 1)[0]):
+            return False
+        if kind in self.include:
+            return any(rule.fullmatch(name) for rule in self.include[kind])
+        if self.include_workspaces:
+            return False
+        return ":" in name or "workspace" not in self.include
+
+    def excludes(self, kind: str, name: str) -> bool:
+        """
+        Returns whether an object matches an exclude rule (or is in an excluded workspace).
+        """
+        if ":" in name and self.excludes("workspace", name.split(":", 1)[0]):
+            return True
+        if self.ring is not None:
+            if kind == "workspace" and self.ring.get_shard(name) != self.shard[0]:
+                return True
+            if kind != "workspace" and ":" not in name:
+                # global objects are synced by the coordinator
+                return True
+        return any(rule.fullmatch(name) for rule in self.exclude.get(kind, []))
+
+    def selects_workspace(self, workspace: str) -> bool:
+        """
+        Returns whether a workspace is synced and its objects are listed.
+        """
+        if "workspace" in self.include:
+            return any(rule.fullmatch(workspace) for rule in self.include["workspace"])
+        if self.include_workspaces:
+            return any(rule is not None and rule.fullmatch(workspace) for rule in self.include_workspaces)
+        return True
+
+
+def compile_rule(rule: str):
+    if rule.startswith("re:"):
+        return re.compile(rule[3:])
+    return re.compile(fnmatch.translate(rule))
+
+
+def compile_workspace_rule(rule: str):
+    """
+    Returns a pattern of the workspaces the objects matched by a rule can be in, None for rules of global objects only.
+    """
+    if rule.startswith("re:"):
+        # regular expressions can not be split, so any workspace is listed
+        return re.compile(".*")
+    if ":" in rule:
+        return re.compile(fnmatch.translate(rule.split(":", 1)[0]))
+    return re.compile(".*") if any(char in rule for char in "*?[") else None
+
+
+def parse_rules(config_rules: dict, arguments: Optional[list[str]], prefix: str) -> dict:
+    """
+    Merges the rules of the [select] section (e.g. include_layers = [...]) and of the command line (e.g. layers=topp:*).
+    """
+    rules = {}
+    for name, kind in SELECT_KINDS.items():
+        rules[kind] = list(config_rules.get(f"{prefix}_{name}", []))
+    for argument in arguments or []:
+        name, _, rule = argument.partition("=")
+        if name not in SELECT_KINDS or not rule:
+            raise ValueError(f"Invalid --{prefix} '{argument}', expected <{'|'.join(SELECT_KINDS)}>=<pattern>")
+        rules[SELECT_KINDS[name]].append(rule)
+    return rules
+
+
+def init_selector(config: dict, include: Optional[list[str]] = None, exclude: Optional[list[str]] = None,
+                  shard: Optional[tuple[int, int]] = None) -> Selector:
+    """
+    Creates the selector from the [select] section and the --include/--exclude arguments (and the --shard of a worker).
+    """
+    global selector
+    config_rules = config.get("select", {})
+    selector = Selector(parse_rules(config_rules, include, "include"), parse_rules(config_rules, exclude, "exclude"), shard)
+    if selector.include or selector.exclude:
+        print("[*] Only syncing the selected objects (and the objects they depend on)")
+    return selector
+
+
+def set_selector(run_selector: Selector):
+    global selector
+    selector = run_selector
+
+
+def get_selector() -> Selector:
+    global selector
+    if selector is None:
+        selector = Selector()
+    return selector
+
+
+def iter_selected(kind: str, tasks: Iterable, get_name: Callable[..., str]) -> Iterator:
+    """
+    Yields the tasks whose objects (named by get_name) are selected, before any of their details are fetched.
+    """
+    if selector is None or not selector.active:
+        yield from tasks
+        return
+    for task in tasks:
+        if selector.selects(kind, get_name(task)):
+            yield task
+
+
+def set_puller(dependency_puller):
+    puller.set(dependency_puller)
+
+
+def get_puller():
+    return puller.get()
+
+
+def pull_dependencies(dependencies: list[tuple]) -> Optional[str]:
+    """
+    Makes sure the objects an object depends on, as (kind, workspace, name, store type) tuples,
+    exist on the target if they are not selected themselves.
+    Returns None or the reason the object can not be synced (to be awaited with the asyncio engine, see sync.aio).
+    """
+    dependency_puller = puller.get()
+    if dependency_puller is None:
+        return None
+    return dependency_puller.require(dependencies)
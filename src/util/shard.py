@@ -0,0 +1,76 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import hashlib
+import os
+from bisect import bisect
+from util.results import DEFAULT_RESULTS_CONFIG
+from util.journal import DEFAULT_JOURNAL_CONFIG
+
+# points of every shard on the hash ring, more points spread the workspaces more evenly
+RING_REPLICAS = 64
+
+# files written by every run, which get the shard in their name, so workers on the same host do not share them
+SHARD_PATHS = [
+    ("sync", "state_file", "sync_state.json"),
+    ("results", "file", DEFAULT_RESULTS_CONFIG["file"]),
+    ("journal", "file", DEFAULT_JOURNAL_CONFIG["file"]),
+    ("metrics", "report", ""),
+]
+
+
+class ShardRing:
+    """
+    Assigns workspaces to the shards 1..count by consistent hashing: the assignment does not depend on
+    the order or number of workspaces, and a shard added later only takes over workspaces from the others.
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+        self.points = sorted((hash_key(f"shard-{index}-{replica}"), index)
+                             for index in range(1, count + 1) for replica in range(RING_REPLICAS))
+        self.keys = [key for key, _ in self.points]
+
+    def get_shard(self, workspace: str) -> int:
+        return self.points[bisect(self.keys, hash_key(workspace)) % len(self.points)][1]
+
+
+def hash_key(value: str) -> int:
+    # the built-in hash() of strings differs between processes
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """
+    Parses a shard like "2/4" into (2, 4).
+    """
+    index, _, count = value.partition("/")
+    if not (index.isdigit() and count.isdigit() and 1 <= int(index) <= int(count)):
+        raise ValueError(f"Invalid shard '{value}', expected <index>/<count> like 2/4")
+    return int(index), int(count)
+
+
+def get_shard_path(path: str, index: int, count: int) -> str:
+    if not path:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard-{index}-of-{count}{ext}"
+
+
+def apply_shard_paths(config: dict, index: int, count: int):
+    """
+    Puts the shard into the names of the state, results, journal and report files of a worker.
+    """
+    for section, key, default in SHARD_PATHS:
+        settings = config.setdefault(section, {})
+        settings[key] = get_shard_path(settings.get(key, default), index, count)
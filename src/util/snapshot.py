@@ -0,0 +1,155 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import datetime
+import gzip
+import json
+import os
+import threading
+from util.cache import CachedResponse
+from util.http import extract_rest_sub_path_from_href
+from util.jsonstream import iter_json_list
+
+SNAPSHOT_FORMAT = "geoserver-sync-snapshot/1"
+DEFAULT_SNAPSHOT_PATH = "catalog_snapshot.jsonl.gz"
+
+
+class SnapshotWriter:
+    """
+    Writes GET responses of the source GeoServer to a gzip compressed JSON lines snapshot.
+
+    The first line holds the source URL, each following line one response. URLs are
+    stored relative to the source URL, as the hrefs in the catalog objects point to it.
+    The snapshot is written to a temporary file and only moved to its path when complete.
+    """
+
+    def __init__(self, path: str, source_url: str):
+        self.path = path
+        self.source_url = source_url
+        self.tmp_path = path + ".tmp"
+        self.lock = threading.Lock()
+        self.urls = set()
+
+        self.file = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+        self.write_line({
+            "format": SNAPSHOT_FORMAT,
+            "source": source_url,
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        })
+
+    def write(self, url: str, response):
+        key = get_snapshot_key(url, self.source_url)
+        with self.lock:
+            if key in self.urls:
+                return
+            self.urls.add(key)
+            self.write_line({"url": key, "content_type": response.headers.get("Content-Type"), "body": response.text})
+
+    def write_line(self, entry: dict):
+        self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.tmp_path)
+
+
+class SnapshotClient:
+    """
+    Read-only stand-in for the source GeoServerClient, that answers GET requests from a
+    snapshot instead of the source GeoServer. Requests that are not in the snapshot fail
+    like requests to a GeoServer that does not know the object.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.responses = {}
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"'{path}' is not a catalog snapshot.")
+
+            for line in f:
+                entry = json.loads(line)
+                self.responses[entry["url"]] = (entry["body"], entry.get("content_type"))
+
+        self.url = header["source"]
+        self.created = header.get("created")
+
+    def close(self):
+        pass
+
+    def get(self, url: str, return_json_result: bool = True):
+        entry = self.responses.get(get_snapshot_key(url, self.url))
+
+        if entry is None:
+            print(f"[!] Error while fetching {url}: not contained in snapshot '{self.path}'")
+            return None
+
+        body, content_type = entry
+        if return_json_result:
+            return json.loads(body)
+        return CachedResponse(body.encode("utf-8"), content_type)
+
+    def get_rest(self, path: str, format: str = "json"):
+        url = f"{self.url}/rest/{path}.{format}"
+        return self.get(url)
+
+    def get_rest_list(self, path: str, *keys: str):
+        response = self.get(f"{self.url}/rest/{path}.json", False)
+        return None if response is None else iter_json_list([response.text], *keys)
+
+    def get_rest_by_href(self, href: str, format: str = "json"):
+
+        sub_path = extract_rest_sub_path_from_href(href, self.url)
+
+        if not sub_path:
+            return None
+
+        return self.get_rest(sub_path, format) or None
+
+
+class AsyncSnapshotClient:
+    """
+    SnapshotClient for the asyncio engine, the methods of AsyncGeoServerClient must be awaited.
+    """
+
+    def __init__(self, path: str):
+        self.snapshot = SnapshotClient(path)
+        self.url = self.snapshot.url
+
+    async def aclose(self):
+        pass
+
+    async def get(self, url: str, return_json_result: bool = True):
+        return self.snapshot.get(url, return_json_result)
+
+    async def get_rest(self, path: str, format: str = "json"):
+        return self.snapshot.get_rest(path, format)
+
+    async def get_rest_list(self, path: str, *keys: str):
+        return self.snapshot.get_rest_list(path, *keys)
+
+    async def get_rest_by_href(self, href: str, format: str = "json"):
+        return self.snapshot.get_rest_by_href(href, format)
+
+
+def get_snapshot_key(url: str, source_url: str) -> str:
+    if url.startswith(source_url):
+        return url[len(source_url):]
+    return url
@@ -0,0 +1,143 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import hashlib
+import json
+import os
+import threading
+from contextvars import ContextVar
+from typing import Optional
+from util.journal import get_journal
+
+# what to do with an object on the target
+CREATE = "create"        # POST (default, non incremental mode)
+UPSERT = "upsert"        # POST, PUT if the object already exists (incremental mode, object not synced before)
+UPDATE = "update"        # PUT (incremental mode, object changed since the last sync)
+UNCHANGED = "unchanged"  # nothing (incremental mode, object did not change since the last sync)
+
+# per context, as every target of a fan-out sync has its own state (see util.fanout)
+state = ContextVar("state", default=None)
+
+
+class SyncState:
+    """
+    Fingerprints of all objects synced to a target GeoServer, persisted in a JSON file.
+    The fingerprints of another target (e.g. after changing the config) are discarded.
+    """
+
+    def __init__(self, path: str, target_url: str):
+        self.path = path
+        self.target_url = target_url
+        self.fingerprints = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+            if content.get("target") == target_url:
+                self.fingerprints = content.get("objects", {})
+            else:
+                print(f"[!] State file '{path}' belongs to another target ({content.get('target')}), ignoring it.")
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            return self.fingerprints.get(key)
+
+    def set(self, key: str, fingerprint: str):
+        with self.lock:
+            self.fingerprints[key] = fingerprint
+
+    def discard(self, key: str):
+        with self.lock:
+            self.fingerprints.pop(key, None)
+
+    def save(self):
+        with self.lock:
+            content = {"target": self.target_url, "objects": self.fingerprints}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def init_state(config: dict, target_url: str) -> Optional[SyncState]:
+    """
+    Loads the state of the incremental mode, if it is enabled in the [sync] section.
+    """
+    sync_config = config.get("sync", {})
+    if sync_config.get("incremental", False):
+        sync_state = SyncState(sync_config.get("state_file", "sync_state.json"), target_url)
+        print(f"[*] Incremental mode: {len(sync_state.fingerprints)} objects known from previous syncs")
+    else:
+        sync_state = None
+    state.set(sync_state)
+    return sync_state
+
+
+def get_state() -> Optional[SyncState]:
+    return state.get()
+
+
+def fingerprint(*parts) -> str:
+    """
+    Returns a hash of the given (JSON or text) parts, independent of the order of JSON keys.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            digest.update(part.encode("utf-8"))
+        else:
+            digest.update(json.dumps(part, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_sync_action(key: str, *parts):
+    """
+    Returns the fingerprint of an object (None if not in incremental mode)
+    and what to do with it on the target (CREATE, UPSERT, UPDATE or UNCHANGED).
+    """
+    sync_state = state.get()
+    if sync_state is None:
+        # a previous run may have created the object (or parts of it) already, see util.journal
+        journal = get_journal()
+        return None, UPSERT if journal is not None and journal.mode is not None else CREATE
+
+    object_fingerprint = fingerprint(*parts)
+    known_fingerprint = sync_state.get(key)
+
+    if known_fingerprint is None:
+        return object_fingerprint, UPSERT
+    if known_fingerprint == object_fingerprint:
+        return object_fingerprint, UNCHANGED
+    return object_fingerprint, UPDATE
+
+
+def record(key: str, object_fingerprint: Optional[str]):
+    """
+    Remembers the fingerprint of an object that was synced successfully.
+    """
+    sync_state = state.get()
+    if sync_state is not None and object_fingerprint is not None:
+        sync_state.set(key, object_fingerprint)
+
+
+def write_rest(target, action: str, post_path: str, put_path: str, data, headers: dict = {"Content-Type": "application/json"}, as_json: bool = True):
+    """
+    Creates or updates an object on the target according to the action of get_sync_action().
+    With the AsyncGeoServerClient, the returned coroutine is awaited by the caller (see util.steps).
+    """
+    if action == UPDATE:
+        return target.put_rest(put_path, data, headers, as_json)
+    return target.post_rest(post_path, data, headers, as_json, update_path=put_path if action == UPSERT else None)
@@ -0,0 +1,97 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+import inspect
+from typing import Callable, Generator
+from util.pool import call_parallel
+
+
+class Parallel:
+    """
+    A step of independent calls that are made at once, e.g. to fetch the entry and the SLD of a style.
+    Each call is either a function sending a request or the steps of another sync function.
+    """
+
+    def __init__(self, *calls):
+        self.calls = calls
+
+
+class Blocking:
+    """
+    A step that blocks without sending a request (e.g. a password prompt), so it must not run on the event loop.
+    """
+
+    def __init__(self, fn: Callable, *args):
+        self.fn = fn
+        self.args = args
+
+
+def run_steps(steps: Generator):
+    """
+    Runs the steps of a sync function with the blocking GeoServerClient and returns the return value of the steps.
+
+    The sync functions of both engines are written once, as generators that yield every request they send, e.g.
+    `namespace_obj = yield source.get(href)`. With the GeoServerClient the request was sent when it is yielded,
+    so its result is just sent back into the generator. With the AsyncGeoServerClient the yielded coroutine is
+    awaited first (see run_steps_async()).
+    """
+    value = None
+    while True:
+        try:
+            step = steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+        value = run_step(step)
+
+
+def run_step(step):
+    if isinstance(step, Parallel):
+        return call_parallel(*(lambda call=call: run_call(call) for call in step.calls))
+    if isinstance(step, Blocking):
+        return step.fn(*step.args)
+    return step
+
+
+def run_call(call):
+    return run_steps(call) if inspect.isgenerator(call) else call()
+
+
+async def run_steps_async(steps: Generator):
+    """
+    Same as run_steps() for the AsyncGeoServerClient (see sync.aio).
+    """
+    value = None
+    while True:
+        try:
+            step = steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+        value = await run_step_async(step)
+
+
+async def run_step_async(step):
+    if isinstance(step, Parallel):
+        return list(await asyncio.gather(*(run_call_async(call) for call in step.calls)))
+    if isinstance(step, Blocking):
+        return await asyncio.to_thread(step.fn, *step.args)
+    if inspect.isawaitable(step):
+        return await step
+    return step
+
+
+async def run_call_async(call):
+    if inspect.isgenerator(call):
+        return await run_steps_async(call)
+    return await run_step_async(call())
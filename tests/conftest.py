@@ -0,0 +1,157 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "src", "main.py")
+
+# the modules import each other from src (see src/main.py), the mock GeoServer is the one of the benchmarks
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+from mock_geoserver import Catalog, Stats, create_handler
+
+
+class MockGeoServer:
+    """
+    A source and a target GeoServer (see bench/mock_geoserver.py), served by a thread of the tests.
+    """
+
+    def __init__(self, layers: int = 20, workspaces: int = 2, datastores: int = 2, styles: int = 2, layers_per_group: int = 5):
+        self.catalog = Catalog("", layers, workspaces, datastores, styles, layers_per_group)
+        self.stats = Stats()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), create_handler(self.catalog, self.stats, 0, 0, 0))
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.catalog.base_url = self.url + "/source/geoserver"
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def get_config(self, engine: str = "threads", targets: list = ()) -> str:
+        """
+        Returns a config.toml syncing the source of this mock to its target, or to the targets of other mocks.
+        """
+        config = f"""
+[source]
+url = "{self.url}/source/geoserver"
+user = "admin"
+password = "geoserver"
+
+[sync]
+workers = 4
+engine = "{engine}"
+
+[secrets]
+interactive = false
+"""
+        for index, target in enumerate(targets or [self], start=1):
+            header = f'[[targets]]\nname = "target{index}"' if targets else "[target]"
+            config += f"""
+{header}
+url = "{target.url}/target/geoserver"
+user = "admin"
+password = "geoserver"
+"""
+        return config
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ScriptedServer:
+    """
+    Answers the requests to a path with the given (status, body) responses one after another, the last one repeatedly.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def answer(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.requests.append((self.command, self.path))
+                answers = server.responses.get((self.command, self.path), [(404, "not found")])
+                status, body = answers.pop(0) if len(answers) > 1 else answers[0]
+                body = (json.dumps(body) if not isinstance(body, str) else body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = answer
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/geoserver"
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def count(self, method: str) -> int:
+        return sum(1 for request_method, _ in self.requests if request_method == method)
+
+
+@pytest.fixture
+def server():
+    """
+    Starts a ScriptedServer, which is stopped after the test.
+    """
+    scripted = ScriptedServer()
+    yield scripted
+    scripted.httpd.shutdown()
+    scripted.httpd.server_close()
+
+
+@pytest.fixture
+def mock_geoserver():
+    """
+    Starts mock GeoServers (with the given catalog arguments), which are stopped after the test.
+    """
+    servers = []
+
+    def start(**catalog_args) -> MockGeoServer:
+        servers.append(MockGeoServer(**catalog_args))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def run_main(tmp_path):
+    """
+    Runs src/main.py in a temporary directory with the given config.toml and arguments, returns the finished process.
+    """
+    def run(config: str, *args: str) -> subprocess.CompletedProcess:
+        (tmp_path / "config.toml").write_text(config, encoding="utf-8")
+        # all stores of the mock share one database
+        env = {**os.environ, "GEOSERVER_SYNC_PASSWORD_DB_EXAMPLE_COM": "secret"}
+        return subprocess.run([sys.executable, MAIN, *args], cwd=tmp_path, env=env, stdin=subprocess.DEVNULL,
+                              capture_output=True, text=True, timeout=120)
+
+    return run
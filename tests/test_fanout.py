@@ -0,0 +1,144 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+import pytest
+from contextvars import copy_context
+from util.fanout import ThreadSharedResponses, AsyncSharedResponses, current_target, get_targets, get_target_config
+from util.pool import map_parallel
+
+URLS = [f"http://source/rest/layers/layer{index}.json" for index in range(20)]
+
+
+def read_all(shared, name: str, fetched: list) -> list:
+    current_target.set(name)
+
+    def fetch(url):
+        fetched.append(url)
+        return url.upper()
+
+    return [shared.get(url, lambda: fetch(url)) for url in URLS]
+
+
+def test_every_response_is_fetched_once():
+    shared = ThreadSharedResponses(["a", "b", "c"], buffer=5)
+    fetched = []
+
+    responses = map_parallel(lambda name: copy_context().run(read_all, shared, name, fetched), ["a", "b", "c"], 3)
+
+    assert all(target_responses == [url.upper() for url in URLS] for target_responses in responses)
+    assert sorted(fetched) == sorted(URLS)
+    # all targets read all responses, so none is kept
+    assert shared.entries == {}
+
+
+def test_a_target_ahead_waits_for_the_buffer():
+    shared = ThreadSharedResponses(["a", "b"], buffer=2)
+    assert shared.take("a", URLS[0])[1]
+    assert shared.take("a", URLS[1])[1]
+    # the buffer is full and b has not read anything yet
+    assert shared.take("a", URLS[2]) == (None, False)
+    # the slowest target evicts the oldest responses (that were fetched) instead of waiting
+    shared.entries[URLS[0]].future.set_result(None)
+    assert shared.take("b", URLS[3])[1]
+    assert URLS[0] not in shared.entries
+
+
+def test_finished_targets_do_not_hold_back_the_others():
+    shared = ThreadSharedResponses(["a", "b"], buffer=1)
+    assert shared.take("a", URLS[0])[1]
+    shared.remove("b")
+    shared.entries[URLS[0]].future.set_result(None)
+    shared.drop(URLS[0], shared.entries[URLS[0]])
+    assert shared.take("a", URLS[1])[1]
+
+
+def test_failed_fetches_are_repeated_by_every_target():
+    shared = ThreadSharedResponses(["a", "b"])
+
+    def fail():
+        raise ConnectionError("source down")
+
+    current_target.set("a")
+    with pytest.raises(ConnectionError):
+        shared.get(URLS[0], fail)
+    current_target.set("b")
+    assert shared.get(URLS[0], lambda: "response") == "response"
+    current_target.set(None)
+
+
+def test_other_contexts_are_not_shared():
+    shared = ThreadSharedResponses(["a"])
+    fetched = []
+    assert copy_context().run(read_all, shared, "other", fetched) == [url.upper() for url in URLS]
+    assert shared.fetched == 0 and len(fetched) == len(URLS)
+
+
+def test_async_responses_are_fetched_once():
+    fetched = []
+
+    async def read(shared, name: str):
+        current_target.set(name)
+
+        async def fetch(url):
+            fetched.append(url)
+            await asyncio.sleep(0)
+            return url.upper()
+
+        return [await shared.get(url, lambda url=url: fetch(url)) for url in URLS]
+
+    async def run():
+        shared = AsyncSharedResponses(["a", "b"], buffer=3)
+        return await asyncio.gather(read(shared, "a"), read(shared, "b"))
+
+    assert asyncio.run(run()) == [[url.upper() for url in URLS]] * 2
+    assert sorted(fetched) == sorted(URLS)
+
+
+def test_get_targets():
+    target = {"url": "http://target/geoserver", "user": "admin", "password": "geoserver"}
+    assert get_targets({"target": dict(target)}) == [{"name": "target", **target}]
+    assert [t["name"] for t in get_targets({"targets": [dict(target), {"name": "prod", **target}]})] == ["target1", "prod"]
+
+    for config in [{"targets": [dict(target)], "target": target}, {"targets": [{"name": "a b", **target}]},
+                   {"targets": [{"name": "a", **target}, {"name": "a", **target}]}, {"targets": [{"url": "http://target"}]}]:
+        with pytest.raises(ValueError):
+            get_targets(config)
+
+
+def test_every_target_has_its_own_files():
+    target = {"name": "prod", "url": "http://target/geoserver"}
+    config = get_target_config({"targets": [target], "results": {"file": "results.jsonl"}}, target)
+    assert config["target"] == target and "targets" not in config
+    assert config["results"]["file"] == "results.prod.jsonl"
+    assert config["sync"]["state_file"] == "sync_state.prod.json"
+    assert config["journal"]["file"] == "sync_journal.prod.jsonl"
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_syncs_all_targets_reading_the_source_once(mock_geoserver, run_main, engine):
+    single = mock_geoserver()
+    process = run_main(single.get_config(engine))
+    assert process.returncode == 0, process.stdout
+
+    source, other = mock_geoserver(), mock_geoserver()
+    process = run_main(source.get_config(engine, [source, other]), "--verbose")
+    assert process.returncode == 0, process.stdout
+
+    created = single.stats.to_json()["created_objects"]
+    assert created > 0
+    assert source.stats.to_json()["created_objects"] == other.stats.to_json()["created_objects"] == created
+    # only the source is read
+    assert source.stats.requests["GET"] == single.stats.requests["GET"]
+    assert "GET" not in other.stats.requests
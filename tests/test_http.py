@@ -0,0 +1,90 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+from util.http import create_client, extract_rest_sub_path_from_href, DEFAULT_HTTP_CONFIG
+
+# no waiting between the retries
+FAST_RETRIES = {"retries": 2, "backoff_factor": 0, "backoff_jitter": 0}
+
+
+def get_client(server, **http_config):
+    return create_client({"url": server.url + "/", "user": "admin", "password": "geoserver"}, {**FAST_RETRIES, **http_config})
+
+
+def test_create_client_settings():
+    client = create_client({"url": "http://localhost/geoserver/", "user": "admin", "password": "secret"}, {"read_timeout": 5, "retries": 7})
+    retry = client.session.get_adapter("http://localhost").max_retries
+
+    assert client.url == "http://localhost/geoserver"
+    assert client.session.auth == ("admin", "secret")
+    # missing settings fall back to the defaults
+    assert client.timeout == (DEFAULT_HTTP_CONFIG["connect_timeout"], 5)
+    assert retry.total == 7 and retry.backoff_factor == DEFAULT_HTTP_CONFIG["backoff_factor"]
+    # POST is not idempotent
+    assert "POST" not in retry.allowed_methods and "GET" in retry.allowed_methods and "PUT" in retry.allowed_methods
+
+
+def test_get_is_retried_on_transient_errors(server):
+    server.responses[("GET", "/geoserver/rest/workspaces.json")] = [(503, "busy"), (502, "bad gateway"), (200, {"workspaces": ""})]
+    assert get_client(server).get_rest("workspaces") == {"workspaces": ""}
+    assert server.count("GET") == 3
+
+
+def test_get_fails_after_the_retries(server):
+    server.responses[("GET", "/geoserver/rest/workspaces.json")] = [(503, "busy")]
+    assert get_client(server).get_rest("workspaces") is None
+    assert server.count("GET") == 1 + FAST_RETRIES["retries"]
+
+
+def test_client_errors_are_not_retried(server):
+    assert get_client(server).get_rest("workspaces/missing") is None
+    assert server.count("GET") == 1
+
+
+def test_post_is_never_retried(server):
+    server.responses[("POST", "/geoserver/rest/workspaces")] = [(503, "busy"), (201, "ws")]
+    result = get_client(server).post_rest("workspaces", {"workspace": {"name": "ws"}})
+    assert result != True and "503" in result
+    assert server.count("POST") == 1
+
+
+def test_put_is_retried(server):
+    server.responses[("PUT", "/geoserver/rest/workspaces/ws")] = [(500, "error"), (200, "")]
+    assert get_client(server).put_rest("workspaces/ws", {"workspace": {"name": "ws"}}) == True
+    assert server.count("PUT") == 2
+
+
+def test_connection_errors_are_reported(server):
+    client = get_client(server)
+    server.httpd.shutdown()
+    server.httpd.server_close()
+    assert client.get_rest("workspaces") is None
+    result = client.post_rest("workspaces", {})
+    assert result.startswith("[!] Error while posting")
+    assert (result.error, result.code) == ("transport", 0)
+
+
+@pytest.mark.parametrize("status, error", [(401, "unauthorized"), (409, "conflict"), (500, "http"), (415, "http")])
+def test_failed_writes_hold_their_error_class(server, status, error):
+    server.responses[("POST", "/geoserver/rest/workspaces")] = [(status, "failed")]
+    result = get_client(server, retries=0).post_rest("workspaces", {"workspace": {"name": "ws"}})
+    assert (result.error, result.code) == (error, status)
+
+
+def test_extract_rest_sub_path_from_href():
+    url = "http://localhost/geoserver"
+    assert extract_rest_sub_path_from_href(url + "/rest/workspaces/topp/datastores/roads.json", url) == "workspaces/topp/datastores/roads"
+    assert extract_rest_sub_path_from_href("http://other/geoserver/rest/namespaces/topp.json", url) is None
+    assert extract_rest_sub_path_from_href(None, url) is None
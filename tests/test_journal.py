@@ -0,0 +1,77 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import pytest
+from util.journal import Journal, RESUME, RETRY_FAILED, get_list_key
+
+
+def write_journal(path, *runs):
+    lines = []
+    for target, entries in runs:
+        lines.append({"run": "2025-01-01T00:00:00+00:00", "target": target, "mode": None})
+        lines.extend({"kind": kind, "name": name, "status": status, "error": None} for kind, name, status in entries)
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines) + '{"kind": "layer", "na')
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    write_journal(path,
+                  ("http://target", [("store", "ws:store", "synced"), ("layer", "ws:roads", "failed"),
+                                     ("layer", "ws:rivers", "unchanged"), ("layer", get_list_key("workspaces/ws2/featuretypes"), "failed")]),
+                  ("http://other", [("layer", "ws:lakes", "synced")]))
+    return path
+
+
+def open_journal(path, mode):
+    run_journal = Journal(str(path), "http://target", mode)
+    run_journal.close()
+    return run_journal
+
+
+def test_resume_skips_all_finished_objects(journal_path):
+    run_journal = open_journal(journal_path, RESUME)
+    assert run_journal.skip("store", "ws:store")
+    assert run_journal.skip("layer", "ws:roads")
+    assert run_journal.skip("layer", "ws:rivers")
+    assert not run_journal.skip("layer", "ws:other")
+
+
+def test_retry_failed_only_syncs_the_failed_objects(journal_path):
+    run_journal = open_journal(journal_path, RETRY_FAILED)
+    assert run_journal.skip("store", "ws:store")
+    assert run_journal.skip("layer", "ws:rivers")
+    assert not run_journal.skip("layer", "ws:roads")
+    # objects of a list that could not be fetched were never finished
+    assert not run_journal.skip("layer", "ws2:roads")
+    assert run_journal.count("failed") == 2
+
+
+def test_entries_of_other_targets_are_ignored(journal_path):
+    run_journal = open_journal(journal_path, RESUME)
+    assert not run_journal.skip("layer", "ws:lakes")
+    assert run_journal.count() == 4
+
+
+def test_new_run_skips_nothing(journal_path):
+    run_journal = open_journal(journal_path, None)
+    assert not run_journal.skip("store", "ws:store")
+    # a run without a mode starts a new journal
+    assert [json.loads(line)["mode"] for line in journal_path.read_text().splitlines()] == [None]
+
+
+def test_continuing_needs_a_journal(tmp_path):
+    with pytest.raises(ValueError):
+        Journal(str(tmp_path / "missing.jsonl"), "http://target", RESUME)
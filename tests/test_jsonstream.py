@@ -0,0 +1,65 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import pytest
+from util.jsonstream import iter_json_list
+
+LAYERS = {"featureTypes": {"featureType": [
+    {"name": "roads", "href": "http://localhost/geoserver/rest/workspaces/topp/featuretypes/roads.json"},
+    {"name": "rivers ä", "href": "http://localhost/geoserver/rest/workspaces/topp/featuretypes/rivers.json"},
+    {"name": "count", "size": 12345, "bbox": [-180.5, 1e-3, 180, 90], "nested": {"a": [1, {"b": None}], "c": "a \"quoted\" ] }"}},
+]}}
+
+
+def split(text: str, size: int) -> list:
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 100000])
+def test_reads_the_list_in_any_chunks(size):
+    text = json.dumps(LAYERS, indent=1)
+    assert list(iter_json_list(split(text, size), "featureTypes", "featureType")) == LAYERS["featureTypes"]["featureType"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 5])
+def test_numbers_split_by_chunks(size):
+    # a number at the end of a chunk might be continued in the next one
+    assert list(iter_json_list(split('{"ids": {"id": [12345, 678.9e2, -1]}}', size), "ids", "id")) == [12345, 67890.0, -1]
+
+
+def test_skips_other_keys_before_the_list():
+    text = '{"other": {"featureType": [1, 2]}, "featureTypes": {"count": 2, "featureType": [{"name": "a"}]}}'
+    assert list(iter_json_list(split(text, 4), "featureTypes", "featureType")) == [{"name": "a"}]
+
+
+@pytest.mark.parametrize("text", ['{"featureTypes": ""}', '{"featureTypes": {"featureType": []}}', '{"other": []}',
+                                  '{"featureTypes": {}}', '{}', '[]'])
+def test_empty_or_missing_lists(text):
+    assert list(iter_json_list(split(text, 3), "featureTypes", "featureType")) == []
+
+
+def test_single_object_instead_of_a_list():
+    text = '{"featureTypes": {"featureType": {"name": "roads"}}}'
+    assert list(iter_json_list(split(text, 5), "featureTypes", "featureType")) == [{"name": "roads"}]
+
+
+def test_ignores_empty_chunks():
+    chunks = ["", '{"ids": ', "", "", '{"id": [1,', "", " 2]}}", ""]
+    assert list(iter_json_list(chunks, "ids", "id")) == [1, 2]
+
+
+def test_truncated_document():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_list(split('{"ids": {"id": [1, 2, {"name": "a"', 4), "ids", "id"))
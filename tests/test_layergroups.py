@@ -0,0 +1,40 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from sync.layergroups import get_layergroup_waves
+
+
+def test_orders_groups_by_the_groups_they_contain():
+    nested = {"basemap": {"roads", "ws:water"}, "roads": set(), "ws:water": {"ws:rivers"}, "ws:rivers": set(), "all": {"basemap"}}
+    waves, cycles, blocked = get_layergroup_waves(nested)
+    assert waves == [["roads", "ws:rivers"], ["ws:water"], ["basemap"], ["all"]]
+    assert cycles == [] and blocked == []
+
+
+def test_ignores_groups_that_are_not_synced():
+    waves, cycles, blocked = get_layergroup_waves({"basemap": {"other"}, "roads": {"basemap", "ws:external"}})
+    assert waves == [["basemap"], ["roads"]]
+    assert cycles == [] and blocked == []
+
+
+def test_finds_cycles_and_the_groups_containing_them():
+    nested = {"a": {"b"}, "b": {"c"}, "c": {"a"}, "self": {"self"}, "outer": {"a", "leaf"}, "top": {"outer"}, "leaf": set()}
+    waves, cycles, blocked = get_layergroup_waves(nested)
+    assert waves == [["leaf"]]
+    assert sorted(map(sorted, cycles)) == [["a", "b", "c"], ["self"]]
+    assert blocked == ["outer", "top"]
+
+
+def test_no_groups():
+    assert get_layergroup_waves({}) == ([], [], [])
@@ -0,0 +1,78 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import pytest
+
+# per workspace of the mock: 7 featureTypes, a coverage, a WMS and a WMTS layer in 2 datastores and the other stores
+STORES, LAYERS, LAYERGROUPS = 2 * 5, 2 * 10, 2 * 2 + 1
+# the datastores and the WMS store
+PASSWORD_STORES = 2 * 3
+
+
+@pytest.fixture
+def run_plan(mock_geoserver, run_main, tmp_path):
+    """
+    Plans the sync of a mock GeoServer with the given settings of [sync] and other sections, returns the process and the report.
+    """
+    def run(sections: str = "", sync: str = "", interactive: bool = False):
+        server = mock_geoserver()
+        config = server.get_config().replace("[sync]\n", "[sync]\n" + sync)
+        config = config.replace("interactive = false", f"interactive = {str(interactive).lower()}")
+        process = run_main(config + '\n[plan]\nreport = "plan.json"\nsamples = 1\n' + sections, "plan")
+        assert process.returncode == 0, process.stdout + process.stderr
+        return process, json.loads((tmp_path / "plan.json").read_text())
+
+    return run
+
+
+def test_plans_every_phase(run_plan):
+    process, report = run_plan()
+    phases = report["phases"]
+    assert list(phases) == ["workspace", "store", "style", "layer", "layergroup"]
+    assert [phases[kind]["objects"] for kind in ["workspace", "store", "layer", "layergroup"]] == [2, STORES, LAYERS, LAYERGROUPS]
+    assert phases["layer"]["reads"] == phases["layer"]["writes"] == 2 * LAYERS
+    assert phases["style"]["writes"] == phases["style"]["objects"]
+    assert report["total"]["objects"] == sum(phase["objects"] for phase in phases.values())
+    assert "[*] Total:" in process.stdout
+
+
+def test_plans_the_two_step_style_upload(run_plan):
+    _, report = run_plan(sync='style_upload = "two-step"\n')
+    style = report["phases"]["style"]
+    assert style["writes"] == 2 * style["objects"]
+
+
+def test_plans_the_password_pre_flight(run_plan):
+    _, report = run_plan(interactive=True)
+    phases = report["phases"]
+    assert list(phases)[:3] == ["workspace", "password", "store"]
+    assert phases["password"]["objects"] == phases["password"]["reads"] == PASSWORD_STORES
+    # the stores are fetched once, by the pre-flight or by their sync
+    assert phases["password"]["reads"] + phases["store"]["reads"] == STORES
+    assert report["total"]["objects"] == sum(phase["objects"] for kind, phase in phases.items() if kind != "password")
+
+
+def test_plans_the_tile_layers(run_plan):
+    process, report = run_plan('\n[gwc]\nenabled = true\nseed = true\n')
+    assert report["phases"]["tilelayer"]["objects"] == LAYERS + LAYERGROUPS
+    assert "Not included: seeding" in process.stdout
+
+
+def test_fails_without_the_latency_of_the_target(mock_geoserver, run_main):
+    server = mock_geoserver()
+    process = run_main(server.get_config().replace("/target/geoserver", "/missing/geoserver") + "\n[plan]\nsamples = 1\n", "plan")
+    assert process.returncode == 1
+    assert "Could not sample the latency" in process.stdout
+    assert "Traceback" not in process.stderr
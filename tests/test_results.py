@@ -0,0 +1,59 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import pytest
+from model.models import FailedObject, Result
+from util.http import RequestError, wrap_error
+from util.results import init_results, close_results
+
+
+@pytest.fixture
+def results_path(tmp_path):
+    path = tmp_path / "results.jsonl"
+    init_results({"results": {"file": str(path)}})
+    yield path
+    close_results()
+    init_results({"results": {"file": ""}})
+
+
+def test_the_error_class_is_set_where_the_object_failed():
+    failed = FailedObject(name="ws:stores", reason="Failed to fetch stores of type 'dataStores' for workspace 'ws'", error="fetch")
+    assert (failed.error, failed.code) == ("fetch", 0)
+    failed = FailedObject(name="ws", reason="Failed to create namespace 'ws' on target")
+    assert (failed.error, failed.code) == ("create", 0)
+
+
+def test_the_error_class_of_a_failed_write_is_kept_by_the_messages():
+    post_result = RequestError("[!] Target resource in 'workspaces' already exists.", "conflict", 409)
+    failed = FailedObject(name="ws", reason=wrap_error(f"Failed to create namespace 'ws' on target: {post_result}", post_result))
+    assert (failed.error, failed.code) == ("conflict", 409)
+    assert failed.reason == "Failed to create namespace 'ws' on target: [!] Target resource in 'workspaces' already exists."
+    # messages without a failed request have no class of their own
+    assert wrap_error("No store found", "[!] No store") == "No store found"
+
+
+def test_results_count_and_write_the_error_classes(results_path):
+    results = Result(kind="store")
+    results.extend(Result(success_objects=["ws:a"], failed_objects=[
+        FailedObject(name="ws:b", reason=RequestError("[!] Error while posting - HTTP Status Code 500: error", "http", 500)),
+        FailedObject(name="ws:c", reason="No password found", error="password"),
+        FailedObject(name="ws:d", reason="Skipped as 'ws' could not be synced", error="dependency")]))
+    close_results()
+
+    assert results.errors == {"http": 1, "password": 1, "dependency": 1}
+    records = {record["name"]: record for record in map(json.loads, results_path.read_text().splitlines())}
+    assert (records["ws:b"]["error"], records["ws:b"]["code"]) == ("http", 500)
+    assert (records["ws:c"]["error"], records["ws:c"]["code"]) == ("password", 0)
+    assert records["ws:a"]["status"] == "synced" and records["ws:a"]["error"] is None
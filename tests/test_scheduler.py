@@ -0,0 +1,153 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from model.models import Result, FailedObject
+from util.scheduler import Scheduler
+
+
+def succeed(name, calls):
+    def fn():
+        calls.append(name)
+        return Result(success_objects=[name])
+    return fn
+
+
+def fail(name, calls):
+    def fn():
+        calls.append(name)
+        return Result(failed_objects=[FailedObject(name=name, reason="Failed to create")])
+    return fn
+
+
+def test_runs_tasks_after_their_dependencies():
+    calls = []
+    scheduler = Scheduler(4)
+    # all tasks are added before the dependencies between them are declared
+    scheduler.add("layer", "ws:layer", succeed("ws:layer", calls))
+    scheduler.add("store", "ws:store", succeed("ws:store", calls))
+    scheduler.add("workspace", "ws", succeed("ws", calls))
+    scheduler.add_deps("layer", ["store", "workspace"])
+    scheduler.add_deps("store", ["workspace"])
+
+    results = scheduler.run()
+
+    assert calls == ["ws", "ws:store", "ws:layer"]
+    assert all(len(result.success_objects) == 1 for result in results.values())
+
+
+def test_skips_the_dependents_of_a_failed_task():
+    calls = []
+    scheduler = Scheduler(2)
+    scheduler.add("store", "ws:store", fail("ws:store", calls))
+    scheduler.add("layer", "ws:layer", succeed("ws:layer", calls))
+    scheduler.add("group", "group", succeed("group", calls))
+    scheduler.add("other", "ws:other", succeed("ws:other", calls))
+    scheduler.add_deps("layer", ["store"])
+    scheduler.add_deps("group", ["layer"])
+
+    results = scheduler.run()
+
+    assert sorted(calls) == ["ws:other", "ws:store"]
+    assert results["layer"].failed_objects[0].reason == "Skipped as 'ws:store' could not be synced"
+    assert results["group"].failed_objects[0].reason == "Skipped as 'ws:layer' could not be synced"
+    assert len(results["other"].success_objects) == 1
+
+
+def test_reports_a_failed_object_once():
+    # the second step of the same object is skipped without another failure
+    calls = []
+    scheduler = Scheduler(1)
+    scheduler.add(("layer", 1), "ws:layer", fail("ws:layer", calls))
+    scheduler.add(("layer", 2), "ws:layer", succeed("ws:layer", calls), deps=[("layer", 1)])
+
+    results = scheduler.run()
+
+    assert calls == ["ws:layer"]
+    assert len(results[("layer", 2)].failed_objects) == 0
+
+
+def test_dependencies_on_unknown_or_failed_tasks():
+    calls = []
+    scheduler = Scheduler(1)
+    scheduler.add("store", "ws:store", fail("ws:store", calls))
+    scheduler.run()
+
+    # tasks that are not managed by the scheduler do not block, failed ones skip the task at once
+    scheduler.add("layer", "ws:layer", succeed("ws:layer", calls), deps=["unknown"])
+    scheduler.add("other", "ws:other", succeed("ws:other", calls), deps=["store"])
+    results = scheduler.run()
+
+    assert calls == ["ws:store", "ws:layer"]
+    assert len(results["other"].failed_objects) == 1
+
+
+def test_adding_dependencies_to_a_skipped_task():
+    calls = []
+    scheduler = Scheduler(1)
+    scheduler.add("workspace", "ws", fail("ws", calls), priority=0)
+    scheduler.add("layer", "ws:layer", succeed("ws:layer", calls), deps=["workspace"])
+
+    def fetch():
+        # the layer has been skipped before it was fetched, as its workspace failed
+        scheduler.add_deps("layer", ["store"])
+        return Result()
+
+    scheduler.add("fetch", "ws:layer", fetch, priority=1)
+    results = scheduler.run()
+
+    assert len(results["fetch"].failed_objects) == 0
+    assert results["layer"].failed_objects[0].reason == "Skipped as 'ws' could not be synced"
+    assert calls == ["ws"]
+
+
+def test_unexpected_errors_fail_the_task():
+    def raise_error():
+        raise RuntimeError("boom")
+
+    calls = []
+    scheduler = Scheduler(1)
+    scheduler.add("store", "ws:store", raise_error)
+    scheduler.add("layer", "ws:layer", succeed("ws:layer", calls), deps=["store"])
+
+    results = scheduler.run()
+
+    assert results["store"].failed_objects[0].reason == "Unexpected error: boom"
+    assert len(results["layer"].failed_objects) == 1
+    assert calls == []
+
+
+def test_fails_the_tasks_of_a_cycle():
+    calls = []
+    scheduler = Scheduler(2)
+    scheduler.add("a", "a", succeed("a", calls))
+    scheduler.add("b", "b", succeed("b", calls), deps=["a"])
+    scheduler.add_deps("a", ["b"])
+    scheduler.add("c", "c", succeed("c", calls))
+
+    results = scheduler.run()
+
+    assert calls == ["c"]
+    assert results["a"].failed_objects[0].reason == "Could not be synced because of a dependency cycle"
+    assert len(results["b"].failed_objects) == 1
+
+
+def test_calls_on_result_for_every_task():
+    finished = []
+    scheduler = Scheduler(2, on_result=lambda node, result: finished.append((node.key, len(result.failed_objects))))
+    scheduler.add("store", "ws:store", fail("ws:store", []))
+    scheduler.add("layer", "ws:layer", succeed("ws:layer", []), deps=["store"])
+
+    scheduler.run()
+
+    assert sorted(finished) == [("layer", 1), ("store", 1)]
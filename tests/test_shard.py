@@ -0,0 +1,52 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+from collections import Counter
+from util.shard import ShardRing, parse_shard, get_shard_path
+
+WORKSPACES = [f"workspace{index}" for index in range(1000)]
+
+
+def test_assigns_every_workspace_to_a_shard():
+    ring = ShardRing(4)
+    shards = Counter(ring.get_shard(workspace) for workspace in WORKSPACES)
+    assert set(shards) == {1, 2, 3, 4}
+    # the replicas spread the workspaces roughly evenly
+    assert min(shards.values()) > len(WORKSPACES) / 4 / 2
+
+
+def test_assignment_is_stable():
+    # the same in every process (see util.shard.hash_key), independent of the other workspaces
+    assert [ShardRing(4).get_shard(workspace) for workspace in WORKSPACES] == [ShardRing(4).get_shard(workspace) for workspace in WORKSPACES]
+    assert ShardRing(1).get_shard("topp") == 1
+
+
+def test_an_added_shard_only_takes_over_workspaces():
+    before, after = ShardRing(4), ShardRing(5)
+    moved = [workspace for workspace in WORKSPACES if before.get_shard(workspace) != after.get_shard(workspace)]
+    assert moved
+    assert all(after.get_shard(workspace) == 5 for workspace in moved)
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for value in ["0/4", "5/4", "2", "a/b", "-1/4"]:
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+def test_shard_path():
+    assert get_shard_path("sync_results.jsonl", 2, 4) == "sync_results.shard-2-of-4.jsonl"
+    assert get_shard_path("", 2, 4) == ""
@@ -0,0 +1,48 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+
+
+@pytest.fixture
+def snapshot(mock_geoserver, run_main, tmp_path):
+    """
+    Exports the source of a mock GeoServer, returns the path of the snapshot and the number of objects it creates.
+    """
+    source = mock_geoserver()
+    process = run_main(source.get_config(), "export", "--snapshot", str(tmp_path / "snapshot.jsonl.gz"))
+    assert process.returncode == 0, process.stdout
+
+    reference = mock_geoserver()
+    process = run_main(reference.get_config())
+    assert process.returncode == 0, process.stdout
+    return str(tmp_path / "snapshot.jsonl.gz"), reference.stats.to_json()["created_objects"]
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_imports_the_snapshot(mock_geoserver, run_main, snapshot, engine):
+    path, created = snapshot
+    target = mock_geoserver()
+    process = run_main(target.get_config(engine), "import", "--snapshot", path)
+    assert process.returncode == 0, process.stdout
+    assert target.stats.to_json()["created_objects"] == created
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_imports_the_snapshot_to_several_targets(mock_geoserver, run_main, snapshot, engine):
+    path, created = snapshot
+    targets = [mock_geoserver(), mock_geoserver()]
+    process = run_main(targets[0].get_config(engine, targets), "import", "--snapshot", path)
+    assert process.returncode == 0, process.stdout
+    assert [target.stats.to_json()["created_objects"] for target in targets] == [created, created]
@@ -0,0 +1,66 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+from util.journal import RESUME, init_journal
+from util.results import init_results
+from util.state import get_sync_action, init_state, record, CREATE, UPSERT, UPDATE, UNCHANGED
+
+
+@pytest.fixture
+def sync_state(tmp_path):
+    yield init_state({"sync": {"incremental": True, "state_file": str(tmp_path / "state.json")}}, "http://target")
+    init_state({}, "http://target")
+
+
+def test_creates_without_state():
+    assert get_sync_action("layer:ws:roads", {"name": "roads"}) == (None, CREATE)
+
+
+def test_upserts_without_state_when_continuing_a_journal(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"run": "2025-01-01T00:00:00+00:00", "target": "http://target", "mode": null}\n')
+    init_results({"results": {"file": ""}})
+    run_journal = init_journal({"journal": {"file": str(path)}}, "http://target", RESUME)
+    try:
+        # the previous run may have created the object already
+        assert get_sync_action("layer:ws:roads", {"name": "roads"}) == (None, UPSERT)
+    finally:
+        run_journal.close()
+        init_journal({"journal": {"file": ""}}, "http://target")
+
+
+def test_actions_in_incremental_mode(sync_state):
+    fingerprint, action = get_sync_action("layer:ws:roads", {"name": "roads", "srs": "EPSG:4326"})
+    assert fingerprint is not None and action == UPSERT
+
+    record("layer:ws:roads", fingerprint)
+    # the fingerprint does not depend on the order of the keys
+    assert get_sync_action("layer:ws:roads", {"srs": "EPSG:4326", "name": "roads"}) == (fingerprint, UNCHANGED)
+
+    changed, action = get_sync_action("layer:ws:roads", {"name": "roads", "srs": "EPSG:3857"})
+    assert changed != fingerprint and action == UPDATE
+
+
+def test_all_parts_are_compared(sync_state):
+    fingerprint, _ = get_sync_action("layer:ws:roads", {"name": "roads"}, {"layer": {"defaultStyle": "line"}})
+    record("layer:ws:roads", fingerprint)
+
+    _, action = get_sync_action("layer:ws:roads", {"name": "roads"}, {"layer": {"defaultStyle": "point"}})
+    assert action == UPDATE
+
+
+def test_failed_objects_are_not_recorded(sync_state):
+    record("layer:ws:roads", None)
+    assert get_sync_action("layer:ws:roads", {"name": "roads"})[1] == UPSERT
@@ -0,0 +1,77 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+import sync.styles
+import util.config
+from sync.styles import sync_style
+from util.http import create_client
+
+STYLE = {"style": {"name": "roads", "format": "sld", "languageVersion": {"version": "1.0.0"}, "filename": "roads.sld"}}
+SLD = "<StyledLayerDescriptor/>"
+
+UPLOAD = ("POST", "/geoserver/rest/styles?name=roads")
+ENTRY = ("POST", "/geoserver/rest/styles")
+SLD_PUT = ("PUT", "/geoserver/rest/styles/roads")
+
+
+@pytest.fixture
+def sync_roads(server, monkeypatch):
+    """
+    Syncs the style 'roads' of the scripted server to itself, returns the Result.
+    """
+    monkeypatch.setattr(util.config, "config", {})
+    monkeypatch.setattr(sync.styles, "sld_upload_unsupported", set())
+    server.responses[("GET", "/geoserver/rest/styles/roads.json")] = [(200, STYLE)]
+    server.responses[("GET", "/geoserver/rest/styles/roads.sld")] = [(200, SLD)]
+    client = create_client({"url": server.url, "user": "admin", "password": "geoserver"}, {"retries": 0})
+
+    def run():
+        return sync_style(None, {"name": "roads", "href": server.url + "/rest/styles/roads.json"}, client, client)
+
+    return run
+
+
+def get_writes(server) -> list:
+    return [request for request in server.requests if request[0] != "GET"]
+
+
+def test_uploads_the_sld_in_one_request(server, sync_roads):
+    server.responses[UPLOAD] = [(201, "roads")]
+    result = sync_roads()
+
+    assert result.success_objects == ["roads"]
+    assert get_writes(server) == [UPLOAD]
+
+
+@pytest.mark.parametrize("status", [405, 415])
+def test_unsupported_uploads_fall_back_to_two_requests(server, sync_roads, status):
+    server.responses[UPLOAD] = [(status, "unsupported")]
+    server.responses[ENTRY] = [(201, "roads")]
+    server.responses[SLD_PUT] = [(200, "")]
+    result = sync_roads()
+
+    assert result.success_objects == ["roads"]
+    assert get_writes(server) == [UPLOAD, ENTRY, SLD_PUT]
+    assert server.url in sync.styles.sld_upload_unsupported
+
+
+@pytest.mark.parametrize("status, error", [(401, "unauthorized"), (409, "conflict"), (500, "http")])
+def test_other_upload_failures_are_reported(server, sync_roads, status, error):
+    server.responses[UPLOAD] = [(status, "failed")]
+    result = sync_roads()
+
+    assert [(failed.name, failed.error, failed.code) for failed in result.failed_objects] == [("roads", error, status)]
+    assert get_writes(server) == [UPLOAD]
+    assert sync.styles.sld_upload_unsupported == set()
@@ -0,0 +1,62 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from sync.verify import VOLATILE_FIELDS, MISSING, normalize, iter_diffs, canonicalize_sld
+
+IGNORE = set(VOLATILE_FIELDS)
+URLS = ["http://source/geoserver", "http://target/geoserver"]
+
+
+def store(url: str, password: str) -> dict:
+    return {"dataStore": {"name": "roads", "href": f"{url}/rest/workspaces/ws/datastores/roads.json",
+                          "connectionParameters": {"entry": [{"@key": "host", "$": "db"}, {"@key": "passwd", "$": password}]},
+                          "featureTypes": f"{url}/rest/workspaces/ws/datastores/roads/featuretypes.json"}}
+
+
+def test_data_stores_are_compared_without_passwords_and_urls():
+    source = normalize(store(URLS[0], "crypt1:source"), IGNORE, URLS)
+    target = normalize(store(URLS[1], "crypt1:target"), IGNORE, URLS)
+    assert source == target
+    assert source["dataStore"]["connectionParameters"] == {"host": "db"}
+    assert source["dataStore"]["featureTypes"] == "{geoserver}/rest/workspaces/ws/datastores/roads/featuretypes.json"
+
+
+def test_cascaded_stores_are_compared_without_passwords():
+    def wms_store(password: str) -> dict:
+        return {"wmsStore": {"name": "remote", "capabilitiesURL": "http://remote/wms", "user": "admin", "password": password}}
+
+    source, target = normalize(wms_store("crypt1:source"), IGNORE, URLS), normalize(wms_store("crypt1:target"), IGNORE, URLS)
+    assert source == target == {"wmsStore": {"name": "remote", "capabilitiesURL": "http://remote/wms", "user": "admin"}}
+
+
+def test_ignored_fields_at_any_depth():
+    value = {"layer": {"name": "roads", "dateModified": "today", "styles": [{"name": "line", "href": "x"}],
+                       "metadata": {"entry": [{"@key": "cached", "$": "true"}, {"@key": "time", "$": "now"}]}}}
+    assert normalize(value, IGNORE | {"time"}, URLS) == {"layer": {"name": "roads", "styles": [{"name": "line"}],
+                                                                   "metadata": {"cached": "true"}}}
+
+
+def test_diffs_are_listed_by_field():
+    source = {"layer": {"name": "roads", "styles": ["line", "point"], "enabled": True}}
+    target = {"layer": {"name": "roads", "styles": ["line", "polygon"], "title": "Roads"}}
+    assert list(iter_diffs(source, target, 10)) == [("layer.enabled", True, MISSING), ("layer.styles[1]", "point", "polygon"),
+                                                    ("layer.title", MISSING, "Roads")]
+    assert list(iter_diffs(source, target, 1)) == [("layer.enabled", True, MISSING), ("...", None, None)]
+
+
+def test_slds_are_compared_without_formatting():
+    sld = '<StyledLayerDescriptor version="1.0.0"><Name>line</Name></StyledLayerDescriptor>'
+    formatted = '<?xml version="1.0"?>\n<StyledLayerDescriptor  version="1.0.0">\n  <Name>line</Name>\n</StyledLayerDescriptor>\n'
+    assert canonicalize_sld(sld) == canonicalize_sld(formatted)
+    assert canonicalize_sld("not xml ") == "not xml"
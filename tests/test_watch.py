@@ -0,0 +1,135 @@
+#  Copyright © 2025-present terrestris GmbH & Co. KG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0.txt
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pytest
+import main
+from util.http import GeoServerClient
+from util.select import get_selector
+from sync.watch import watch
+
+FEATURE_TYPES = ["ft0", "ft1", "ft2"]
+
+
+class RecordingTarget:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_rest(self, path, params=None):
+        self.deleted.append(path)
+        return True
+
+
+@pytest.fixture
+def source(mock_geoserver):
+    server = mock_geoserver(layers=6, workspaces=2, datastores=1, styles=1, layers_per_group=10)
+    client = GeoServerClient(server.catalog.base_url, ("admin", "geoserver"))
+    yield server, client
+    client.close()
+
+
+def run_watch(client, polls: list, full_sync_every: int = 0, deletes: bool = True) -> tuple[list, RecordingTarget]:
+    """
+    Watches the source for one poll more than there are changes in polls, which are applied after each poll.
+    Returns the selectors of the syncs, None for full syncs, and the target.
+    """
+    target = RecordingTarget()
+    syncs = []
+    changes = iter(polls)
+
+    def run_sync():
+        selector = get_selector()
+        syncs.append(selector if selector.include else None)
+        return []
+
+    def after_poll():
+        change = next(changes, None)
+        if change is None:
+            raise KeyboardInterrupt
+        change()
+
+    watch({"watch": {"interval": 0, "full_sync_every": full_sync_every, "deletes": deletes}}, client, target, run_sync, after_poll)
+    return syncs, target
+
+
+def test_only_the_first_poll_syncs_all_objects(source):
+    server, client = source
+    syncs, target = run_watch(client, [lambda: None, lambda: None])
+    assert syncs == [None]
+    assert target.deleted == []
+
+
+def test_new_objects_are_synced_with_their_workspace(source):
+    server, client = source
+
+    def add_workspace():
+        server.catalog.workspaces.append("ws2")
+
+    syncs, _ = run_watch(client, [add_workspace])
+    assert syncs[0] is None
+    assert len(syncs) == 2
+    selector = syncs[1]
+    assert selector.selects("workspace", "ws2") and selector.selects("store", "ws2:ds0")
+    assert all(selector.selects("layer", "ws2:" + name) for name in FEATURE_TYPES)
+    assert not selector.selects("workspace", "ws0") and not selector.selects("layer", "ws0:ft0")
+
+
+def test_deleted_objects_are_deleted_on_the_target(source):
+    server, client = source
+    syncs, target = run_watch(client, [lambda: server.catalog.workspaces.remove("ws1")])
+    assert syncs == [None]
+    # the contained objects first, the workspace last
+    assert target.deleted[0] == "workspaces/ws1/layergroups/lg0"
+    assert target.deleted[-1] == "workspaces/ws1"
+    assert "workspaces/ws1/datastores/ds0" in target.deleted
+    assert all("ws0" not in path for path in target.deleted)
+
+
+def test_deletes_are_disabled_by_default(source):
+    server, client = source
+    _, target = run_watch(client, [lambda: server.catalog.workspaces.remove("ws1")], deletes=False)
+    assert target.deleted == []
+
+
+def test_full_syncs(source):
+    server, client = source
+    syncs, _ = run_watch(client, [lambda: None] * 4, full_sync_every=2)
+    assert syncs == [None, None, None]
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_polls_reuse_the_clients_of_the_sync(monkeypatch, engine):
+    used = []
+    closed = []
+
+    async def sync_clients_async(source, target):
+        used.append((source, target))
+
+    def fake_watch(config, source, target, run_sync, after_poll):
+        for _ in range(3):
+            run_sync()
+
+    monkeypatch.setattr(main, "watch", fake_watch)
+    monkeypatch.setattr(main, "init_results", lambda config, verbose: None)
+    monkeypatch.setattr(main, "sync_clients", lambda engine, source, target: used.append((source, target)))
+    monkeypatch.setattr(main, "sync_clients_async", sync_clients_async)
+    monkeypatch.setattr(GeoServerClient, "close", lambda client: closed.append(client))
+
+    server = {"url": "http://localhost:8080/geoserver", "user": "admin", "password": "geoserver"}
+    main.watch_catalog({"source": server, "target": server, "sync": {"engine": engine}}, None, False, "")
+
+    assert len(used) == 3 and len(set(used)) == 1
+    if engine == "asyncio":
+        assert all(client.client.is_closed for client in used[0])
+    else:
+        assert all(client in closed for client in used[0])